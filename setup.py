@@ -40,4 +40,7 @@ setup(
         "Operating System :: OS Independent",
     ],
     include_package_data=True,
+    entry_points={
+        "console_scripts": ["uds-odx-compile=uds.uds_config_tool.OdxCompiler:main"],
+    },
 )
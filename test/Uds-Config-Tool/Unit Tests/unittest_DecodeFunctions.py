@@ -13,6 +13,9 @@ __status__ = "Development"
 import unittest
 
 from uds.uds_config_tool import DecodeFunctions
+from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
+    fieldsExpression,
+)
 
 
 class CanTpMessageTestCase(unittest.TestCase):
@@ -110,6 +113,36 @@ class CanTpMessageTestCase(unittest.TestCase):
         result = DecodeFunctions.buildIntFromList(testVal)
         self.assertEqual(0x5AA5A55A5AA5A55A, result)
 
+    def testBuildIntFromBytes(self):
+        testVal = bytes([0x5A, 0xA5, 0x5A])
+        result = DecodeFunctions.buildIntFromList(testVal)
+        self.assertEqual(0x5AA55A, result)
+
+    def testBuildIntFromBytearraySlice(self):
+        testVal = bytearray([0x62, 0xF1, 0x90, 0x01])
+        result = DecodeFunctions.buildIntFromList(testVal[1:3])
+        self.assertEqual(0xF190, result)
+
+    def testBuildIntFromMemoryview(self):
+        testVal = memoryview(bytearray([0x62, 0xF1, 0x90, 0x01]))
+        result = DecodeFunctions.buildIntFromList(testVal[1:3])
+        self.assertEqual(0xF190, result)
+
+    def testBuildIntFromArrayElementAboveByte(self):
+        testVal = [0x01, 0x100]
+        result = DecodeFunctions.buildIntFromList(testVal)
+        self.assertEqual(0x200, result)
+
+    def testBuildIntFromBytesBytearraySlice(self):
+        testVal = bytearray([0x62, 0xF1, 0x90, 0x01])
+        result = DecodeFunctions.buildIntFromBytes(testVal[1:3])
+        self.assertEqual(0xF190, result)
+
+    def testBuildIntFromBytesList(self):
+        testVal = [0x5A, 0xA5, 0xA5, 0x5A]
+        result = DecodeFunctions.buildIntFromBytes(testVal)
+        self.assertEqual(0x5AA5A55A, result)
+
     def testStringToByteArrayAlphaOnlyAscii(self):
         testVal = "abcdefghijklmn"
         result = DecodeFunctions.stringToIntList(testVal, "ascii")
@@ -166,6 +199,11 @@ class CanTpMessageTestCase(unittest.TestCase):
         result = DecodeFunctions.intListToString(testVal, "ascii")
         self.assertEqual("abcdefghijklmn", result)
 
+    def testBytesToStringAlphaOnlyAscii(self):
+        testVal = b"abcdefghijklmn"
+        result = DecodeFunctions.intListToString(bytearray(testVal), "ascii")
+        self.assertEqual("abcdefghijklmn", result)
+
     def testUint16ArrayToUint8Array(self):
         testVal = [0x5AA5, 0xA55A]
         result = DecodeFunctions.intArrayToUInt8Array(testVal, "int16")
@@ -176,6 +214,38 @@ class CanTpMessageTestCase(unittest.TestCase):
         result = DecodeFunctions.intArrayToUInt8Array(testVal, "int32")
         self.assertEqual([0x5A, 0xA5, 0x5A, 0xA5, 0xA5, 0x5A, 0xA5, 0x5A], result)
 
+    def testUnpackFieldsFromBytesAndList(self):
+        testVal = [0x71, 0x01, 0xFF, 0x00, 0x02]
+        self.assertEqual(
+            (0x71, 0xFF00), DecodeFunctions.unpackFields(">BxH", bytearray(testVal))
+        )
+        self.assertEqual((0x71, 0xFF00), DecodeFunctions.unpackFields(">BxH", testVal))
+
+    def testUnpackFieldsFromShortMessage(self):
+        with self.assertRaises(Exception):
+            DecodeFunctions.unpackFields(">BxH", bytes([0x71, 0x01]))
+
+    def testNrcLabelTablesAreShared(self):
+        result = DecodeFunctions.nrcLabel(((0x12, "subFunctionNotSupported"),), 0x12)
+        self.assertEqual("subFunctionNotSupported", result)
+        self.assertIsNone(DecodeFunctions.nrcLabel(((0x12, "subFunctionNotSupported"),), 0x31))
+        self.assertIs(
+            DecodeFunctions._nrcTables[((0x12, "subFunctionNotSupported"),)],
+            DecodeFunctions._nrcTables[tuple([(0x12, "subFunctionNotSupported")])],
+        )
+
+    def testFieldsExpressionUsesOneStructUnpack(self):
+        self.assertEqual(
+            "DecodeFunctions.unpackFields('>BxH', input)", fieldsExpression([(0, 1), (2, 4)])
+        )
+
+    def testFieldsExpressionFallsBackToSlices(self):
+        result = fieldsExpression([(0, 1), (1, 4)])
+        self.assertEqual(
+            (0x71, 0x010203),
+            eval(result, {"DecodeFunctions": DecodeFunctions, "input": [0x71, 1, 2, 3]}),
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
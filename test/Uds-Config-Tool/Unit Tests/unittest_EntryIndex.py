@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from uds.config import Config, UdsConfig
+from uds.uds_config_tool.OdxCompiler import OdxCompiler
+from uds.uds_config_tool.UdsConfigTool import UdsTool
+
+odxDir = Path(__file__).parents[1] / "Functional Tests"
+odxFile = odxDir / "Bootloader.odx"
+
+
+class EntryIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        previousConfig = getattr(Config, "uds", None)
+        self.addCleanup(setattr, Config, "uds", previousConfig)
+        Config.uds = UdsConfig("CAN", 1, 1)
+
+    def bindRdbi(self, udsTool):
+        target = mock.Mock()
+        target.send.return_value = bytes([0x7F, 0x22, 0x31])
+        target.readDataByIdentifierContainer = udsTool.rdbiContainer
+        udsTool.rdbiContainer.bind_function(target)
+        return target
+
+    def test_servicesAreIndexedByIdentifierAndName(self):
+        udsTool = UdsTool()
+        udsTool.parse_service_containers(odxFile)
+
+        rdbiIndex = udsTool.rdbiContainer.entryIndex
+        self.assertEqual("ECU Serial Number", rdbiIndex[0xF18C])
+        self.assertEqual("ECU Serial Number", rdbiIndex["ECU Serial Number Read"])
+        self.assertEqual("Default Session", udsTool.diagnosticSessionControlContainer.entryIndex[1])
+        self.assertEqual("Erase Memory[1]", udsTool.routineControlContainer.entryIndex[(0xFF00, 1)])
+        self.assertNotIn(0xFF00, udsTool.routineControlContainer.entryIndex)
+
+    def test_indexedEntriesAreTableKeys(self):
+        for odx in (odxFile, odxDir / "EBC-Diagnostics_old.odx"):
+            udsTool = UdsTool()
+            udsTool.parse_service_containers(odx)
+
+            for containerName in udsTool.indexedContainers:
+                container = getattr(udsTool, containerName)
+                tables = [
+                    table
+                    for tableName, table in vars(container).items()
+                    if tableName.endswith("Functions")
+                ]
+                for key, entry in container.entryIndex.items():
+                    with self.subTest(odx=odx.name, key=key):
+                        self.assertTrue(any(entry in table for table in tables))
+
+    def test_boundMethodsAcceptIdentifiers(self):
+        udsTool = UdsTool()
+        udsTool.parse_service_containers(odxFile)
+        target = self.bindRdbi(udsTool)
+
+        response = target.readDataByIdentifier(0xF18C)
+
+        target.send.assert_called_once_with(bytearray([0x22, 0xF1, 0x8C]))
+        self.assertEqual(0x31, response["NRC"])
+
+        target = mock.Mock()
+        target.send.return_value = bytes([0x7F, 0x31, 0x31])
+        target.routineControlContainer = udsTool.routineControlContainer
+        udsTool.routineControlContainer.bind_function(target)
+        target.routineControl(0xFF00, 1, [("memoryAddress", [0x01]), ("memorySize", [0x01])])
+        self.assertEqual([0x31, 0x01, 0xFF, 0x00], list(target.send.call_args[0][0])[:4])
+
+        self.assertEqual("Erase Memory[2]", udsTool.routineControlContainer.entryIndex["Erase_Memory_Stop"])
+        target.routineControl("Erase_Memory_Stop", 2)
+        self.assertEqual([0x31, 0x02, 0xFF, 0x00], list(target.send.call_args[0][0])[:4])
+
+    def test_indexIsBuiltBeforeLazyServicesAreCreated(self):
+        Config.uds = UdsConfig("CAN", 1, 1, odx_lazy_load=True)
+        udsTool = UdsTool()
+        udsTool.create_service_containers(odxFile)
+        self.assertEqual("ECU Serial Number", udsTool.rdbiContainer.entryIndex[0xF18C])
+        target = self.bindRdbi(udsTool)
+
+        target.readDataByIdentifier(0xF18C)
+
+        target.send.assert_called_once_with(bytearray([0x22, 0xF1, 0x8C]))
+
+    def test_indexIsCached(self):
+        cacheDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cacheDir)
+        Config.uds = UdsConfig("CAN", 1, 1, odx_cache_dir=cacheDir)
+        UdsTool().create_service_containers(odxFile)
+
+        udsTool = UdsTool()
+        with mock.patch.object(UdsTool, "parse_service_containers") as parse:
+            udsTool.create_service_containers(odxFile)
+
+        parse.assert_not_called()
+        self.assertEqual("ECU Serial Number", udsTool.rdbiContainer.entryIndex[0xF18C])
+
+    def test_indexIsCompiled(self):
+        outputDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, outputDir)
+        moduleFile = OdxCompiler(odxFile).write(Path(outputDir) / "bootloader_odx.py")
+
+        udsTool = UdsTool()
+        udsTool.load_compiled_odx(moduleFile)
+
+        self.assertEqual("Erase Memory[1]", udsTool.routineControlContainer.entryIndex[(0xFF00, 1)])
+        self.assertEqual("ECU Serial Number", udsTool.rdbiContainer.entryIndex[0xF18C])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from uds.config import Config, UdsConfig
+from uds.uds_config_tool.FunctionCreation.ReadDataByIdentifierMethodFactory import (
+    ReadDataByIdentifierMethodFactory,
+)
+from uds.uds_config_tool.UdsConfigTool import LazyServiceTable, UdsTool
+
+odxFile = Path(__file__).parents[1] / "Functional Tests" / "Bootloader.odx"
+
+
+class LazyOdxTestCase(unittest.TestCase):
+    def setUp(self):
+        self.udsTool = UdsTool()
+
+        previousConfig = getattr(Config, "uds", None)
+        self.addCleanup(setattr, Config, "uds", previousConfig)
+        Config.uds = UdsConfig("CAN", 1, 1, odx_lazy_load=True)
+
+    def test_onlyTheServiceLookedUpIsCreated(self):
+        with mock.patch.object(
+            ReadDataByIdentifierMethodFactory,
+            "create_requestFunctions",
+            wraps=ReadDataByIdentifierMethodFactory.create_requestFunctions,
+        ) as createRequestFunctions:
+            self.udsTool.create_service_containers(odxFile)
+            createRequestFunctions.assert_not_called()
+
+            requestFunction = self.udsTool.rdbiContainer.requestDIDFunctions["ECU Serial Number"]
+            self.assertIn("ECU Serial Number", self.udsTool.rdbiContainer.checkDIDLengthFunctions)
+
+        createRequestFunctions.assert_called_once()
+        self.assertEqual(bytes([0xF1, 0x8C]), requestFunction())
+        self.assertEqual(["ECU Serial Number"], list(self.udsTool.rdbiContainer.requestDIDFunctions))
+        self.assertTrue(self.udsTool.rdbiService_flag)
+
+    def test_boundMethodCreatesTheService(self):
+        self.udsTool.create_service_containers(odxFile)
+        self.assertIsInstance(self.udsTool.rdbiContainer.requestSIDFunctions, LazyServiceTable)
+        target = mock.Mock()
+        target.send.return_value = bytes([0x7F, 0x22, 0x31])
+        target.readDataByIdentifierContainer = self.udsTool.rdbiContainer
+        self.udsTool.rdbiContainer.bind_function(target)
+
+        response = target.readDataByIdentifier("ECU Serial Number")
+
+        target.send.assert_called_once_with(bytearray([0x22, 0xF1, 0x8C]))
+        self.assertEqual(0x31, response["NRC"])
+
+    def test_fixedEntryServiceIsCreated(self):
+        self.udsTool.create_service_containers(odxFile)
+        target = mock.Mock()
+        target.send.return_value = bytes([0x7F, 0x37, 0x31])
+        target.transferExitContainer = self.udsTool.transferExitContainer
+        self.udsTool.transferExitContainer.bind_function(target)
+
+        response = target.transferExit([0x01])
+
+        target.send.assert_called_once_with(bytearray([0x37, 0x01]), responseRequired=True)
+        self.assertEqual(0x31, response["NRC"])
+
+    def test_unknownEntryIsMissing(self):
+        self.udsTool.create_service_containers(odxFile)
+        requestFunctions = self.udsTool.diagnosticSessionControlContainer.requestFunctions
+
+        self.assertNotIn("No Such Session", requestFunctions)
+        self.assertIsNone(requestFunctions.get("No Such Session"))
+        with self.assertRaises(KeyError):
+            requestFunctions["No Such Session"]
+        self.assertEqual(
+            bytes([0x10, 0x83]),
+            requestFunctions["Extended Diagnostic Session"](suppressResponse=True),
+        )
+
+    def test_createdServicesMatchTheParsedOnes(self):
+        self.udsTool.index_service_containers(odxFile)
+        indexedTables = self.udsTool.dump_service_tables()  # ... creates all the services
+        self.assertEqual({}, self.udsTool.lazyServices)
+
+        udsTool = UdsTool()
+        udsTool.parse_service_containers(odxFile)
+        parsedTables = udsTool.dump_service_tables()
+
+        self.assertEqual(sorted(parsedTables["flags"]), sorted(indexedTables["flags"]))
+        self.assertEqual(
+            {
+                containerName: {tableName: set(table) for tableName, table in tables.items()}
+                for containerName, tables in parsedTables["containers"].items()
+            },
+            {
+                containerName: {tableName: set(table) for tableName, table in tables.items()}
+                for containerName, tables in indexedTables["containers"].items()
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from uds.config import Config, UdsConfig
+from uds.uds_config_tool.OdxCache import OdxCache
+from uds.uds_config_tool.UdsConfigTool import UdsTool
+
+odxFile = Path(__file__).parents[1] / "Functional Tests" / "Bootloader.odx"
+
+
+class OdxCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.cacheDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cacheDir)
+        self.cache = OdxCache(self.cacheDir)
+
+        previousConfig = getattr(Config, "uds", None)
+        self.addCleanup(setattr, Config, "uds", previousConfig)
+        Config.uds = UdsConfig("CAN", 1, 1, odx_cache_dir=self.cacheDir)
+
+    def test_missingFileIsNotCached(self):
+        self.assertIsNone(self.cache.load(odxFile))
+
+    def test_storedTablesAreLoadedBack(self):
+        UdsTool.parse_service_containers(odxFile)
+        self.cache.store(odxFile, UdsTool.dump_service_tables())
+
+        serviceTables = self.cache.load(odxFile)
+
+        rdbi = serviceTables["containers"]["rdbiContainer"]
+        self.assertEqual(
+            bytes([0xF1, 0x8C]), rdbi["requestDIDFunctions"]["ECU Serial Number"]()
+        )
+        dsc = serviceTables["containers"]["diagnosticSessionControlContainer"]
+        self.assertEqual(
+            bytes([0x10, 0x83]),
+            dsc["requestFunctions"]["Extended Diagnostic Session"](suppressResponse=True),
+        )
+        securityChecks = serviceTables["containers"]["securityAccessContainer"][
+            "positiveResponseFunctions"
+        ]
+        self.assertTrue(all(isinstance(checks, tuple) for checks in securityChecks.values()))
+        self.assertIn("rdbiService_flag", serviceTables["flags"])
+
+    def test_createServiceContainersUsesTheCache(self):
+        UdsTool.create_service_containers(odxFile)
+        self.assertTrue(self.cache.cachePath(odxFile).exists())
+
+        with mock.patch.object(UdsTool, "parse_service_containers") as parse:
+            UdsTool.create_service_containers(odxFile)
+
+        parse.assert_not_called()
+        self.assertIn(
+            "ECU Serial Number", UdsTool.rdbiContainer.requestDIDFunctions
+        )
+
+    def test_editedOdxMissesTheCache(self):
+        editedOdx = Path(self.cacheDir) / "edited.odx"
+        editedOdx.write_bytes(odxFile.read_bytes() + b"<!-- edited -->")
+
+        self.assertNotEqual(self.cache.cachePath(odxFile), self.cache.cachePath(editedOdx))
+
+    def test_corruptCacheFileIsIgnored(self):
+        cachePath = self.cache.cachePath(odxFile)
+        cachePath.write_bytes(b"\x00not a cache file")
+
+        self.assertIsNone(self.cache.load(odxFile))
+
+        with mock.patch.object(
+            UdsTool, "parse_service_containers", wraps=UdsTool.parse_service_containers
+        ) as parse:
+            UdsTool.create_service_containers(odxFile)
+
+        parse.assert_called_once()
+        self.assertIsNotNone(self.cache.load(odxFile))
+
+
+if __name__ == "__main__":
+    unittest.main()
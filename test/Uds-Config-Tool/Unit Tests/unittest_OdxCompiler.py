@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import contextlib
+import io
+import linecache
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from uds.uds_config_tool.OdxCompiler import OdxCompiler, main
+from uds.uds_config_tool.UdsConfigTool import UdsTool
+
+odxFile = Path(__file__).parents[1] / "Functional Tests" / "Bootloader.odx"
+
+
+class OdxCompilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.outputDir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.outputDir)
+
+    def test_generatedFunctionsShowTheirSource(self):
+        UdsTool.parse_service_containers(odxFile)
+        requestFunction = UdsTool.rdbiContainer.requestDIDFunctions["ECU Serial Number"]
+
+        code = requestFunction.__code__
+        self.assertIn("def ", linecache.getline(code.co_filename, 1))
+
+    def test_compiledModuleIsLoadedWithoutParsing(self):
+        modulePath = OdxCompiler(odxFile).write(self.outputDir / "bootloader.py")
+
+        with mock.patch.object(UdsTool, "parse_service_containers") as parse:
+            UdsTool.create_service_containers(modulePath)
+
+        parse.assert_not_called()
+        self.assertEqual(
+            bytes([0xF1, 0x8C]),
+            UdsTool.rdbiContainer.requestDIDFunctions["ECU Serial Number"](),
+        )
+        self.assertEqual(
+            bytes([0x10, 0x83]),
+            UdsTool.diagnosticSessionControlContainer.requestFunctions[
+                "Extended Diagnostic Session"
+            ](suppressResponse=True),
+        )
+        self.assertEqual(
+            0x31,
+            UdsTool.rdbiContainer.negativeResponseFunctions["ECU Serial Number"](
+                bytes([0x7F, 0x22, 0x31])
+            )["NRC"],
+        )
+
+    def test_compiledModuleMatchesTheOdx(self):
+        source = OdxCompiler(odxFile).compile()
+        namespace = {}
+        exec(compile(source, "bootloader.py", "exec"), namespace)
+
+        UdsTool.parse_service_containers(odxFile)
+        parsedTables = UdsTool.dump_service_tables()
+        for containerName, tables in namespace["SERVICE_TABLES"].items():
+            for tableName, table in tables.items():
+                self.assertEqual(
+                    set(table),
+                    set(parsedTables["containers"][containerName][tableName]),
+                )
+        self.assertTrue(set(namespace["SERVICE_FLAGS"]) <= set(parsedTables["flags"]))
+
+    def test_moduleOfAnotherLibraryVersionIsRefused(self):
+        modulePath = OdxCompiler(odxFile).write(self.outputDir / "stale.py")
+        source = modulePath.read_text()
+        modulePath.write_text(
+            source.replace("LIBRARY_FINGERPRINT = '", "LIBRARY_FINGERPRINT = 'old")
+        )
+
+        with self.assertRaises(Exception):
+            UdsTool.create_service_containers(modulePath)
+
+    def test_commandLine(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(0, main([str(odxFile), "-o", str(self.outputDir)]))
+
+        self.assertTrue((self.outputDir / "Bootloader.py").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
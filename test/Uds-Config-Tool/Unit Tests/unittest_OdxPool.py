@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from uds.config import Config, UdsConfig
+from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
+    getGeneratedSource,
+)
+from uds.uds_config_tool.OdxPool import loadOdxFiles
+from uds.uds_config_tool.UdsConfigTool import UdsTool
+
+odxDir = Path(__file__).parents[1] / "Functional Tests"
+odxFiles = [odxDir / "Bootloader.odx", odxDir / "EBC-Diagnostics_old.odx"]
+
+
+class OdxPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        UdsTool.sharedTools.clear()
+        self.addCleanup(UdsTool.sharedTools.clear)
+
+        previousConfig = getattr(Config, "uds", None)
+        self.addCleanup(setattr, Config, "uds", previousConfig)
+        Config.uds = UdsConfig("CAN", 1, 1)
+
+    def test_poolMatchesParsingInProcess(self):
+        udsTools = loadOdxFiles(odxFiles, processes=2)
+
+        for odxFile in odxFiles:
+            udsTool = UdsTool()
+            udsTool.parse_service_containers(odxFile)
+            parsedTables = udsTool.dump_service_tables()
+            pooledTables = udsTools[odxFile].dump_service_tables()
+            self.assertEqual(sorted(parsedTables["flags"]), sorted(pooledTables["flags"]))
+            for containerName, tables in parsedTables["containers"].items():
+                for tableName, table in tables.items():
+                    pooledTable = pooledTables["containers"][containerName][tableName]
+                    self.assertEqual(set(table), set(pooledTable))
+                    for entry, aFunction in table.items():
+                        if callable(aFunction):
+                            self.assertEqual(
+                                getGeneratedSource(aFunction),
+                                getGeneratedSource(pooledTable[entry]),
+                            )
+
+    def test_loadedFilesAreShared(self):
+        udsTools = loadOdxFiles(odxFiles + odxFiles[:1], processes=1)
+
+        with mock.patch.object(UdsTool, "parse_service_containers") as parse:
+            udsTool = UdsTool.shared_service_containers(odxFiles[0])
+
+        parse.assert_not_called()
+        self.assertIs(udsTools[odxFiles[0]], udsTool)
+        self.assertEqual(2, len(UdsTool.sharedTools))
+        self.assertEqual(
+            bytes([0xF1, 0x8C]),
+            udsTool.rdbiContainer.requestDIDFunctions["ECU Serial Number"](),
+        )
+
+    def test_cachedFilesAreNotCompiled(self):
+        cacheDir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cacheDir)
+        Config.uds = UdsConfig("CAN", 1, 1, odx_cache_dir=cacheDir)
+        loadOdxFiles(odxFiles[:1], processes=1)
+        UdsTool.sharedTools.clear()
+
+        with mock.patch("uds.uds_config_tool.OdxPool.compileOdx") as compileOdx:
+            udsTools = loadOdxFiles(odxFiles[:1], processes=1)
+
+        compileOdx.assert_not_called()
+        self.assertIn(
+            "ECU Serial Number",
+            udsTools[odxFiles[0]].rdbiContainer.requestDIDFunctions,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import io
+import unittest
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from uds.uds_config_tool.OdxStream import OdxServiceStream, packElement, unpackElement
+
+odxFile = Path(__file__).parents[1] / "Functional Tests" / "Bootloader.odx"
+
+# services come before the messages they refer to, as in the DIAG-LAYERs of ODX files
+layerOdx = b"""<ODX><DIAG-LAYER-CONTAINER ID="DLC"><BASE-VARIANTS><BASE-VARIANT ID="BV">
+<ADMIN-DATA><DOC-REVISIONS><DOC-REVISION>1</DOC-REVISION></DOC-REVISIONS></ADMIN-DATA>
+<DIAG-DATA-DICTIONARY-SPEC><DATA-OBJECT-PROPS>
+<DATA-OBJECT-PROP ID="DOP_1"><SHORT-NAME>dop</SHORT-NAME></DATA-OBJECT-PROP>
+</DATA-OBJECT-PROPS></DIAG-DATA-DICTIONARY-SPEC>
+<DIAG-COMMS>
+<DIAG-SERVICE ID="DS_1"><SHORT-NAME>first</SHORT-NAME><REQUEST-REF ID-REF="RQ_1"/>
+<NEG-RESPONSE-REFS><NEG-RESPONSE-REF ID-REF="NR_1"/></NEG-RESPONSE-REFS></DIAG-SERVICE>
+<DIAG-SERVICE ID="DS_2"><SHORT-NAME>second</SHORT-NAME><REQUEST-REF ID-REF="RQ_2"/></DIAG-SERVICE>
+</DIAG-COMMS>
+<REQUESTS>
+<REQUEST ID="RQ_1"><PARAMS><PARAM><DOP-REF ID-REF="DOP_1"/></PARAM></PARAMS></REQUEST>
+<REQUEST ID="RQ_2"><PARAMS/></REQUEST>
+</REQUESTS>
+<NEG-RESPONSES><NEG-RESPONSE ID="NR_1"><PARAMS/></NEG-RESPONSE></NEG-RESPONSES>
+</BASE-VARIANT></BASE-VARIANTS></DIAG-LAYER-CONTAINER></ODX>"""
+
+
+class OdxServiceStreamTestCase(unittest.TestCase):
+    def test_servicesAreYieldedInFileOrder(self):
+        root = ET.parse(odxFile).getroot()
+        expected = [service.attrib["ID"] for service in root.iter("DIAG-SERVICE")]
+
+        streamed = [service.attrib["ID"] for service, _ in OdxServiceStream(odxFile)]
+
+        self.assertEqual(expected, streamed)
+
+    def test_referencesAreResolved(self):
+        services = {}
+        for service, xmlElements in OdxServiceStream(io.BytesIO(layerOdx)):
+            services[service.find("SHORT-NAME").text] = (service, xmlElements)
+
+        service, xmlElements = services["first"]
+        request = xmlElements[service.find("REQUEST-REF").attrib["ID-REF"]]
+        self.assertEqual("REQUEST", request.tag)
+        dop = xmlElements[request.find("PARAMS/PARAM/DOP-REF").attrib["ID-REF"]]
+        self.assertEqual("dop", dop.find("SHORT-NAME").text)
+        self.assertEqual("NEG-RESPONSE", xmlElements["NR_1"].tag)
+        self.assertEqual(["second"], list(services)[1:])
+
+    def test_serviceWaitsForTheMessagesItRefersTo(self):
+        stream = iter(OdxServiceStream(io.BytesIO(layerOdx)))
+
+        service, xmlElements = next(stream)
+
+        self.assertEqual("DS_1", service.attrib["ID"])
+        self.assertIn("NR_1", xmlElements)
+
+    def test_missingReferenceIsYieldedAtTheEnd(self):
+        odx = layerOdx.replace(b'<REQUEST-REF ID-REF="RQ_2"/>', b'<REQUEST-REF ID-REF="RQ_9"/>')
+
+        services = [service.attrib["ID"] for service, _ in OdxServiceStream(io.BytesIO(odx))]
+
+        self.assertEqual(["DS_1", "DS_2"], services)
+
+    def test_packedElementIsRebuilt(self):
+        element = ET.fromstring(b'<PARAM SEMANTIC="SERVICE-ID"><CODED-VALUE>34</CODED-VALUE></PARAM>')
+
+        rebuilt = unpackElement(packElement(element))
+
+        self.assertEqual(ET.tostring(element), ET.tostring(rebuilt))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from uds.config import Config, UdsConfig
+from uds.uds_config_tool.UdsConfigTool import UdsTool
+
+odxFile = Path(__file__).parents[1] / "Functional Tests" / "EBC-Diagnostics_old.odx"
+
+
+class RdbiPlannerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.udsTool = UdsTool()
+        cls.udsTool.parse_service_containers(odxFile)
+        cls.container = cls.udsTool.rdbiContainer
+        cls.lengths = {
+            did: cls.container.checkDIDLengthFunctions[entry]()
+            for did, entry in cls.container.entryIndex.items()
+            if isinstance(did, int)
+        }
+
+    def setUp(self):
+        previousConfig = getattr(Config, "uds", None)
+        self.addCleanup(setattr, Config, "uds", previousConfig)
+        Config.uds = UdsConfig("CAN", 1, 1)
+
+        self.target = mock.Mock()
+        self.target.send.side_effect = self.ecuResponse
+        self.target.readDataByIdentifierContainer = self.container
+        self.container.bind_function(self.target)
+        self.unsupported = set()
+
+    # answers with the DIDs requested, zero filled, or requestOutOfRange for an unsupported DID
+    def ecuResponse(self, request):
+        dids = [int.from_bytes(request[i : i + 2], "big") for i in range(1, len(request), 2)]
+        if self.unsupported.intersection(dids):
+            return bytearray([0x7F, 0x22, 0x31])
+        response = bytearray([0x62])
+        for did in dids:
+            response += did.to_bytes(2, "big") + bytes(self.lengths[did] - 2)
+        return response
+
+    def test_planFitsTheLimits(self):
+        dids = list(self.lengths)
+
+        requests = self.container.plan_requests(dids, 62, 4)
+
+        self.assertEqual(len(dids), sum(len(entries) for entries in requests))
+        for entries in requests:
+            self.assertLessEqual(len(entries), 4)
+            responseLength = 1 + sum(self.container.checkDIDLengthFunctions[e]() for e in entries)
+            self.assertTrue(responseLength <= 62 or len(entries) == 1)
+
+    def test_fewestRequestsAreSent(self):
+        dids = list(self.lengths)
+
+        results = self.target.readDataByIdentifiers(dids)
+
+        self.assertEqual(1, self.target.send.call_count)
+        self.assertEqual(dids, list(results))
+        self.assertEqual(
+            self.target.readDataByIdentifier(self.container.entryIndex[dids[0]]),
+            results[dids[0]],
+        )
+
+    def test_maxDidsFromConfig(self):
+        Config.uds = UdsConfig("CAN", 1, 1, rdbi_max_dids=10)
+        dids = list(self.lengths)[:25]
+
+        self.target.readDataByIdentifiers(dids)
+
+        self.assertEqual(3, self.target.send.call_count)
+
+    def test_negativeResponseIsRetriedPerDid(self):
+        dids = list(self.lengths)[:5]
+        self.unsupported.add(dids[2])
+
+        results = self.target.readDataByIdentifiers(dids)
+
+        self.assertEqual(1 + len(dids), self.target.send.call_count)
+        self.assertEqual(0x31, results[dids[2]]["NRC"])
+        self.assertNotIn("NRC", results[dids[0]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import asyncio
+import threading
+import unittest
+from types import SimpleNamespace
+
+from uds import AsyncCanTp, CanTpDispatcher
+from uds.config import Config
+from uds.uds_communications.TransportProtocols.Can.CanTpTypes import (
+    CanTpError,
+    CanTpTimeoutError,
+    N_Result,
+)
+
+isoTpConfig = {
+    "req_id": 0x600,
+    "res_id": 0x650,
+    "addressing_type": "NORMAL",
+    "n_sa": 0xFF,
+    "n_ta": 0xFF,
+    "n_ae": 0xFF,
+    "m_type": "DIAGNOSTICS",
+    "discard_neg_resp": False,
+    "tx_dl": 8,
+}
+
+
+##
+# @brief stands in for the bus connector, recording the transmitted frames
+class FakeConnector(object):
+    def __init__(self):
+        self.frames = []
+        self.onTransmit = None
+
+    def transmit(self, data, reqId):
+        self.frames.append((reqId, list(data)))
+        if self.onTransmit is not None:
+            self.onTransmit(reqId, list(data))
+
+
+def canMessage(data, arbitrationId=0x650):
+    return SimpleNamespace(arbitration_id=arbitrationId, data=bytearray(data))
+
+
+class AsyncCanTpTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Config.load_isotp_config(dict(isoTpConfig))
+        self.connector = FakeConnector()
+        self.tp = AsyncCanTp(connector=self.connector)
+
+    async def test_sendSingleFrame(self):
+        await self.tp.send([0x10, 0x03])
+
+        self.assertEqual([(0x600, [0x02, 0x10, 0x03, 0, 0, 0, 0, 0])], self.connector.frames)
+
+    async def test_sendMultiFrameWaitsForFlowControl(self):
+        def respond(reqId, frame):
+            if frame[0] == 0x10:
+                self.tp.callback_onReceive(canMessage([0x30, 0x00, 0x00]))
+
+        self.connector.onTransmit = respond
+        await self.tp.send(list(range(20)))
+
+        frames = [frame for reqId, frame in self.connector.frames]
+        self.assertEqual([0x10, 20] + list(range(6)), frames[0])
+        self.assertEqual([0x21] + list(range(6, 13)), frames[1])
+        self.assertEqual([0x22] + list(range(13, 20)), frames[2])
+
+    async def test_sendHonoursBlockSize(self):
+        def respond(reqId, frame):
+            if frame[0] in (0x10, 0x22):
+                self.tp.callback_onReceive(canMessage([0x30, 0x02, 0x00]))
+
+        self.connector.onTransmit = respond
+        await self.tp.send(list(range(30)))
+
+        self.assertEqual(5, len(self.connector.frames))
+
+    async def test_sendWithoutFlowControlTimesOut(self):
+        with self.assertRaises(Exception):
+            await self.tp.send(list(range(20)))
+
+    async def test_flowControlTimeoutIsNBs(self):
+        Config.load_isotp_config(dict(isoTpConfig, n_bs=0.05))
+        tp = AsyncCanTp(connector=self.connector)
+
+        with self.assertRaises(CanTpTimeoutError) as context:
+            await asyncio.wait_for(tp.send(list(range(20))), 0.5)
+
+        self.assertEqual(N_Result.N_TIMEOUT_Bs, context.exception.nResult)
+
+    async def test_consecutiveFrameTimeoutIsNCr(self):
+        Config.load_isotp_config(dict(isoTpConfig, n_cr=0.05))
+        tp = AsyncCanTp(connector=self.connector)
+        tp.callback_onReceive(canMessage([0x10, 15] + list(range(6))))
+
+        with self.assertRaises(CanTpTimeoutError) as context:
+            await asyncio.wait_for(tp.recv(5), 0.5)
+
+        self.assertEqual(N_Result.N_TIMEOUT_Cr, context.exception.nResult)
+
+    async def test_sendRidesThroughFlowControlWait(self):
+        Config.load_isotp_config(dict(isoTpConfig, n_wft_max=2))
+        tp = AsyncCanTp(connector=self.connector)
+
+        def respond(reqId, frame):
+            if frame[0] == 0x10:
+                tp.callback_onReceive(canMessage([0x31, 0x00, 0x00]))
+                tp.callback_onReceive(canMessage([0x31, 0x00, 0x00]))
+                tp.callback_onReceive(canMessage([0x30, 0x00, 0x00]))
+
+        self.connector.onTransmit = respond
+        await tp.send(list(range(20)))
+
+        self.assertEqual(3, len(self.connector.frames))
+        self.assertEqual(2, tp.flowControlWaitCount)
+
+    async def test_tooManyFlowControlWaits(self):
+        Config.load_isotp_config(dict(isoTpConfig, n_wft_max=1))
+        tp = AsyncCanTp(connector=self.connector)
+
+        def respond(reqId, frame):
+            tp.callback_onReceive(canMessage([0x31, 0x00, 0x00]))
+            tp.callback_onReceive(canMessage([0x31, 0x00, 0x00]))
+
+        self.connector.onTransmit = respond
+        with self.assertRaises(CanTpError) as context:
+            await tp.send(list(range(20)))
+
+        self.assertEqual(N_Result.N_WFT_OVFLW, context.exception.nResult)
+
+    async def test_recvMultiFrameAnswersFlowControl(self):
+        def respond(reqId, frame):
+            if frame[0] == 0x30:
+                self.tp.callback_onReceive(canMessage([0x21] + list(range(6, 13))))
+                self.tp.callback_onReceive(canMessage([0x22, 13, 14, 0, 0, 0, 0, 0]))
+
+        self.connector.onTransmit = respond
+        self.tp.callback_onReceive(canMessage([0x10, 15] + list(range(6))))
+
+        self.assertEqual(bytes(range(15)), await self.tp.recv(1))
+        self.assertEqual(0x30, self.connector.frames[0][1][0])
+
+    async def test_recvFromListenerThread(self):
+        threading.Timer(
+            0.05, self.tp.callback_onReceive, [canMessage([0x02, 0x50, 0x03])]
+        ).start()
+
+        self.assertEqual(bytes([0x50, 0x03]), await self.tp.recv(1))
+
+    async def test_recvTimeout(self):
+        with self.assertRaises(Exception):
+            await self.tp.recv(0.05)
+
+    async def test_concurrentConversationsOnOneLoop(self):
+        dispatcher = CanTpDispatcher()
+        channels = [
+            AsyncCanTp(
+                connector=self.connector,
+                dispatcher=dispatcher,
+                reqId=0x700 + i,
+                resId=0x780 + i,
+            )
+            for i in range(50)
+        ]
+
+        def respond(reqId, frame):
+            if frame[0] == 0x02:
+                asyncio.get_running_loop().call_later(
+                    0.01,
+                    dispatcher.callback_onReceive,
+                    canMessage([0x02, 0x50, reqId & 0xFF], reqId + 0x80),
+                )
+
+        self.connector.onTransmit = respond
+
+        async def conversation(tp):
+            await tp.send([0x10, 0x01])
+            return await tp.recv(1)
+
+        responses = await asyncio.gather(*[conversation(tp) for tp in channels])
+
+        self.assertEqual([bytes([0x50, i]) for i in range(50)], responses)
+        for tp in channels:
+            tp.close()
+        self.assertEqual(0, len(dispatcher))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import asyncio
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+from uds import AsyncUds, CanTpDispatcher
+from uds.config import Config
+
+isoTpConfig = {
+    "req_id": 0x600,
+    "res_id": 0x650,
+    "addressing_type": "NORMAL",
+    "n_sa": 0xFF,
+    "n_ta": 0xFF,
+    "n_ae": 0xFF,
+    "m_type": "DIAGNOSTICS",
+    "discard_neg_resp": False,
+}
+
+udsConfig = {"transport_protocol": "CAN", "p2_can_client": 1, "p2_can_server": 1}
+
+odxFile = (
+    Path(__file__).parents[2] / "Uds-Config-Tool" / "Functional Tests" / "Bootloader.odx"
+)
+
+
+##
+# @brief stands in for the ECUs on the bus, answering single frame requests from a table
+class FakeEcu(object):
+    def __init__(self, dispatcher, answers):
+        self.dispatcher = dispatcher
+        self.answers = answers
+        self.requests = []
+
+    def transmit(self, data, reqId):
+        if data[0] == 0:
+            request = bytes(data[2 : 2 + data[1]])
+        else:
+            request = bytes(data[1 : 1 + data[0]])
+        self.requests.append((reqId, request))
+        for response in self.answers.get(request, []):
+            if len(response) < 8:
+                frame = [len(response)] + list(response)
+            else:
+                frame = [0, len(response)] + list(response)
+            asyncio.get_running_loop().call_soon(
+                self.dispatcher.callback_onReceive,
+                SimpleNamespace(arbitration_id=reqId + 0x50, data=bytearray(frame)),
+            )
+
+
+class AsyncUdsTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        Config.load_com_layer_config(dict(isoTpConfig), dict(udsConfig))
+        self.dispatcher = CanTpDispatcher()
+        self.ecu = None
+
+    def createUds(self, answers, **kwargs):
+        if getattr(self, "ecu", None) is None:
+            self.ecu = FakeEcu(self.dispatcher, answers)
+        uds = AsyncUds(
+            odx=odxFile, connector=self.ecu, dispatcher=self.dispatcher, **kwargs
+        )
+        self.addCleanup(uds.close)
+        return uds
+
+    async def test_send(self):
+        uds = self.createUds({bytes([0x10, 0x01]): [[0x50, 0x01]]})
+
+        self.assertEqual(bytes([0x50, 0x01]), await uds.send([0x10, 0x01]))
+
+    async def test_sendWaitsForPendingResponse(self):
+        uds = self.createUds({bytes([0x31, 0x01]): [[0x7F, 0x31, 0x78], [0x71, 0x01]]})
+
+        self.assertEqual(bytes([0x71, 0x01]), await uds.send([0x31, 0x01]))
+        self.assertEqual(1, uds.responseTiming.history(0x31)[0][1])
+
+    async def test_readDataByIdentifier(self):
+        serialNumber = b"SN0123456789ABCD"
+        uds = self.createUds({bytes([0x22, 0xF1, 0x8C]): [b"\x62\xF1\x8C" + serialNumber]})
+
+        self.assertEqual(
+            {"ECU Serial Number": serialNumber.decode()},
+            await uds.readDataByIdentifier("ECU Serial Number"),
+        )
+
+    async def test_readDataByIdentifierNegativeResponse(self):
+        uds = self.createUds({bytes([0x22, 0xF1, 0x8C]): [[0x7F, 0x22, 0x31]]})
+
+        result = await uds.readDataByIdentifier("ECU Serial Number")
+
+        self.assertEqual(0x31, result["NRC"])
+
+    async def test_serviceOfSeveralRequestsDecodesEachResponseOnce(self):
+        serialNumber = b"SN0123456789ABCD"
+        uds = self.createUds(
+            {
+                bytes([0x22, 0xF1, 0x8C]): [b"\x62\xF1\x8C" + serialNumber],
+                bytes([0x22, 0xD1, 0x00]): [[0x62, 0xD1, 0x00, 0x01]],
+            }
+        )
+        decoded = []
+        checkFunctions = uds.readDataByIdentifierContainer.checkDIDResponseFunctions
+        for did in ("ECU Serial Number", "Active Diagnostic Session"):
+            check = checkFunctions[did]
+            checkFunctions[did] = lambda *args, did=did, check=check: (
+                decoded.append(did),
+                check(*args),
+            )[1]
+
+        result = await uds.readDataByIdentifiers(
+            ["ECU Serial Number", "Active Diagnostic Session"], maxDids=1
+        )
+
+        self.assertEqual(2, len(result))
+        self.assertEqual(2, len(self.ecu.requests))
+        self.assertEqual(
+            ["Active Diagnostic Session", "ECU Serial Number"], sorted(decoded)
+        )
+
+    async def test_cancelledServiceSendsNoMoreRequests(self):
+        uds = self.createUds({})  # ... no answer, the first request waits for P2
+
+        task = asyncio.ensure_future(
+            uds.readDataByIdentifiers(
+                ["ECU Serial Number", "Active Diagnostic Session"], maxDids=1
+            )
+        )
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(1, len(self.ecu.requests))
+
+    async def test_servicesOfSeveralEcusRunConcurrently(self):
+        answers = {bytes([0x10, 0x03]): [[0x50, 0x03, 0x00, 0x32, 0x01, 0xF4]]}
+        ecus = [
+            self.createUds(answers, reqId=0x600 + i, resId=0x650 + i) for i in range(20)
+        ]
+
+        results = await asyncio.gather(
+            *[uds.diagnosticSessionControl("Extended Diagnostic Session") for uds in ecus]
+        )
+
+        self.assertEqual(20, len(results))
+        self.assertEqual(
+            sorted(0x600 + i for i in range(20)),
+            sorted(reqId for reqId, request in self.ecu.requests),
+        )
+
+    async def test_testerPresentSentAfterTimeout(self):
+        uds = self.createUds(
+            {bytes([0x10, 0x01]): [[0x50, 0x01, 0x00, 0x32, 0x01, 0xF4]]}
+        )
+
+        await uds.diagnosticSessionControl(
+            "Default Session", testerPresent=True, tpTimeout=0.1
+        )
+        await asyncio.sleep(0.05)
+        self.assertEqual(1, len(self.ecu.requests))
+        await asyncio.sleep(0.1)
+
+        self.assertEqual(bytes([0x3E, 0x80]), self.ecu.requests[1][1])
+
+    async def test_syncHelpersStayPlainMethods(self):
+        uds = self.createUds({})
+
+        self.assertIsInstance(uds.sessionTimeSinceLastSend(), int)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,10 +10,53 @@ __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
 
+import threading
 import unittest
+from time import perf_counter
+from types import SimpleNamespace
 from unittest.mock import patch
 
 from uds import CanTp
+from uds.config import Config
+from uds.uds_communications.TransportProtocols.Can.CanTpFlowControl import (
+    FlowControlProfile,
+)
+from uds.uds_communications.TransportProtocols.Can.CanTpTypes import (
+    CanTpError,
+    CanTpTimeoutError,
+    N_Result,
+)
+
+
+isoTpConfig = {
+    "req_id": 0x600,
+    "res_id": 0x650,
+    "addressing_type": "NORMAL",
+    "n_sa": 0xFF,
+    "n_ta": 0xFF,
+    "n_ae": 0xFF,
+    "m_type": "DIAGNOSTICS",
+    "discard_neg_resp": False,
+}
+
+
+##
+# @brief stands in for the bus connector, recording the transmitted frames
+class FakeConnector(object):
+    def __init__(self):
+        self.frames = []
+        self.ids = []
+        self.onTransmit = None
+
+    def transmit(self, data, reqId):
+        self.frames.append(list(data))
+        self.ids.append(reqId)
+        if self.onTransmit is not None:
+            self.onTransmit(list(data))
+
+
+def canMessage(data, arbitrationId=0x650):
+    return SimpleNamespace(arbitration_id=arbitrationId, data=data)
 
 
 class CanTpTestCase(unittest.TestCase):
@@ -1609,5 +1652,395 @@ class CanTpTestCase(unittest.TestCase):
         self.assertEqual(a[0], result)
 
 
+class CanTpConnectorTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_isotp_config(dict(isoTpConfig))
+        self.connector = FakeConnector()
+        self.tp = CanTp(connector=self.connector)
+
+    def test_recvWakesOnReceivedFrame(self):
+        threading.Timer(
+            0.05, self.tp.callback_onReceive, [canMessage([0x02, 0x50, 0x01])]
+        ).start()
+        start = perf_counter()
+        self.assertEqual(bytes([0x50, 0x01]), self.tp.recv(1))
+        self.assertLess(perf_counter() - start, 0.5)
+
+    def test_pollingWaitWithoutTimeout(self):
+        self.tp.getNextBufferedMessage = lambda: None  # ... as Uds.overwrite_receive_method does
+        start = perf_counter()
+        self.tp.waitForBufferedMessage(None, 0.01)
+        self.assertLess(perf_counter() - start, 0.5)
+
+    def test_recvMultiFrameAnswersFlowControl(self):
+        def respond(frame):
+            if frame[0] == 0x30:
+                self.tp.callback_onReceive(canMessage([0x21] + list(range(62, 69))))
+
+        self.connector.onTransmit = respond
+        self.tp.callback_onReceive(canMessage([0x10, 0x45] + list(range(0, 62))))
+        self.assertEqual(bytes(range(0, 69)), self.tp.recv(1))
+
+    def test_multiFrameSendWithBlocks(self):
+        def respond(frame):
+            if frame[0] & 0xF0 == 0x10 or len(self.connector.frames) == 3:
+                self.tp.callback_onReceive(canMessage([0x30, 0x02, 0x00]))
+
+        self.connector.onTransmit = respond
+        payload = bytes(range(200))
+        self.tp.send(payload)
+
+        frames = self.connector.frames
+        self.assertEqual(4, len(frames))
+        self.assertEqual([0x10, 200] + list(range(62)), frames[0])
+        self.assertEqual([0x21] + list(range(62, 125)), frames[1])
+        self.assertEqual([0x22] + list(range(125, 188)), frames[2])
+        self.assertEqual([0x23] + list(range(188, 200)) + [0x00] * 3, frames[3])
+
+    def test_multiFrameSendHonoursSubMillisecondStMin(self):
+        def respond(frame):
+            if frame[0] & 0xF0 == 0x10:
+                self.tp.callback_onReceive(canMessage([0x30, 0x00, 0xF5]))
+
+        self.connector.onTransmit = respond
+        start = perf_counter()
+        self.tp.send(bytes(63 * 40))
+        self.assertEqual(41, len(self.connector.frames))
+        self.assertLess(perf_counter() - start, 0.2)
+
+    def test_consecutiveFramesShareOneBuffer(self):
+        frames = self.tp.create_consecutiveFrames(bytearray(range(130)), 2)
+        self.assertEqual(3, len(frames))
+        self.assertIs(frames[0].obj, frames[2].obj)
+        self.assertEqual(0x23, frames[2][0])
+        self.assertEqual(64, len(frames[1]))
+        self.assertEqual(8, len(frames[2]))
+
+    def test_sequenceNumberWraps(self):
+        frames = self.tp.create_consecutiveFrames(bytes(63 * 17))
+        self.assertEqual(0x2F, frames[14][0])
+        self.assertEqual(0x20, frames[15][0])
+        self.assertEqual(0x21, frames[16][0])
+
+    def test_singleFrameEscapeSequence(self):
+        self.tp.send(bytes(range(10)))
+        self.assertEqual([[0x00, 10] + list(range(10))], self.connector.frames)
+
+        self.tp.callback_onReceive(canMessage([0x00, 9] + list(range(9)) + [0x00]))
+        self.assertEqual(bytes(range(9)), self.tp.recv(1))
+
+    def test_firstFrameEscapeSequence(self):
+        frame, dataLength = self.tp.create_firstFrame(bytes(5000))
+        self.assertEqual([0x10, 0x00, 0x00, 0x00, 0x13, 0x88], list(frame[:6]))
+        self.assertEqual(58, dataLength)
+        self.assertEqual(64, len(frame))
+
+    def test_recvFirstFrameEscapeSequence(self):
+        payload = [i & 0xFF for i in range(5000)]
+
+        def respond(frame):
+            if frame[0] == 0x30:
+                frames = self.tp.create_consecutiveFrames(payload, 58)
+                for cf in frames:
+                    self.tp.callback_onReceive(canMessage(cf))
+
+        self.connector.onTransmit = respond
+        self.tp.callback_onReceive(
+            canMessage([0x10, 0x00, 0x00, 0x00, 0x13, 0x88] + payload[:58])
+        )
+        self.assertEqual(bytes(payload), self.tp.recv(1))
+
+    def test_recvTimeout(self):
+        with self.assertRaises(Exception):
+            self.tp.recv(0.05)
+
+
+class CanTpClassicCanTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_isotp_config(dict(isoTpConfig, tx_dl=8))
+        self.connector = FakeConnector()
+        self.tp = CanTp(connector=self.connector)
+
+    def test_singleFrame(self):
+        self.tp.send([0x01, 0x02, 0x03])
+        self.assertEqual(
+            [[0x03, 0x01, 0x02, 0x03, 0x00, 0x00, 0x00, 0x00]], self.connector.frames
+        )
+
+    def test_multiFrameSend(self):
+        def respond(frame):
+            if frame[0] & 0xF0 == 0x10:
+                self.tp.callback_onReceive(canMessage([0x30, 0x00, 0x00]))
+
+        self.connector.onTransmit = respond
+        self.tp.send([0x01, 0x02, 0x03, 0x04, 0x05, 0x06, 0x07, 0x08])
+        self.assertEqual(
+            [
+                [0x10, 0x08, 0x01, 0x02, 0x03, 0x04, 0x05, 0x06],
+                [0x21, 0x07, 0x08, 0x00, 0x00, 0x00, 0x00, 0x00],
+            ],
+            self.connector.frames,
+        )
+
+    def test_recvMultiFrame(self):
+        def respond(frame):
+            if frame[0] == 0x30:
+                self.tp.callback_onReceive(canMessage([0x21, 7, 8, 9, 0, 0, 0, 0]))
+
+        self.connector.onTransmit = respond
+        self.tp.callback_onReceive(canMessage([0x10, 10, 1, 2, 3, 4, 5, 6]))
+        self.assertEqual(bytes([1, 2, 3, 4, 5, 6, 7, 8, 9, 0]), self.tp.recv(1))
+
+
+class CanTpTimerTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_isotp_config(
+            dict(isoTpConfig, tx_dl=8, n_as=0.05, n_ar=0.05, n_bs=0.05, n_cr=0.05)
+        )
+        self.connector = FakeConnector()
+        self.tp = CanTp(connector=self.connector)
+
+    def test_flowControlTimeout(self):
+        start = perf_counter()
+        with self.assertRaises(CanTpTimeoutError) as context:
+            self.tp.send(bytes(20))
+
+        self.assertEqual(N_Result.N_TIMEOUT_Bs, context.exception.nResult)
+        self.assertLess(perf_counter() - start, 0.5)
+
+    def test_consecutiveFrameTimeout(self):
+        self.tp.callback_onReceive(canMessage([0x10, 20, 1, 2, 3, 4, 5, 6]))
+
+        start = perf_counter()
+        with self.assertRaises(CanTpTimeoutError) as context:
+            self.tp.recv(5)
+
+        self.assertEqual(N_Result.N_TIMEOUT_Cr, context.exception.nResult)
+        self.assertLess(perf_counter() - start, 0.5)
+
+    def test_slowTransmitTimeout(self):
+        self.connector.onTransmit = lambda frame: threading.Event().wait(0.1)
+
+        with self.assertRaises(CanTpTimeoutError) as context:
+            self.tp.send([0x3E, 0x00])
+
+        self.assertEqual(N_Result.N_TIMEOUT_A, context.exception.nResult)
+
+    def test_wrongSequenceNumber(self):
+        def respond(frame):
+            if frame[0] == 0x30:
+                self.tp.callback_onReceive(canMessage([0x22, 7, 8, 9, 0, 0, 0, 0]))
+
+        self.connector.onTransmit = respond
+        self.tp.callback_onReceive(canMessage([0x10, 10, 1, 2, 3, 4, 5, 6]))
+
+        with self.assertRaises(CanTpError) as context:
+            self.tp.recv(1)
+
+        self.assertEqual(N_Result.N_WRONG_SN, context.exception.nResult)
+
+    def test_overflow(self):
+        self.connector.onTransmit = lambda frame: self.tp.callback_onReceive(
+            canMessage([0x32, 0x00, 0x00])
+        )
+
+        with self.assertRaises(CanTpError) as context:
+            self.tp.send(bytes(20))
+
+        self.assertEqual(N_Result.N_BUFFER_OVFLW, context.exception.nResult)
+
+
+class CanTpFlowControlWaitTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_isotp_config(dict(isoTpConfig, tx_dl=8, n_bs=0.2, n_wft_max=3))
+        self.connector = FakeConnector()
+        self.tp = CanTp(connector=self.connector)
+
+    def respondWithWaits(self, waits):
+        # each WAIT comes after most of N_Bs, the transfer only survives if N_Bs starts again
+        def respond(frame):
+            if frame[0] & 0xF0 == 0x10:
+                for i in range(waits):
+                    threading.Timer(
+                        0.15 * (i + 1), self.tp.callback_onReceive, [canMessage([0x31, 0, 0])]
+                    ).start()
+                threading.Timer(
+                    0.15 * (waits + 1), self.tp.callback_onReceive, [canMessage([0x30, 0, 0])]
+                ).start()
+
+        self.connector.onTransmit = respond
+
+    def test_waitRestartsFlowControlTimeout(self):
+        self.respondWithWaits(3)
+
+        self.tp.send(bytes(20))
+
+        self.assertEqual(3, len(self.connector.frames))
+        self.assertEqual(3, self.tp.flowControlWaitCount)
+
+    def test_tooManyWaits(self):
+        self.respondWithWaits(4)
+
+        with self.assertRaises(CanTpError) as context:
+            self.tp.send(bytes(20))
+
+        self.assertEqual(N_Result.N_WFT_OVFLW, context.exception.nResult)
+        self.assertEqual(1, len(self.connector.frames))
+
+
+class CanTpReceiverFlowControlTestCase(unittest.TestCase):
+    def setUp(self):
+        self.connector = FakeConnector()
+
+    def test_configuredBlockSizeAndStMin(self):
+        Config.load_isotp_config(dict(isoTpConfig, rx_block_size=2, rx_stmin=0xF5))
+        tp = CanTp(connector=self.connector)
+
+        def respond(frame):
+            if frame[0] == 0x30:
+                count = len(self.connector.frames)
+                for sn in range(2 * count - 1, 2 * count + 1):
+                    tp.callback_onReceive(canMessage([0x20 | sn] + [sn] * 63))
+
+        self.connector.onTransmit = respond
+        tp.callback_onReceive(canMessage([0x11, 0x3A] + [0] * 62))
+        payload = tp.recv(1)
+
+        self.assertEqual(0x13A, len(payload))
+        self.assertEqual(2, len(self.connector.frames))
+        self.assertEqual([0x30, 0x02, 0xF5], self.connector.frames[0][:3])
+        self.assertEqual([0x30, 0x02, 0xF5], self.connector.frames[1][:3])
+
+    def test_constructorArgumentsOverrideProfiles(self):
+        Config.load_isotp_config(
+            dict(isoTpConfig, rx_fc_profiles={0x650: {"block_size": 4, "stmin": 0x05}})
+        )
+        self.assertEqual(4, CanTp(connector=self.connector).flowControlProfile.blockSize)
+        tp = CanTp(connector=self.connector, rxBlockSize=8, rxStMin=0xF1)
+        self.assertEqual(8, tp.flowControlProfile.blockSize)
+        self.assertEqual(0xF1, tp.flowControlProfile.stMin)
+
+    def test_invalidStMin(self):
+        Config.load_isotp_config(dict(isoTpConfig, rx_stmin=0x80))
+        with self.assertRaises(Exception):
+            CanTp(connector=self.connector)
+
+    def test_adaptiveProfileBacksOffAndRecovers(self):
+        profile = FlowControlProfile(stMin=0x00, adaptive=True, recoveryCount=2)
+        profile.reportFailure()
+        profile.reportFailure()
+        self.assertEqual(0xF2, profile.stMin)
+        profile.reportSuccess()
+        profile.reportSuccess()
+        self.assertEqual(0xF1, profile.stMin)
+        for i in range(10):
+            profile.reportSuccess()
+        self.assertEqual(0x00, profile.stMin)
+
+    def test_fixedProfileDoesNotAdapt(self):
+        profile = FlowControlProfile(stMin=0x0A)
+        profile.reportFailure()
+        self.assertEqual(0x0A, profile.stMin)
+
+
+class CanTpFullDuplexTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_isotp_config(dict(isoTpConfig, full_duplex=True))
+        self.connector = FakeConnector()
+        self.tp = CanTp(connector=self.connector)
+
+    def tearDown(self):
+        self.tp.close()
+
+    def test_responseReceivedBeforeRecvIsKept(self):
+        self.connector.onTransmit = lambda frame: self.tp.callback_onReceive(
+            canMessage([0x02, 0x50, 0x01])
+        )
+        self.tp.send([0x10, 0x01])
+        self.tp.send([0x10, 0x01])
+        self.assertEqual(bytes([0x50, 0x01]), self.tp.recv(1))
+        self.assertEqual(bytes([0x50, 0x01]), self.tp.recv(1))
+
+    def test_flowControlAnsweredWithoutRecv(self):
+        flowControlSent = threading.Event()
+        self.connector.onTransmit = lambda frame: flowControlSent.set()
+        self.tp.callback_onReceive(canMessage([0x10, 0x45] + list(range(0, 62))))
+        self.assertTrue(flowControlSent.wait(1))
+        self.assertEqual(0x30, self.connector.frames[0][0])
+
+        self.tp.callback_onReceive(canMessage([0x21] + list(range(62, 69))))
+        self.assertEqual(bytes(range(0, 69)), self.tp.recv(1))
+
+    def test_multiFrameSend(self):
+        def respond(frame):
+            if frame[0] & 0xF0 == 0x10:
+                self.tp.callback_onReceive(canMessage([0x30, 0x00, 0x00]))
+
+        self.connector.onTransmit = respond
+        self.tp.send(bytes(100))
+        self.assertEqual(2, len(self.connector.frames))
+
+    def test_recvTimeout(self):
+        with self.assertRaises(Exception):
+            self.tp.recv(0.05)
+
+
+class CanTpFunctionalTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_isotp_config(dict(isoTpConfig))
+        self.connector = FakeConnector()
+        self.tp = CanTp(
+            connector=self.connector, funcResponders={0x7E8: 0x7E0, 0x7E9: 0x7E1}
+        )
+
+    def test_functionalRequestSentOnFunctionalId(self):
+        self.tp.send([0x3E, 0x80], functionalReq=True)
+
+        self.assertEqual([0x7DF], self.connector.ids)
+        self.assertEqual([0x02, 0x3E, 0x80], self.connector.frames[0][:3])
+
+    def test_functionalRequestMustBeSingleFrame(self):
+        with self.assertRaises(Exception):
+            self.tp.send(list(range(100)), functionalReq=True)
+
+    def test_responsesCollectedPerResponder(self):
+        def respond(frame):
+            if frame[0] == 0x02:
+                self.tp.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x7E8))
+                self.tp.callback_onReceive(
+                    canMessage([0x10, 0x50] + list(range(62)), 0x7E9)
+                )
+                self.tp.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x123))
+            elif frame[0] == 0x30:
+                self.tp.callback_onReceive(
+                    canMessage([0x21] + list(range(62, 80)), 0x7E9)
+                )
+
+        self.connector.onTransmit = respond
+        self.tp.send([0x3E, 0x00], functionalReq=True)
+        responses = self.tp.recvFunctional(0.05)
+
+        self.assertEqual(
+            {0x7E8: bytes([0x7E, 0x00]), 0x7E9: bytes(range(80))}, responses
+        )
+        # the flow control goes to the physical request id of the responding ECU
+        self.assertEqual([0x7DF, 0x7E1], self.connector.ids)
+
+    def test_physicalRequestStopsCollection(self):
+        self.tp.send([0x3E, 0x00], functionalReq=True)
+        self.tp.send([0x3E, 0x00])
+        self.tp.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x7E8))
+
+        with self.assertRaises(Exception):
+            self.tp.recvFunctional(0.01)
+
+    def test_defaultResponderIsTheChannel(self):
+        tp = CanTp(connector=self.connector)
+        tp.send([0x3E, 0x00], functionalReq=True)
+        tp.callback_onReceive(canMessage([0x02, 0x7E, 0x00]))
+
+        self.assertEqual({0x650: bytes([0x7E, 0x00])}, tp.recvFunctional(0.01))
+
+
 if __name__ == "__main__":
     unittest.main()
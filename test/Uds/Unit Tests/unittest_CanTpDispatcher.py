@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import threading
+import unittest
+from types import SimpleNamespace
+
+from uds import CanTp, CanTpDispatcher
+from uds.config import Config
+
+isoTpConfig = {
+    "req_id": 0x600,
+    "res_id": 0x650,
+    "addressing_type": "NORMAL",
+    "n_sa": 0xFF,
+    "n_ta": 0xFF,
+    "n_ae": 0xFF,
+    "m_type": "DIAGNOSTICS",
+    "discard_neg_resp": False,
+}
+
+
+##
+# @brief stands in for the bus connector, recording the transmitted frames with their ids
+class FakeConnector(object):
+    def __init__(self):
+        self.frames = []
+
+    def transmit(self, data, reqId):
+        self.frames.append((reqId, list(data)))
+
+
+##
+# @brief records the frames routed to it
+class FakeChannel(object):
+    def __init__(self, resId):
+        self.resIdAddress = resId
+        self.frames = []
+
+    def callback_onReceive(self, msg):
+        self.frames.append(msg)
+
+
+def canMessage(data, arbitrationId):
+    return SimpleNamespace(arbitration_id=arbitrationId, data=bytearray(data))
+
+
+class CanTpDispatcherTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = CanTpDispatcher()
+
+    def test_routesFramesByArbitrationId(self):
+        first = FakeChannel(0x650)
+        second = FakeChannel(0x651)
+        self.dispatcher.register(first)
+        self.dispatcher.register(second)
+
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x50, 0x01], 0x651))
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x50, 0x01], 0x700))
+
+        self.assertEqual(0, len(first.frames))
+        self.assertEqual(1, len(second.frames))
+
+    def test_duplicateResponseIdRaises(self):
+        self.dispatcher.register(FakeChannel(0x650))
+
+        with self.assertRaises(Exception):
+            self.dispatcher.register(FakeChannel(0x650))
+
+    def test_unregisterStopsRouting(self):
+        channel = FakeChannel(0x650)
+        self.dispatcher.register(channel)
+        self.dispatcher.register(channel, 0x6FF)
+
+        self.dispatcher.unregister(channel)
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x50, 0x01], 0x650))
+
+        self.assertEqual(0, len(self.dispatcher))
+        self.assertEqual(0, len(channel.frames))
+
+    def test_functionalListenersShareResponseIds(self):
+        physical = FakeChannel(0x650)
+        functional = FakeChannel(0x7DF)
+        self.dispatcher.register(physical)
+        self.dispatcher.registerFunctional(functional, [0x650, 0x651])
+
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x650))
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x651))
+        self.dispatcher.unregister(functional)
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x651))
+
+        self.assertEqual(1, len(physical.frames))
+        self.assertEqual(2, len(functional.frames))
+
+    def test_usableAsCanListener(self):
+        channel = FakeChannel(0x650)
+        self.dispatcher.register(channel)
+
+        self.dispatcher(canMessage([0x02, 0x50, 0x01], 0x650))
+        self.dispatcher.on_message_received(canMessage([0x02, 0x50, 0x01], 0x650))
+
+        self.assertEqual(2, len(channel.frames))
+
+
+class CanTpDispatcherChannelTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_isotp_config(dict(isoTpConfig))
+        self.connector = FakeConnector()
+        self.dispatcher = CanTpDispatcher()
+        self.channels = [
+            CanTp(
+                connector=self.connector,
+                dispatcher=self.dispatcher,
+                reqId=0x600 + i,
+                resId=0x650 + i,
+            )
+            for i in range(30)
+        ]
+
+    def tearDown(self):
+        for tp in self.channels:
+            tp.close()
+
+    def test_channelsRegisterTheirResponseId(self):
+        self.assertEqual(30, len(self.dispatcher))
+        self.assertIs(self.channels[7], self.dispatcher.getChannel(0x657))
+
+    def test_channelsTransmitOnTheirRequestId(self):
+        self.channels[3].send([0x10, 0x01])
+
+        self.assertEqual([(0x603, [0x02, 0x10, 0x01, 0, 0, 0, 0, 0])], self.connector.frames)
+
+    def test_parallelReceptionFromOneListener(self):
+        results = {}
+
+        def receive(tp):
+            results[tp.resIdAddress] = tp.recv(1)
+
+        threads = [threading.Thread(target=receive, args=(tp,)) for tp in self.channels]
+        for thread in threads:
+            thread.start()
+        for i in reversed(range(30)):
+            self.dispatcher.callback_onReceive(canMessage([0x02, 0x50, i], 0x650 + i))
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual({0x650 + i: bytes([0x50, i]) for i in range(30)}, results)
+
+    def test_functionalResponsesAlongsidePhysicalChannels(self):
+        functional = CanTp(
+            connector=self.connector,
+            dispatcher=self.dispatcher,
+            reqId=0x6FF,
+            resId=0x7FF,
+            funcReqId=0x7DF,
+            funcResponders={0x650: 0x600, 0x651: 0x601},
+        )
+        self.channels.append(functional)
+
+        functional.send([0x3E, 0x00], functionalReq=True)
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x650))
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x7E, 0x00], 0x651))
+
+        self.assertEqual(
+            {0x650: bytes([0x7E, 0x00]), 0x651: bytes([0x7E, 0x00])},
+            functional.recvFunctional(0.01),
+        )
+        self.assertEqual(bytes([0x7E, 0x00]), self.channels[0].recv(0.01))
+
+    def test_endFunctionalRestoresPhysicalReception(self):
+        functional = self.channels[0]
+        functional.functionalResponders = {0x650: 0x600, 0x651: 0x601}
+        functional.send([0x3E, 0x00], functionalReq=True)
+
+        functional.endFunctional()
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x50, 0x01], 0x650))
+        self.dispatcher.callback_onReceive(canMessage([0x02, 0x50, 0x01], 0x651))
+
+        self.assertEqual(bytes([0x50, 0x01]), functional.recv(0.01))
+        self.assertEqual(bytes([0x50, 0x01]), self.channels[1].recv(0.01))
+        with self.assertRaises(Exception):
+            functional.recvFunctional(0.01)
+
+    def test_closeUnregisters(self):
+        self.channels[0].close()
+
+        self.assertEqual(29, len(self.dispatcher))
+        self.assertNotIn(0x650, self.dispatcher)
+
+    def test_changingResponseIdReroutes(self):
+        self.channels[0].resIdAddress = 0x6F0
+
+        self.assertNotIn(0x650, self.dispatcher)
+        self.assertIs(self.channels[0], self.dispatcher.getChannel(0x6F0))
+
+    def test_changingToATakenResponseIdRaises(self):
+        with self.assertRaises(Exception):
+            self.channels[0].resIdAddress = 0x651
+
+        self.assertEqual(0x650, self.channels[0].resIdAddress)
+        self.assertIs(self.channels[0], self.dispatcher.getChannel(0x650))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import queue
+import unittest
+from time import monotonic, sleep
+
+from uds import DeadlineService
+
+
+class DeadlineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.service = DeadlineService()
+
+    def test_expiry(self):
+        deadline = self.service.schedule(0.05)
+
+        self.assertTrue(deadline.isRunning())
+        self.assertFalse(deadline.isExpired())
+        self.assertGreater(deadline.remainingTime(), 0.04)
+        sleep(0.06)
+        self.assertTrue(deadline.isExpired())
+        self.assertEqual(0, deadline.remainingTime())
+
+    def test_restartAndStop(self):
+        deadline = self.service.schedule(0.01)
+        sleep(0.02)
+
+        deadline.restart(0.05)
+        self.assertFalse(deadline.isExpired())
+        deadline.stop()
+        sleep(0.06)
+        self.assertFalse(deadline.isExpired())
+        self.assertIsNone(deadline.remainingTime())
+
+    def test_stoppedWhenCreatedWithoutTimeout(self):
+        deadline = self.service.schedule()
+
+        self.assertFalse(deadline.isRunning())
+        self.assertFalse(deadline.isExpired())
+
+
+class DeadlineServiceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.service = DeadlineService()
+        self.fired = queue.SimpleQueue()
+
+    def schedule(self, name, timeout=None):
+        return self.service.schedule(
+            timeout, lambda deadline: self.fired.put((name, monotonic()))
+        )
+
+    def test_callbacksInDeadlineOrder(self):
+        startTime = monotonic()
+        self.schedule("late", 0.06)
+        self.schedule("early", 0.02)
+
+        first, firstTime = self.fired.get(timeout=1)
+        second, secondTime = self.fired.get(timeout=1)
+
+        self.assertEqual(["early", "late"], [first, second])
+        self.assertGreaterEqual(firstTime - startTime, 0.02)
+        self.assertGreaterEqual(secondTime - startTime, 0.06)
+
+    def test_restartPostponesCallback(self):
+        deadline = self.schedule("postponed", 0.03)
+        for _ in range(5):
+            sleep(0.02)
+            startTime = monotonic()
+            deadline.restart(0.03)
+
+        name, firedTime = self.fired.get(timeout=1)
+
+        self.assertEqual("postponed", name)
+        self.assertGreaterEqual(firedTime - startTime, 0.03)
+        self.assertTrue(self.fired.empty())
+
+    def test_restartEarlierFiresEarlier(self):
+        deadline = self.schedule("advanced", 10)
+        startTime = monotonic()
+
+        deadline.restart(0.02)
+
+        self.assertEqual("advanced", self.fired.get(timeout=1)[0])
+        self.assertLess(monotonic() - startTime, 1)
+
+    def test_stoppedDeadlineDoesNotFire(self):
+        self.schedule("stopped", 0.02).stop()
+        self.schedule("running", 0.04)
+
+        self.assertEqual("running", self.fired.get(timeout=1)[0])
+        self.assertTrue(self.fired.empty())
+
+    def test_failingCallbackDoesNotStopTheService(self):
+        self.service.schedule(0.01, lambda deadline: 1 / 0)
+        self.schedule("after", 0.03)
+
+        with self.assertLogs("uds.uds_communications.Utilities.DeadlineService"):
+            self.assertEqual("after", self.fired.get(timeout=1)[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
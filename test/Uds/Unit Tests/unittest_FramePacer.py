@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import unittest
+from time import perf_counter
+
+from uds import FramePacer
+
+
+class FramePacerTestCase(unittest.TestCase):
+    def testBurstModeDoesNotWait(self):
+        a = FramePacer(0)
+        start = perf_counter()
+        for i in range(1000):
+            a.wait()
+        self.assertLess(perf_counter() - start, 0.05)
+
+    def testFirstWaitAfterResetIsImmediate(self):
+        a = FramePacer()
+        a.reset(0.5)
+        start = perf_counter()
+        a.wait()
+        self.assertLess(perf_counter() - start, 0.05)
+
+    def testSubMillisecondSeparation(self):
+        a = FramePacer()
+        a.reset(0.0005)
+        a.wait()
+        stamps = []
+        for i in range(20):
+            a.wait()
+            stamps.append(perf_counter())
+        gaps = [b - a for a, b in zip(stamps, stamps[1:])]
+        self.assertGreaterEqual(min(gaps), 0.0005)
+        self.assertLess(sum(gaps) / len(gaps), 0.005)
+
+    def testMillisecondSeparation(self):
+        a = FramePacer()
+        a.reset(0.02)
+        a.wait()
+        start = perf_counter()
+        a.wait()
+        self.assertGreaterEqual(perf_counter() - start, 0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import threading
+import unittest
+from time import perf_counter
+
+from uds import MessageBuffer
+
+
+class MessageBufferTestCase(unittest.TestCase):
+    def testFifoOrder(self):
+        a = MessageBuffer(4)
+        a.put([1])
+        a.put([2])
+        self.assertEqual([1], a.get())
+        self.assertEqual([2], a.get())
+        self.assertEqual(None, a.get())
+
+    def testOverflowDiscardsOldest(self):
+        a = MessageBuffer(2)
+        for i in range(5):
+            a.put(i)
+        self.assertEqual(2, len(a))
+        self.assertEqual(3, a.overflowCount)
+        self.assertEqual(3, a.get())
+        self.assertEqual(4, a.get())
+
+    def testClearCountsDroppedMessages(self):
+        a = MessageBuffer()
+        a.put(1)
+        a.put(2)
+        a.clear()
+        self.assertEqual(0, len(a))
+        self.assertEqual(2, a.dropCount)
+        a.resetCounters()
+        self.assertEqual(0, a.dropCount)
+
+    def testWaitReturnsOnPut(self):
+        a = MessageBuffer()
+        threading.Timer(0.05, a.put, [1]).start()
+        start = perf_counter()
+        self.assertEqual(True, a.wait(1))
+        self.assertLess(perf_counter() - start, 0.5)
+
+    def testWaitTimeout(self):
+        a = MessageBuffer()
+        self.assertEqual(False, a.wait(0.05))
+
+    def testInvalidCapacity(self):
+        with self.assertRaises(ValueError):
+            MessageBuffer(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import asyncio
+import threading
+import time
+import unittest
+
+from uds.uds_communications.Uds.RequestScheduler import (
+    AsyncRequestScheduler,
+    RequestPriority,
+    RequestScheduler,
+    SchedulerLock,
+    isResponseTo,
+    requestPriority,
+)
+
+
+class RequestSchedulerTestCase(unittest.TestCase):
+    def testQueuedRequestsRunByPriority(self):
+        a = RequestScheduler()
+        order = []
+
+        def request(priority):
+            with a.request(priority):
+                order.append(priority)
+
+        ticket = a.acquire()
+        threads = []
+        for priority in (RequestPriority.BULK, RequestPriority.REQUEST, RequestPriority.KEEP_ALIVE):
+            threads.append(threading.Thread(target=request, args=(priority,)))
+            threads[-1].start()
+            while a.queued != len(threads):
+                time.sleep(0.001)
+        self.assertTrue(a.isBusy())
+        a.release(ticket)
+        for thread in threads:
+            thread.join(1)
+
+        self.assertEqual(
+            [RequestPriority.KEEP_ALIVE, RequestPriority.REQUEST, RequestPriority.BULK], order
+        )
+        self.assertFalse(a.isBusy())
+
+    def testReleaseByAnotherRequest(self):
+        a = RequestScheduler()
+        a.acquire()
+        with self.assertRaises(Exception):
+            a.release(object())
+
+    def testHoldingThreadGetsTheChannelAgain(self):
+        a = RequestScheduler()
+
+        with a.request():
+            with a.request(RequestPriority.KEEP_ALIVE):
+                self.assertTrue(a.isBusy())
+            self.assertTrue(a.isBusy())
+
+        self.assertFalse(a.isBusy())
+
+    def testAcquireTimeout(self):
+        a = RequestScheduler()
+        ticket = a.acquire()
+        results = []
+        thread = threading.Thread(target=lambda: results.append(a.acquire(timeout=0.01)))
+        thread.start()
+        thread.join(1)
+
+        self.assertEqual([None], results)
+        self.assertEqual(0, a.queued)
+        a.release(ticket)
+        self.assertFalse(a.isBusy())
+
+    def testSchedulerLockHoldsTheChannel(self):
+        a = RequestScheduler()
+        lock = SchedulerLock(a)
+
+        with lock:
+            self.assertTrue(a.isBusy())
+            acquired = []
+            thread = threading.Thread(target=lambda: acquired.append(lock.acquire(False)))
+            thread.start()
+            thread.join(1)
+            self.assertEqual([False], acquired)
+
+        self.assertFalse(lock.locked())
+        with self.assertRaises(RuntimeError):
+            lock.release()
+
+    def testDefaultPriorities(self):
+        self.assertEqual(RequestPriority.KEEP_ALIVE, requestPriority(0x3E))
+        self.assertEqual(RequestPriority.BULK, requestPriority(0x36))
+        self.assertEqual(RequestPriority.REQUEST, requestPriority(0x22))
+
+    def testResponseCorrelation(self):
+        self.assertTrue(isResponseTo(0x22, bytes([0x62, 0xF1, 0x8C])))
+        self.assertTrue(isResponseTo(0x22, bytes([0x7F, 0x22, 0x31])))
+        self.assertFalse(isResponseTo(0x22, bytes([0x7E, 0x00])))
+        self.assertFalse(isResponseTo(0x22, bytes([0x7F, 0x3E, 0x12])))
+
+
+class AsyncRequestSchedulerTestCase(unittest.IsolatedAsyncioTestCase):
+    async def test_queuedRequestsRunByPriority(self):
+        a = AsyncRequestScheduler()
+        order = []
+        hold = asyncio.Event()
+
+        async def request(priority):
+            async with a.request(priority):
+                order.append(priority)
+                await hold.wait()
+
+        first = asyncio.ensure_future(request(RequestPriority.REQUEST))
+        await asyncio.sleep(0)
+        others = [
+            asyncio.ensure_future(request(priority))
+            for priority in (RequestPriority.BULK, RequestPriority.KEEP_ALIVE)
+        ]
+        await asyncio.sleep(0)
+        self.assertEqual(2, a.queued)
+        hold.set()
+        await asyncio.gather(first, *others)
+
+        self.assertEqual(
+            [RequestPriority.REQUEST, RequestPriority.KEEP_ALIVE, RequestPriority.BULK], order
+        )
+        self.assertFalse(a.isBusy())
+
+    async def test_cancelledRequestLeavesTheQueue(self):
+        a = AsyncRequestScheduler()
+        hold = asyncio.Event()
+
+        async def request():
+            async with a.request():
+                await hold.wait()
+
+        first = asyncio.ensure_future(request())
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(request())
+        await asyncio.sleep(0)
+        second.cancel()
+        hold.set()
+        await first
+        with self.assertRaises(asyncio.CancelledError):
+            await second
+
+        self.assertFalse(a.isBusy())
+
+
+if __name__ == "__main__":
+    unittest.main()
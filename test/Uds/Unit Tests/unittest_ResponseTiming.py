@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import unittest
+
+from uds import ResponseTiming
+
+
+class ResponseTimingTestCase(unittest.TestCase):
+    def testDefaultTimeouts(self):
+        a = ResponseTiming(0.05, 5)
+        self.assertEqual(0.05, a.p2(0x22))
+        self.assertEqual(5, a.p2Star(0x22))
+
+    def testOverridesKeepTheOtherTimeout(self):
+        a = ResponseTiming(0.05, 5, overrides={0x31: {"p2_star": 30}})
+        a.override(0x34, p2=0.2)
+        self.assertEqual((0.05, 30), (a.p2(0x31), a.p2Star(0x31)))
+        self.assertEqual((0.2, 5), (a.p2(0x34), a.p2Star(0x34)))
+
+        a.override(0x31)
+        self.assertEqual(5, a.p2Star(0x31))
+
+    def testHistoryIsBounded(self):
+        a = ResponseTiming(0.05, 5, historySize=3)
+        for i in range(5):
+            a.record(0x22, i * 0.01)
+        self.assertEqual([0.02, 0.03, 0.04], [t for t, _, _ in a.history(0x22)])
+        self.assertEqual([], a.history(0x10))
+
+    def testStatistics(self):
+        a = ResponseTiming(0.05, 5)
+        a.record(0x31, 0.01)
+        a.record(0x31, 2.01, pendingCount=2)
+        a.record(0x31, 5.05, pendingCount=1, timedOut=True)
+
+        statistics = a.statistics(0x31)
+
+        self.assertEqual(3, statistics["count"])
+        self.assertEqual(1, statistics["timeouts"])
+        self.assertEqual(3, statistics["pending"])
+        self.assertEqual((0.01, 2.01), (statistics["min"], statistics["max"]))
+        self.assertAlmostEqual(1.01, statistics["mean"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,10 +10,43 @@ __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
 
+import threading
+import time
 import unittest
+from pathlib import Path
+from types import SimpleNamespace
 from unittest import mock
 
-from uds import Uds
+from uds import Uds, UdsTool
+from uds.config import Config
+
+isoTpConfig = {
+    "req_id": 0x600,
+    "res_id": 0x650,
+    "addressing_type": "NORMAL",
+    "n_sa": 0xFF,
+    "n_ta": 0xFF,
+    "n_ae": 0xFF,
+    "m_type": "DIAGNOSTICS",
+    "discard_neg_resp": False,
+}
+
+udsConfig = {"transport_protocol": "CAN", "p2_can_client": 1, "p2_can_server": 1}
+
+odxDir = Path(__file__).parents[2] / "Uds-Config-Tool" / "Functional Tests"
+
+
+##
+# @brief stands in for the bus connector, answering every request with a fixed single frame
+class EchoConnector(object):
+    def __init__(self, response):
+        self.tp = None
+        self.response = response
+
+    def transmit(self, data, reqId):
+        self.tp.callback_onReceive(
+            SimpleNamespace(arbitration_id=0x650, data=bytearray(self.response))
+        )
 
 
 class UdsTestCase(unittest.TestCase):
@@ -56,5 +89,328 @@ class UdsTestCase(unittest.TestCase):
         self.assertEqual(None, None)
 
 
+class UdsPduTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_com_layer_config(dict(isoTpConfig), dict(udsConfig))
+        self.connector = EchoConnector([0x02, 0x50, 0x01])
+
+    def createUds(self, **kwargs):
+        udsConnection = Uds(connector=self.connector, **kwargs)
+        self.connector.tp = udsConnection.tp
+        return udsConnection
+
+    def test_sendReturnsBytearray(self):
+        udsConnection = self.createUds()
+
+        response = udsConnection.send(bytes([0x10, 0x01]))
+
+        self.assertIsInstance(response, bytearray)
+        self.assertEqual(bytes([0x50, 0x01]), response)
+
+    def test_sendAcceptsListRequest(self):
+        udsConnection = self.createUds()
+
+        self.assertEqual(bytes([0x50, 0x01]), udsConnection.send([0x10, 0x01]))
+
+    def test_listPduArgumentReturnsList(self):
+        udsConnection = self.createUds(listPdu=True)
+
+        self.assertEqual([0x50, 0x01], udsConnection.send([0x10, 0x01]))
+
+    def test_listPduConfigReturnsList(self):
+        Config.load_uds_config(dict(udsConfig, list_pdu=True))
+        udsConnection = self.createUds()
+
+        self.assertEqual([0x50, 0x01], udsConnection.send(bytes([0x10, 0x01])))
+
+
+##
+# @brief stands in for the bus connector, every ECU answering a functional request with its own sequence of frames
+class FunctionalConnector(object):
+    def __init__(self, answers):
+        self.tp = None
+        self.answers = answers
+
+    def transmit(self, data, reqId):
+        for resId, frames in self.answers.items():
+            for frame in frames:
+                self.tp.callback_onReceive(
+                    SimpleNamespace(arbitration_id=resId, data=bytearray(frame))
+                )
+
+
+class UdsResponseTimingTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_com_layer_config(
+            dict(isoTpConfig),
+            dict(
+                udsConfig,
+                p2_can_client=0.05,
+                p2_can_server=5,
+                p2_overrides={0x31: {"p2_star": 30}},
+            ),
+        )
+        connector = EchoConnector([0x02, 0x50, 0x01])
+        self.udsConnection = Uds(connector=connector)
+        connector.tp = self.udsConnection.tp
+        self.udsConnection.tp.recv = mock.Mock()
+
+    def test_p2StarAfterResponsePending(self):
+        self.udsConnection.tp.recv.side_effect = [
+            bytearray([0x7F, 0x10, 0x78]),
+            bytearray([0x7F, 0x10, 0x78]),
+            bytearray([0x50, 0x01]),
+        ]
+
+        self.assertEqual(bytes([0x50, 0x01]), self.udsConnection.send([0x10, 0x01]))
+
+        self.assertEqual(
+            [mock.call(0.05), mock.call(5), mock.call(5)],
+            self.udsConnection.tp.recv.call_args_list,
+        )
+        self.assertEqual(2, self.udsConnection.responseTiming.history(0x10)[0][1])
+
+    def test_serviceOverride(self):
+        self.udsConnection.tp.recv.side_effect = [
+            bytearray([0x7F, 0x31, 0x78]),
+            bytearray([0x71, 0x01, 0xFF, 0x00]),
+        ]
+
+        self.udsConnection.send([0x31, 0x01, 0xFF, 0x00])
+
+        self.assertEqual(
+            [mock.call(0.05), mock.call(30)], self.udsConnection.tp.recv.call_args_list
+        )
+
+    def test_correlatedResponses(self):
+        connector = EchoConnector([0x02, 0x50, 0x01])
+        udsConnection = Uds(connector=connector, correlateResponses=True)
+        udsConnection.tp.recv = mock.Mock(
+            side_effect=[bytearray([0x7E, 0x00]), bytearray([0x62, 0xF1, 0x8C, 0x01])]
+        )
+        connector.tp = udsConnection.tp
+
+        self.assertEqual(
+            bytes([0x62, 0xF1, 0x8C, 0x01]), udsConnection.send([0x22, 0xF1, 0x8C])
+        )
+        self.assertEqual(2, udsConnection.tp.recv.call_count)
+
+    def test_keepAliveQueuesAheadOfRequests(self):
+        order = []
+        sendFrame = self.udsConnection.tp.send
+
+        def send(msg, *args):
+            order.append(msg[0])
+            sendFrame(msg, *args)
+
+        self.udsConnection.tp.send = send
+        self.udsConnection.tp.recv.side_effect = lambda timeout: bytearray([0x50, 0x01])
+        scheduler = self.udsConnection.requestScheduler
+        ticket = scheduler.acquire()
+        threads = [
+            threading.Thread(target=self.udsConnection.send, args=(msg,))
+            for msg in ([0x22, 0xF1, 0x8C], [0x3E, 0x80])
+        ]
+        for thread in threads:
+            thread.start()
+            while scheduler.queued != threads.index(thread) + 1:
+                time.sleep(0.001)
+        self.assertTrue(self.udsConnection.isTransmitting())
+        scheduler.release(ticket)
+        for thread in threads:
+            thread.join(1)
+
+        self.assertEqual([0x3E, 0x22], order)
+
+    def test_sendLockHoldsTheChannel(self):
+        self.udsConnection.tp.recv.side_effect = lambda timeout: bytearray([0x62, 0xF1, 0x8C])
+
+        with self.assertWarns(DeprecationWarning):
+            sendLock = self.udsConnection.sendLock
+        with sendLock:
+            self.assertTrue(self.udsConnection.isTransmitting())
+            response = self.udsConnection.send([0x22, 0xF1, 0x8C])
+
+        self.assertEqual(bytearray([0x62, 0xF1, 0x8C]), response)
+        self.assertFalse(self.udsConnection.isTransmitting())
+
+    def test_timeoutIsRecorded(self):
+        self.udsConnection.tp.recv.side_effect = Exception("Timeout in waiting for message")
+
+        with self.assertRaises(Exception):
+            self.udsConnection.send([0x22, 0xF1, 0x8C])
+
+        statistics = self.udsConnection.responseTiming.statistics(0x22)
+        self.assertEqual(1, statistics["timeouts"])
+        self.assertIsNone(statistics["mean"])
+
+
+class UdsFunctionalTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_com_layer_config(
+            dict(isoTpConfig, func_responders={0x7E8: 0x7E0, 0x7E9: 0x7E1}),
+            dict(udsConfig, p2_can_client=0.05),
+        )
+
+    def createUds(self, answers, **kwargs):
+        connector = FunctionalConnector(answers)
+        udsConnection = Uds(connector=connector, **kwargs)
+        connector.tp = udsConnection.tp
+        return udsConnection
+
+    def test_responsesKeyedByResponseId(self):
+        udsConnection = self.createUds(
+            {0x7E8: [[0x02, 0x7E, 0x00]], 0x7E9: [[0x02, 0x7E, 0x00]]}
+        )
+
+        responses = udsConnection.sendFunctional([0x3E, 0x00])
+
+        self.assertEqual(
+            {0x7E8: bytes([0x7E, 0x00]), 0x7E9: bytes([0x7E, 0x00])}, responses
+        )
+
+    def test_pendingResponseReplacedByFinalResponse(self):
+        udsConnection = self.createUds(
+            {
+                0x7E8: [[0x03, 0x7F, 0x31, 0x78], [0x02, 0x71, 0x01]],
+                0x7E9: [[0x03, 0x7F, 0x31, 0x22]],
+            }
+        )
+
+        responses = udsConnection.sendFunctional([0x31, 0x01])
+
+        self.assertEqual(bytes([0x71, 0x01]), responses[0x7E8])
+        self.assertEqual(bytes([0x7F, 0x31, 0x22]), responses[0x7E9])
+
+    def test_functionalRoutingEndsWithTheRequest(self):
+        Config.load_isotp_config(dict(isoTpConfig, func_responders={0x650: 0x600}))
+        udsConnection = self.createUds({0x650: [[0x02, 0x7E, 0x00]]})
+        udsConnection.sendFunctional([0x3E, 0x00])
+
+        udsConnection.tp.callback_onReceive(
+            SimpleNamespace(arbitration_id=0x650, data=bytearray([0x02, 0x50, 0x01]))
+        )
+
+        self.assertEqual(bytes([0x50, 0x01]), udsConnection.tp.recv(0.01))
+
+    def test_collectionEndsOnceEveryEcuHasAnswered(self):
+        Config.load_uds_config(dict(udsConfig, p2_can_client=2))
+        udsConnection = self.createUds(
+            {0x7E8: [[0x02, 0x7E, 0x00]], 0x7E9: [[0x02, 0x7E, 0x00]]}
+        )
+        startTime = time.monotonic()
+
+        responses = udsConnection.sendFunctional([0x3E, 0x00])
+
+        self.assertLess(time.monotonic() - startTime, 1)
+        self.assertEqual({0x7E8, 0x7E9}, set(responses))
+
+    def test_ecuStillPendingIsLeftOut(self):
+        Config.load_uds_config(dict(udsConfig, p2_can_client=0.05, p2_can_server=0.05))
+        udsConnection = self.createUds(
+            {0x7E8: [[0x03, 0x7F, 0x31, 0x78]], 0x7E9: [[0x02, 0x71, 0x01]]}
+        )
+
+        self.assertEqual(
+            {0x7E9: bytes([0x71, 0x01])}, udsConnection.sendFunctional([0x31, 0x01])
+        )
+
+    def test_noResponseRequired(self):
+        udsConnection = self.createUds({0x7E8: [[0x02, 0x7E, 0x00]]})
+
+        self.assertEqual({}, udsConnection.sendFunctional([0x3E, 0x80], False))
+
+    def test_listPdu(self):
+        udsConnection = self.createUds({0x7E8: [[0x02, 0x7E, 0x00]]}, listPdu=True)
+
+        self.assertEqual({0x7E8: [0x7E, 0x00]}, udsConnection.sendFunctional([0x3E, 0x00]))
+
+
+class UdsOdxTestCase(unittest.TestCase):
+    def setUp(self):
+        Config.load_com_layer_config(dict(isoTpConfig), dict(udsConfig))
+        self.addCleanup(UdsTool.sharedTools.clear)
+
+    def createUds(self, odx, **kwargs):
+        return Uds(odx=odx, connector=EchoConnector([0x02, 0x50, 0x01]), **kwargs)
+
+    def test_ecusWithDifferentOdxFilesCoexist(self):
+        bootloader = self.createUds(odxDir / "Bootloader.odx")
+        application = self.createUds(odxDir / "EBC-Diagnostics_old.odx")
+
+        self.assertIn(
+            "Air Mass Flow", application.readDataByIdentifierContainer.requestDIDFunctions
+        )
+        self.assertNotIn(
+            "Air Mass Flow", bootloader.readDataByIdentifierContainer.requestDIDFunctions
+        )
+        self.assertNotIn("Air Mass Flow", UdsTool.rdbiContainer.requestDIDFunctions)
+
+    def test_sharedOdxKeepsSessionStatePerEcu(self):
+        first = self.createUds(odxDir / "Bootloader.odx", shareOdx=True)
+        second = self.createUds(odxDir / "Bootloader.odx", shareOdx=True)
+
+        self.assertIsNot(
+            first.diagnosticSessionControlContainer,
+            second.diagnosticSessionControlContainer,
+        )
+        self.assertIs(
+            first.readDataByIdentifierContainer.requestDIDFunctions["ECU Serial Number"],
+            second.readDataByIdentifierContainer.requestDIDFunctions["ECU Serial Number"],
+        )
+        first.diagnosticSessionControlContainer.currentSession = "Programming Session"
+        self.assertIsNone(second.diagnosticSessionControlContainer.currentSession)
+
+    def test_transferDataCounterWrapsAfterFF(self):
+        udsConnection = self.createUds(odxDir / "Bootloader.odx")
+        requestFunction = udsConnection.transferDataContainer.requestFunctions[
+            "TransferData"
+        ]
+
+        self.assertEqual(bytes([0x36, 0xFF, 0xAA]), requestFunction(0xFF, [0xAA]))
+        self.assertEqual(bytes([0x36, 0x00, 0xAA]), requestFunction(0x100, [0xAA]))
+
+    def test_sharedLazyOdxCreatesServicesOnce(self):
+        Config.load_uds_config(dict(udsConfig, odx_lazy_load=True, odx_shared=True))
+        first = self.createUds(odxDir / "Bootloader.odx")
+        second = self.createUds(odxDir / "Bootloader.odx")
+
+        requestFunction = first.readDataByIdentifierContainer.requestDIDFunctions[
+            "ECU Serial Number"
+        ]
+
+        self.assertIs(
+            requestFunction,
+            second.readDataByIdentifierContainer.requestDIDFunctions["ECU Serial Number"],
+        )
+        self.assertEqual(bytes([0xF1, 0x8C]), requestFunction())
+        self.assertEqual(1, len(UdsTool.sharedTools))
+
+    def test_testerPresentSentAfterTimeout(self):
+        connector = EchoConnector([0x06, 0x50, 0x01, 0x00, 0x32, 0x01, 0xF4])
+        udsConnection = Uds(odx=odxDir / "Bootloader.odx", connector=connector)
+        connector.tp = udsConnection.tp
+        self.addCleanup(udsConnection.testerPresentDisable)
+        sent = []
+        sendFrame = udsConnection.tp.send
+
+        def send(msg, *args):
+            sent.append((time.monotonic(), msg[0]))
+            sendFrame(msg, *args)
+
+        udsConnection.tp.send = send
+
+        udsConnection.diagnosticSessionControl(
+            "Default Session", testerPresent=True, tpTimeout=0.1
+        )
+        time.sleep(0.15)
+        udsConnection.send([0x22, 0xF1, 0x8C])  # ... moves the next tester present on
+        time.sleep(0.15)
+
+        self.assertEqual([0x10, 0x3E, 0x22, 0x3E], [sid for _, sid in sent][:4])
+        self.assertGreaterEqual(sent[1][0] - sent[0][0], 0.1)
+        self.assertGreaterEqual(sent[3][0] - sent[2][0], 0.1)
+
+
 if __name__ == "__main__":
     unittest.main()
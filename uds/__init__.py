@@ -5,11 +5,21 @@ name = "uds"
 
 from uds.uds_communications.Utilities.iResettableTimer import iResettableTimer
 from uds.uds_communications.Utilities.ResettableTimer import ResettableTimer
+from uds.uds_communications.Utilities.DeadlineService import (
+    Deadline,
+    DeadlineService,
+    deadlineService,
+)
+from uds.uds_communications.Utilities.MessageBuffer import MessageBuffer
+from uds.uds_communications.Utilities.FramePacer import FramePacer
+from uds.uds_communications.Utilities.ResponseTiming import ResponseTiming
 from uds.uds_communications.Utilities.UtilityFunctions import fillArray
 
 # CAN Imports
 from uds.uds_communications.TransportProtocols.Can import CanTpTypes
 from uds.uds_communications.TransportProtocols.Can.CanTp import CanTp
+from uds.uds_communications.TransportProtocols.Can.CanTpDispatcher import CanTpDispatcher
+from uds.uds_communications.TransportProtocols.Can.AsyncCanTp import AsyncCanTp
 
 # Uds-Config tool imports
 from uds.uds_config_tool.UdsConfigTool import UdsTool
@@ -29,6 +39,7 @@ from uds.uds_config_tool.ISOStandard.ISOStandard import (
 
 # main uds import
 from uds.uds_communications.Uds.Uds import Uds
+from uds.uds_communications.Uds.AsyncUds import AsyncUds
 
 from uds.config import Config
 from uds.interfaces import TpInterface
@@ -8,8 +8,28 @@ log = logging.getLogger(__name__)
 class UdsConfig:
     """Encapsulate all uds communication layer parameters."""
     transport_protocol: str
+    #: time to wait for the first response to a request (P2), in seconds
     p2_can_client: int
+    #: time to wait for the response following a response pending (P2*), in seconds
     p2_can_server: int
+    #: return responses as lists of int instead of bytearrays, for code written against older releases
+    list_pdu: bool = False
+    #: directory of the compiled ODX cache, loading an ODX seen before skips parsing it (None disables the cache)
+    odx_cache_dir: str = None
+    #: only index the services of a parsed ODX, each one is compiled the first time it is used
+    odx_lazy_load: bool = False
+    #: Uds objects loading the same ODX file share its service functions (each keeps its own containers)
+    odx_shared: bool = False
+    #: longest readDataByIdentifier response readDataByIdentifiers packs DIDs into (ISO-TP limit by default)
+    rdbi_max_response_length: int = 4095
+    #: most DIDs the ECU accepts in one readDataByIdentifier request, 0 for no limit
+    rdbi_max_dids: int = 0
+    #: P2/P2* per service id, e.g. {0x31: {"p2": 0.1, "p2_star": 30}}
+    p2_overrides: dict = None
+    #: response times kept per service id (Uds.responseTiming)
+    response_time_history: int = 32
+    #: discard responses that do not answer the service of the request waited for
+    correlate_responses: bool = False
 
 
 @dataclass
@@ -23,6 +43,38 @@ class IsoTpConfig:
     n_ae: int 
     m_type: str
     discard_neg_resp: bool
+    #: block on received frames instead of polling the receive buffer
+    event_driven_rx: bool = True
+    #: maximum number of received frames held before the oldest is discarded
+    rx_buffer_size: int = 1024
+    #: final part of an STmin wait (in seconds) spent spinning instead of sleeping
+    stmin_spin_time: float = 0.002
+    #: transmit data link layer frame length, 8 for classic CAN, up to 64 for CAN FD
+    tx_dl: int = 64
+    #: reassemble incoming messages and answer flow control in a background thread
+    full_duplex: bool = False
+    #: block size requested in the flow control sent when receiving, 0 for no limit
+    rx_block_size: int = 0
+    #: separation time requested when receiving, raw STmin byte (0x00-0x7F ms, 0xF1-0xF9 100-900 us)
+    rx_stmin: int = 0x1E
+    #: back off the requested separation time when consecutive frames get lost
+    rx_stmin_adaptive: bool = False
+    #: per ECU overrides keyed by response id, e.g. {0x650: {"block_size": 8, "stmin": 0xF5, "adaptive": True}}
+    rx_fc_profiles: dict = None
+    #: arbitration id of functional (broadcast) requests
+    func_req_id: int = 0x7DF
+    #: ECUs answering functional requests, response id to physical request id, e.g. {0x7E8: 0x7E0}
+    func_responders: dict = None
+    #: longest transmit call of the connector for a frame of the sender (N_As), in seconds; only enforced for blocking connectors
+    n_as: float = 1.0
+    #: longest transmit call of the connector for a flow control frame of the receiver (N_Ar), in seconds; only enforced for blocking connectors
+    n_ar: float = 1.0
+    #: longest wait for a flow control frame after a first frame or a block (N_Bs), in seconds
+    n_bs: float = 1.0
+    #: longest wait for the next consecutive frame (N_Cr), in seconds
+    n_cr: float = 1.0
+    #: most flow control WAIT frames accepted in a row before a transfer is aborted (N_WFTmax)
+    n_wft_max: int = 10
 
 class Config:
     """Load the different communication layer configuration and store
@@ -0,0 +1,233 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import asyncio
+
+from uds.config import Config
+from uds import MessageBuffer, deadlineService
+from uds.uds_communications.TransportProtocols.Can.CanTp import CanTp
+from uds.uds_communications.TransportProtocols.Can.CanTpReceiver import CanTpReceiver
+from uds.uds_communications.TransportProtocols.Can.CanTpTypes import (
+    CANTP_MAX_PAYLOAD_LENGTH_ESCAPE,
+    FC_BS_INDEX,
+    FC_STMIN_INDEX,
+    CanTpError,
+    CanTpFsTypes,
+    CanTpMessageType,
+    CanTpState,
+    CanTpTimeoutError,
+    N_Result,
+)
+
+
+##
+# @class AsyncCanTp
+# @brief asyncio version of the CAN transport protocol
+#
+# send and recv are coroutines: waiting for flow control, for the separation time and for
+# received frames suspends the calling task instead of blocking a thread, so one event loop
+# can drive many conversations at once. Frames are built and transmitted by a CanTp, the
+# bus listener may call callback_onReceive from any thread.
+class AsyncCanTp(object):
+
+    ##
+    # @brief constructor for the AsyncCanTp object
+    # @param [in] connector the bus connector used to transmit frames
+    # @param [in] dispatcher CanTpDispatcher of the bus, the channel registers its response id on it
+    # @param kwargs the other CanTp arguments (reqId, resId, rxBlockSize, rxStMin, ...)
+    def __init__(self, connector=None, dispatcher=None, **kwargs):
+
+        kwargs["fullDuplex"] = False
+        self.__tp = CanTp(connector, **kwargs)
+        self.__frames = MessageBuffer(Config.isotp.rx_buffer_size)
+        self.__loop = None
+        self.__frameEvent = None
+
+        self.__dispatcher = dispatcher
+        if self.__dispatcher is not None:
+            self.__dispatcher.register(self)
+
+    ##
+    # @brief sends a payload, waiting for the flow control of multi frame messages
+    # @param [in] payload the payload to be sent
+    # @param [in] functionalReq send on the functional request id, single frames only
+    async def send(self, payload, functionalReq=False):
+        tp = self.__tp
+        self.__frames.clear()
+
+        payloadLength = len(payload)
+        if payloadLength > CANTP_MAX_PAYLOAD_LENGTH_ESCAPE:
+            raise Exception("Payload too large for CAN Transport Protocol")
+
+        if payloadLength <= tp.maxSingleFrameLength:
+            tp.transmit(tp.create_singleFrame(payload), functionalReq)
+            return
+        if functionalReq:
+            raise Exception("Functional requests must fit in a single frame")
+
+        txPdu, payloadPtr = tp.create_firstFrame(payload)
+        tp.transmit(txPdu)
+        consecutiveFrames = tp.create_consecutiveFrames(payload, payloadPtr)
+
+        frameIndex = 0
+        while frameIndex < len(consecutiveFrames):
+            blockSize, stMin = await self.__waitFlowControl()
+            if blockSize == 0:
+                blockEnd = len(consecutiveFrames)
+            else:
+                blockEnd = min(frameIndex + blockSize, len(consecutiveFrames))
+            blockStart = frameIndex
+            while frameIndex < blockEnd:
+                if frameIndex != blockStart:
+                    # sleep(0) still lets the other tasks run between back to back frames
+                    await asyncio.sleep(stMin)
+                tp.transmit(consecutiveFrames[frameIndex])
+                frameIndex += 1
+
+    ##
+    # @brief waits for a continue to send flow control
+    # @return tuple of the block size and the separation time in seconds
+    #
+    # A flow control WAIT starts N_Bs again, up to N_WFTmax of them in a row.
+    async def __waitFlowControl(self):
+        waitCount = 0
+        while True:
+            rxPdu = await self.__nextFrame(deadlineService.schedule(self.__tp.nBs))
+            if rxPdu is None:
+                raise CanTpTimeoutError(N_Result.N_TIMEOUT_Bs, "Timeout waiting for flow control")
+
+            N_PCI = (rxPdu[0] & 0xF0) >> 4
+            if N_PCI != CanTpMessageType.FLOW_CONTROL:
+                raise CanTpError(N_Result.N_UNEXP_PDU, "Unexpected response from device")
+            fs = rxPdu[0] & 0x0F
+            if fs != CanTpFsTypes.WAIT:
+                break
+            waitCount = self.__tp.flowControlWait(waitCount)
+
+        if fs == CanTpFsTypes.OVERFLOW:
+            raise CanTpError(N_Result.N_BUFFER_OVFLW, "Overflow received from ECU")
+        elif fs != CanTpFsTypes.CONTINUE_TO_SEND:
+            raise CanTpError(N_Result.N_INVALID_FS, "Unexpected fs response from ECU")
+        return rxPdu[FC_BS_INDEX], self.__tp.decode_stMin(rxPdu[FC_STMIN_INDEX])
+
+    ##
+    # @brief receives a payload
+    # @param [in] timeout_s time to wait for the message, then N_Cr between its consecutive frames
+    # @return the payload as a bytearray
+    async def recv(self, timeout_s=1):
+        receiver = CanTpReceiver(
+            self.__tp.sendFlowControl, self.__tp.flowControlProfile
+        )
+        timeoutTimer = deadlineService.schedule(timeout_s)
+        while True:
+            rxPdu = await self.__nextFrame(timeoutTimer)
+            if rxPdu is None:
+                if receiver.state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
+                    receiver.abort()
+                    raise CanTpTimeoutError(
+                        N_Result.N_TIMEOUT_Cr, "Timeout in waiting for consecutive frame"
+                    )
+                raise Exception("Timeout in waiting for message")
+            payload = receiver.process(rxPdu)
+            if payload is not None:
+                return payload
+            if receiver.state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
+                timeoutTimer.restart(self.__tp.nCr)
+
+    ##
+    # @brief waits for the next received frame
+    # @param [in] timeoutTimer deadline bounding the wait
+    # @return the frame data, or None once the deadline has passed
+    async def __nextFrame(self, timeoutTimer):
+        loop = asyncio.get_running_loop()
+        if self.__loop is not loop:
+            self.__frameEvent = asyncio.Event()
+            self.__loop = loop
+        while True:
+            rxPdu = self.__frames.get()
+            if rxPdu is not None:
+                return rxPdu
+            self.__frameEvent.clear()
+            if len(self.__frames) != 0:
+                continue
+            if timeoutTimer.isExpired():
+                return None
+            try:
+                await asyncio.wait_for(
+                    self.__frameEvent.wait(), timeoutTimer.remainingTime()
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    ##
+    # @brief the listener callback used when a message is received, from any thread
+    def callback_onReceive(self, msg):
+        if msg.arbitration_id != self.__tp.resIdAddress:
+            return
+        self.__frames.put(msg.data)
+        loop = self.__loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.__frameEvent.set)
+
+    ##
+    # @brief detaches the channel from its dispatcher
+    def close(self):
+        if self.__dispatcher is not None:
+            self.__dispatcher.unregister(self)
+            self.__dispatcher = None
+        self.__tp.close()
+
+    ##
+    # @brief the CanTp building and transmitting the frames
+    @property
+    def tp(self):
+        return self.__tp
+
+    @property
+    def flowControlProfile(self):
+        return self.__tp.flowControlProfile
+
+    @property
+    def flowControlWaitCount(self):
+        return self.__tp.flowControlWaitCount
+
+    @property
+    def reqIdAddress(self):
+        return self.__tp.reqIdAddress
+
+    @reqIdAddress.setter
+    def reqIdAddress(self, value):
+        self.__tp.reqIdAddress = value
+
+    @property
+    def resIdAddress(self):
+        return self.__tp.resIdAddress
+
+    @resIdAddress.setter
+    def resIdAddress(self, value):
+        if self.__dispatcher is not None:
+            self.__dispatcher.register(self, value)
+            if value != self.__tp.resIdAddress:
+                self.__dispatcher.unregister(self, self.__tp.resIdAddress)
+        self.__tp.resIdAddress = value
+
+    @property
+    def connection(self):
+        return self.__tp.connection
+
+    @connection.setter
+    def connection(self, value):
+        self.__tp.connection = value
+
+    @property
+    def dispatcher(self):
+        return self.__dispatcher
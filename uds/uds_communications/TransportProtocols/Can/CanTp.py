@@ -10,32 +10,49 @@ __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
 import configparser
+import logging
+import threading
+from functools import partial
 from os import path
-from time import sleep
+from time import monotonic_ns, sleep
 
 from uds.config import Config
 from uds.interfaces import TpInterface
-from uds import ResettableTimer, fillArray
+from uds import FramePacer, MessageBuffer, deadlineService
 from uds.uds_communications.TransportProtocols.Can.CanTpTypes import (
+    CAN_FRAME_LENGTHS,
     CANTP_MAX_PAYLOAD_LENGTH,
-    CONSECUTIVE_FRAME_SEQUENCE_DATA_START_INDEX,
-    CONSECUTIVE_FRAME_SEQUENCE_NUMBER_INDEX,
+    CANTP_MAX_PAYLOAD_LENGTH_ESCAPE,
     FC_BS_INDEX,
     FC_STMIN_INDEX,
     FIRST_FRAME_DATA_START_INDEX,
     FIRST_FRAME_DL_INDEX_HIGH,
     FIRST_FRAME_DL_INDEX_LOW,
+    FIRST_FRAME_ESCAPE_DATA_START_INDEX,
+    FIRST_FRAME_ESCAPE_DL_INDEX,
     FLOW_CONTROL_BS_INDEX,
     FLOW_CONTROL_STMIN_INDEX,
     N_PCI_INDEX,
     SINGLE_FRAME_DATA_START_INDEX,
     SINGLE_FRAME_DL_INDEX,
+    SINGLE_FRAME_ESCAPE_DATA_START_INDEX,
+    SINGLE_FRAME_ESCAPE_DL_INDEX,
     CanTpAddressingTypes,
+    CanTpError,
     CanTpFsTypes,
     CanTpMessageType,
     CanTpMTypes,
     CanTpState,
+    CanTpTimeoutError,
+    N_Result,
 )
+from uds.uds_communications.TransportProtocols.Can.CanTpFlowControl import (
+    FlowControlProfile,
+    decode_stMin,
+)
+from uds.uds_communications.TransportProtocols.Can.CanTpReceiver import CanTpReceiver
+
+log = logging.getLogger(__name__)
 
 
 ##
@@ -48,9 +65,23 @@ class CanTp(TpInterface):
 
     configParams = ["reqId", "resId", "addressingType"]
     PADDING_PATTERN = 0x00
+    # time after which an idle reception worker checks whether it has to stop
+    RX_WORKER_WAIT_TIME = 0.1
 
     ##
     # @brief constructor for the CanTp object
+    # @param [in] connector the bus connector used to transmit frames
+    # @param [in] reqId request id of this channel, defaults to the isotp req_id config
+    # @param [in] resId response id of this channel, defaults to the isotp res_id config
+    # @param [in] dispatcher CanTpDispatcher of the bus, the channel registers its response id on it,
+    #             and the functional responders' ids when it sends a functional request
+    # @param [in] fullDuplex run the background reception worker, defaults to the isotp full_duplex config
+    # @param [in] funcReqId functional request id, defaults to the isotp func_req_id config
+    # @param [in] funcResponders response id to physical request id of the ECUs answering functional
+    #             requests, defaults to the isotp func_responders config, or to this channel alone
+    # @param [in] rxBlockSize block size requested in the flow control sent when receiving
+    # @param [in] rxStMin separation time requested when receiving, raw STmin byte (0x00-0x7F, 0xF1-0xF9)
+    # @param [in] flowControlProfile FlowControlProfile to use instead of rxBlockSize/rxStMin
     def __init__(self, connector = None, **kwargs):
 
 
@@ -71,39 +102,114 @@ class CanTp(TpInterface):
             self.__addressingType = CanTpAddressingTypes.NORMAL
         elif addressingType == "NORMAL_FIXED":
             self.__addressingType = CanTpAddressingTypes.NORMAL_FIXED
-        elif self.__addressingType == "EXTENDED":
+        elif addressingType == "EXTENDED":
             self.__addressingType = CanTpAddressingTypes.EXTENDED
         elif addressingType == "MIXED":
             self.__addressingType = CanTpAddressingTypes.MIXED
         else:
             raise Exception("Do not understand the addressing config")
 
-        self.__reqId = Config.isotp.req_id
-        self.__resId = Config.isotp.res_id
+        txDl = Config.isotp.tx_dl
+        if txDl not in CAN_FRAME_LENGTHS:
+            raise Exception("Do not understand the tx_dl config")
+        self.__txDl = txDl
+
+        self.__reqId = kwargs.get("reqId", Config.isotp.req_id)
+        self.__resId = kwargs.get("resId", Config.isotp.res_id)
+        self.__funcReqId = kwargs.get("funcReqId", Config.isotp.func_req_id)
+        self.__funcResponders = kwargs.get(
+            "funcResponders", Config.isotp.func_responders
+        )
+
+        # receiver flow control parameters, from the most specific source available:
+        # constructor arguments, the profile of this ECU's response id, then the defaults
+        profile = kwargs.get("flowControlProfile")
+        if profile is None:
+            profileConfig = (Config.isotp.rx_fc_profiles or {}).get(self.__resId, {})
+            profile = FlowControlProfile(
+                blockSize=kwargs.get(
+                    "rxBlockSize",
+                    profileConfig.get("block_size", Config.isotp.rx_block_size),
+                ),
+                stMin=kwargs.get(
+                    "rxStMin", profileConfig.get("stmin", Config.isotp.rx_stmin)
+                ),
+                adaptive=profileConfig.get("adaptive", Config.isotp.rx_stmin_adaptive),
+            )
+        self.__flowControlProfile = profile
 
         # sets up the relevant parameters in the instance
         if (self.__addressingType == CanTpAddressingTypes.NORMAL) | (
             self.__addressingType == CanTpAddressingTypes.NORMAL_FIXED
         ):
-            self.__minPduLength = 7
-            self.__maxPduLength = 63
             self.__pduStartIndex = 0
         elif (self.__addressingType == CanTpAddressingTypes.EXTENDED) | (
             self.__addressingType == CanTpAddressingTypes.MIXED
         ):
-            self.__minPduLength = 6
-            self.__maxPduLength = 62
             self.__pduStartIndex = 1
+        # payload carried by a classic single frame, by any single frame and by a consecutive frame,
+        # CAN FD (TX_DL > 8) single frames use the SF_DL escape sequence
+        self.__minPduLength = 7 - self.__pduStartIndex
+        if txDl == 8:
+            self.__maxSingleFrameLength = self.__minPduLength
+        else:
+            self.__maxSingleFrameLength = txDl - 2 - self.__pduStartIndex
+        self.__maxPduLength = txDl - 1 - self.__pduStartIndex
         self.__connection = connector
-        self.__recvBuffer = []
+        self.__recvBuffer = MessageBuffer(Config.isotp.rx_buffer_size)
+        self.__eventDrivenRx = Config.isotp.event_driven_rx
+        self.__stMinSpinTime = Config.isotp.stmin_spin_time
         self.__discardNegResp = Config.isotp.discard_neg_resp
+        # ISO 15765-2 timers, in seconds
+        self.__N_As = Config.isotp.n_as
+        self.__N_Ar = Config.isotp.n_ar
+        self.__N_Bs = Config.isotp.n_bs
+        self.__N_Cr = Config.isotp.n_cr
+        self.__N_WFTmax = Config.isotp.n_wft_max
+        # flow control WAIT frames received since the channel was created
+        self.__flowControlWaitCount = 0
+        # the background reception and the caller may transmit concurrently
+        self.__transmitLock = threading.Lock()
+
+        # responses to a functional request, collected from the time it is sent until the next request
+        self.__functionalBuffer = MessageBuffer(Config.isotp.rx_buffer_size)
+        self.__functionalReceivers = {}
+        self.__functionalResponders = None
+
+        # full duplex: a worker thread reassembles messages and answers flow control on its own
+        self.__fullDuplex = kwargs.get("fullDuplex", Config.isotp.full_duplex)
+        self.__rxWorkerThread = None
+        if self.__fullDuplex:
+            self.__flowControlBuffer = MessageBuffer(Config.isotp.rx_buffer_size)
+            self.__pduBuffer = MessageBuffer(Config.isotp.rx_buffer_size)
+            self.__rxWorkerStop = threading.Event()
+            self.__rxWorkerThread = threading.Thread(
+                name="canTpRxWorker", target=self.__rxWorker, daemon=True
+            )
+            self.__rxWorkerThread.start()
+
+        self.__dispatcher = kwargs.get("dispatcher")
+        if self.__dispatcher is not None:
+            self.__dispatcher.register(self)
 
     ##
     # @brief send method
     # @param [in] payload the payload to be sent
     # @param [in] tpWaitTime time to wait inside loop
     def send(self, payload, functionalReq=False, tpWaitTime=0.01):
-        self.clearBufferedMessages()
+        # the responses to a previous functional request are not wanted any more
+        if self.__functionalResponders is not None:
+            self.endFunctional()
+        if functionalReq:
+            self.__functionalResponders = dict(self.functionalResponders)
+            if self.__dispatcher is not None:
+                # ... the responders' ids are shared with their physical channels
+                self.__dispatcher.registerFunctional(self, self.__functionalResponders)
+        if self.__fullDuplex:
+            # received messages are kept, only stale flow control frames are discarded
+            self.__flowControlBuffer.clear()
+        else:
+            self.clearBufferedMessages()
         result = self.encode_isotp(payload, functionalReq, tpWaitTime=tpWaitTime)
         return result
 
@@ -125,27 +231,27 @@ class CanTp(TpInterface):
 
         state = CanTpState.IDLE
 
-        if payloadLength > CANTP_MAX_PAYLOAD_LENGTH:
+        if payloadLength > CANTP_MAX_PAYLOAD_LENGTH_ESCAPE:
             raise Exception("Payload too large for CAN Transport Protocol")
 
-        if payloadLength < self.__maxPduLength:
+        if payloadLength <= self.__maxSingleFrameLength:
             state = CanTpState.SEND_SINGLE_FRAME
+        elif functionalReq:
+            # there is no flow control for a functional request, so it cannot be segmented
+            raise Exception("Functional requests must fit in a single frame")
         else:
-            # we might need a check for functional request as we may not be able to service functional requests for
-            # multi frame requests
             state = CanTpState.SEND_FIRST_FRAME
 
-        txPdu = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
-
-        sequenceNumber = 1
         endOfMessage_flag = False
 
-        blockList = []
-        currBlock = []
+        consecutiveFrames = None
+        frameIndex = 0
+        blockEnd = 0
+        waitCount = 0  # ... FC.WAIT received in a row
 
-        # this needs fixing to get the timing from the config
-        timeoutTimer = ResettableTimer(1)
-        stMinTimer = ResettableTimer()
+        # N_Bs, from a first frame or the end of a block to the next flow control frame
+        timeoutTimer = deadlineService.schedule()
+        stMinPacer = FramePacer(spinTime=self.__stMinSpinTime)
 
         data = None
 
@@ -154,215 +260,319 @@ class CanTp(TpInterface):
             rxPdu = None
 
             if state == CanTpState.WAIT_FLOW_CONTROL:
-                rxPdu = self.getNextBufferedMessage()
+                if self.__fullDuplex:
+                    rxPdu = self.__flowControlBuffer.get()
+                else:
+                    rxPdu = self.getNextBufferedMessage()
 
             if rxPdu is not None:
                 N_PCI = (rxPdu[0] & 0xF0) >> 4
                 if N_PCI == CanTpMessageType.FLOW_CONTROL:
                     fs = rxPdu[0] & 0x0F
                     if fs == CanTpFsTypes.WAIT:
-                        raise Exception("Wait not currently supported")
+                        # the ECU is busy, N_Bs starts again for the flow control that follows
+                        waitCount = self.flowControlWait(waitCount)
+                        timeoutTimer.restart(self.__N_Bs)
                     elif fs == CanTpFsTypes.OVERFLOW:
-                        raise Exception("Overflow received from ECU")
+                        raise CanTpError(N_Result.N_BUFFER_OVFLW, "Overflow received from ECU")
                     elif fs == CanTpFsTypes.CONTINUE_TO_SEND:
                         if state == CanTpState.WAIT_FLOW_CONTROL:
+                            if consecutiveFrames is None:
+                                consecutiveFrames = self.create_consecutiveFrames(
+                                    payload, payloadPtr
+                                )
+                            # the block size may change with every flow control frame, 0 means no limit
                             bs = rxPdu[FC_BS_INDEX]
                             if bs == 0:
-                                bs = 585
-                            blockList = self.create_blockList(payload[payloadPtr:], bs)
+                                blockEnd = len(consecutiveFrames)
+                            else:
+                                blockEnd = min(frameIndex + bs, len(consecutiveFrames))
+                            waitCount = 0
                             stMin = self.decode_stMin(rxPdu[FC_STMIN_INDEX])
-                            currBlock = blockList.pop(0)
                             state = CanTpState.SEND_CONSECUTIVE_FRAME
-                            stMinTimer.timeoutTime = stMin
-                            stMinTimer.start()
+                            stMinPacer.reset(stMin)
                             timeoutTimer.stop()
                         else:
-                            raise Exception(
-                                "Unexpected Flow Control Continue to Send request"
+                            raise CanTpError(
+                                N_Result.N_UNEXP_PDU,
+                                "Unexpected Flow Control Continue to Send request",
                             )
                     else:
-                        raise Exception("Unexpected fs response from ECU")
+                        raise CanTpError(N_Result.N_INVALID_FS, "Unexpected fs response from ECU")
                 else:
-                    raise Exception("Unexpected response from device")
+                    raise CanTpError(N_Result.N_UNEXP_PDU, "Unexpected response from device")
 
             if state == CanTpState.SEND_SINGLE_FRAME:
-                if len(payload) <= self.__minPduLength:
-                    txPdu[N_PCI_INDEX] += CanTpMessageType.SINGLE_FRAME << 4
-                    txPdu[SINGLE_FRAME_DL_INDEX] += payloadLength
-                    txPdu[SINGLE_FRAME_DATA_START_INDEX:] = fillArray(
-                        payload, self.__minPduLength
-                    )
-                else:
-                    txPdu[N_PCI_INDEX] = 0
-                    txPdu[FIRST_FRAME_DL_INDEX_LOW] = payloadLength
-                    txPdu[FIRST_FRAME_DATA_START_INDEX:] = payload
                 data = self.transmit(
-                    txPdu, functionalReq, use_external_snd_rcv_functions
+                    self.create_singleFrame(payload),
+                    functionalReq,
+                    use_external_snd_rcv_functions,
                 )
                 endOfMessage_flag = True
             elif state == CanTpState.SEND_FIRST_FRAME:
-                payloadLength_highNibble = (payloadLength & 0xF00) >> 8
-                payloadLength_lowNibble = payloadLength & 0x0FF
-                txPdu[N_PCI_INDEX] += CanTpMessageType.FIRST_FRAME << 4
-                txPdu[FIRST_FRAME_DL_INDEX_HIGH] += payloadLength_highNibble
-                txPdu[FIRST_FRAME_DL_INDEX_LOW] += payloadLength_lowNibble
-                txPdu[FIRST_FRAME_DATA_START_INDEX:] = payload[
-                    0 : self.__maxPduLength - 1
-                ]
-                payloadPtr += self.__maxPduLength - 1
+                txPdu, payloadPtr = self.create_firstFrame(payload)
                 data = self.transmit(
                     txPdu, functionalReq, use_external_snd_rcv_functions
                 )
-                timeoutTimer.start()
+                timeoutTimer.restart(self.__N_Bs)
                 state = CanTpState.WAIT_FLOW_CONTROL
             elif state == CanTpState.SEND_CONSECUTIVE_FRAME:
-                if stMinTimer.isExpired():
-                    txPdu[N_PCI_INDEX] += CanTpMessageType.CONSECUTIVE_FRAME << 4
-                    txPdu[CONSECUTIVE_FRAME_SEQUENCE_NUMBER_INDEX] += sequenceNumber
-                    txPdu[CONSECUTIVE_FRAME_SEQUENCE_DATA_START_INDEX:] = currBlock.pop(
-                        0
-                    )
-                    payloadPtr += self.__maxPduLength
-                    data = self.transmit(
-                        txPdu, functionalReq, use_external_snd_rcv_functions
-                    )
-                    sequenceNumber = (sequenceNumber + 1) % 16
-                    stMinTimer.restart()
-                    if len(currBlock) == 0:
-                        if len(blockList) == 0:
-                            endOfMessage_flag = True
-                        else:
-                            timeoutTimer.start()
-                            state = CanTpState.WAIT_FLOW_CONTROL
+                stMinPacer.wait()
+                data = self.transmit(
+                    consecutiveFrames[frameIndex],
+                    functionalReq,
+                    use_external_snd_rcv_functions,
+                )
+                frameIndex += 1
+                if frameIndex == len(consecutiveFrames):
+                    endOfMessage_flag = True
+                elif frameIndex == blockEnd:
+                    timeoutTimer.restart(self.__N_Bs)
+                    state = CanTpState.WAIT_FLOW_CONTROL
+            elif state == CanTpState.WAIT_FLOW_CONTROL:
+                if rxPdu is None:
+                    if self.__fullDuplex:
+                        self.__flowControlBuffer.wait(timeoutTimer.remainingTime())
+                    else:
+                        self.waitForBufferedMessage(
+                            timeoutTimer.remainingTime(), tpWaitTime
+                        )
             else:
                 sleep(tpWaitTime)
-            txPdu = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
             # timer / exit condition checks
             if timeoutTimer.isExpired():
-                raise Exception("Timeout waiting for message")
+                raise CanTpTimeoutError(N_Result.N_TIMEOUT_Bs, "Timeout waiting for flow control")
         if use_external_snd_rcv_functions:
             return data
 
     ##
     # @brief recv method
     # @param [in] timeout_ms The timeout to wait before exiting
-    # @return a list
+    # @return the payload as a bytearray
     def recv(self, timeout_s=1):
+        if self.__fullDuplex:
+            if not self.__pduBuffer.wait(timeout_s):
+                raise Exception("Timeout in waiting for message")
+            return self.__pduBuffer.get()
         return self.decode_isotp(timeout_s)
 
+    ##
+    # @brief collects the responses to the last functional request
+    # @param [in] timeout_s time to keep collecting, responses keep coming in until then
+    # @param [in] expected response ids waited for, collection ends as soon as all of them have answered
+    # @return dict of the complete responses received meanwhile, as bytearrays keyed by response id
+    #
+    # Every responder is reassembled on its own, the flow control of a multi frame response
+    # is sent on the physical request id of its ECU. Collection goes on over successive calls
+    # until endFunctional is called or the next request is sent, which is how pending responses
+    # (0x78) can be waited for. With a CanTpDispatcher, the responders' response ids are routed
+    # to this channel by send, alongside the physical channels registered for them, until then.
+    def recvFunctional(self, timeout_s=1, expected=None):
+        responders = self.__functionalResponders
+        if responders is None:
+            raise Exception("No functional request sent")
+        responses = {}
+        timeoutTimer = deadlineService.schedule(timeout_s)
+        while True:
+            message = self.__functionalBuffer.get()
+            if message is None:
+                if timeoutTimer.isExpired():
+                    return responses
+                self.__functionalBuffer.wait(timeoutTimer.remainingTime())
+                continue
+            arbitrationId, rxPdu = message
+            receiver = self.__functionalReceivers.get(arbitrationId)
+            if receiver is None:
+                receiver = CanTpReceiver(
+                    partial(self.sendFlowControl, reqId=responders[arbitrationId]),
+                    self.__flowControlProfile,
+                )
+                self.__functionalReceivers[arbitrationId] = receiver
+            try:
+                payload = receiver.process(rxPdu)
+            except Exception as e:
+                log.warning(f"Functional response from 0x{arbitrationId:X} aborted: {e}")
+                continue
+            if payload is not None:
+                responses[arbitrationId] = payload
+                if expected is not None and expected.issubset(responses):
+                    return responses
+
+    ##
+    # @brief stops collecting the responses to the last functional request
+    #
+    # The responders' frames go back to the physical reception of their channels, this one
+    # included, and they are no longer routed here by the dispatcher.
+    def endFunctional(self):
+        self.__functionalResponders = None
+        if self.__dispatcher is not None:
+            self.__dispatcher.unregisterFunctional(self)
+        self.__functionalBuffer.clear()
+        self.__functionalReceivers = {}
+
+    ##
+    # @brief counts a flow control WAIT frame received while sending
+    # @param waitCount WAIT frames received in a row so far
+    # @return the WAIT frames received in a row, this one included
+    def flowControlWait(self, waitCount):
+        self.__flowControlWaitCount += 1
+        waitCount += 1
+        if waitCount > self.__N_WFTmax:
+            raise CanTpError(
+                N_Result.N_WFT_OVFLW,
+                "More than {0} flow control wait frames received".format(self.__N_WFTmax),
+            )
+        return waitCount
+
     ##
     # @brief decoding method
-    # @param timeout_ms the timeout to wait before exiting
+    # @param timeout_s the time to wait for the message, then N_Cr between its consecutive frames
     # @param received_data the data that should be decoded in case of ITF Automation
     # @param use_external_snd_rcv_functions boolean to state if external sending and receiving functions shall be used
-    # @return a list
+    # @return the payload as a bytearray
     def decode_isotp(
         self,
         timeout_s=1,
         received_data=None,
         use_external_snd_rcv_functions: bool = False,
     ):
-        timeoutTimer = ResettableTimer(timeout_s)
+        receiver = CanTpReceiver(self.sendFlowControl, self.__flowControlProfile)
 
-        payload = []
-        payloadPtr = 0
-        payloadLength = None
-
-        sequenceNumberExpected = 1
-
-        txPdu = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
-
-        endOfMessage_flag = False
-
-        state = CanTpState.IDLE
-
-        timeoutTimer.start()
-        while endOfMessage_flag is False:
+        timeoutTimer = deadlineService.schedule(timeout_s)
+        while True:
 
             if (
                 use_external_snd_rcv_functions
-                and state != CanTpState.RECEIVING_CONSECUTIVE_FRAME
+                and receiver.state != CanTpState.RECEIVING_CONSECUTIVE_FRAME
             ):
                 rxPdu = received_data
             else:
                 rxPdu = self.getNextBufferedMessage()
 
             if rxPdu is not None:
-                if rxPdu[N_PCI_INDEX] == 0x00:
-                    rxPdu = rxPdu[1:]
-                    N_PCI = 0
-                else:
-                    N_PCI = (rxPdu[N_PCI_INDEX] & 0xF0) >> 4
-                if state == CanTpState.IDLE:
-                    if N_PCI == CanTpMessageType.SINGLE_FRAME:
-                        payloadLength = rxPdu[N_PCI_INDEX & 0x0F]
-                        payload = rxPdu[
-                            SINGLE_FRAME_DATA_START_INDEX : SINGLE_FRAME_DATA_START_INDEX
-                            + payloadLength
-                        ]
-                        endOfMessage_flag = True
-                    elif N_PCI == CanTpMessageType.FIRST_FRAME:
-                        payload = rxPdu[FIRST_FRAME_DATA_START_INDEX:]
-                        payloadLength = (
-                            (rxPdu[FIRST_FRAME_DL_INDEX_HIGH] & 0x0F) << 8
-                        ) + rxPdu[FIRST_FRAME_DL_INDEX_LOW]
-                        payloadPtr = self.__maxPduLength - 1
-                        state = CanTpState.SEND_FLOW_CONTROL
-                elif state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
-                    if N_PCI == CanTpMessageType.CONSECUTIVE_FRAME:
-                        sequenceNumber = (
-                            rxPdu[CONSECUTIVE_FRAME_SEQUENCE_NUMBER_INDEX] & 0x0F
-                        )
-                        if sequenceNumber != sequenceNumberExpected:
-                            raise Exception("Consecutive frame sequence out of order")
-                        else:
-                            sequenceNumberExpected = (sequenceNumberExpected + 1) % 16
-                        payload += rxPdu[CONSECUTIVE_FRAME_SEQUENCE_DATA_START_INDEX:]
-                        payloadPtr += self.__maxPduLength
-                        timeoutTimer.restart()
-                    else:
-                        raise Exception("Unexpected PDU received")
+                payload = receiver.process(rxPdu)
+                if payload is not None:
+                    return payload
+                if receiver.state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
+                    timeoutTimer.restart(self.__N_Cr)
+            elif (
+                not use_external_snd_rcv_functions
+                or receiver.state == CanTpState.RECEIVING_CONSECUTIVE_FRAME
+            ):
+                self.waitForBufferedMessage(timeoutTimer.remainingTime())
             else:
                 sleep(0.01)
 
-            if state == CanTpState.SEND_FLOW_CONTROL:
-                txPdu[N_PCI_INDEX] = 0x30
-                txPdu[FLOW_CONTROL_BS_INDEX] = 0
-                txPdu[FLOW_CONTROL_STMIN_INDEX] = 0x1E
-                self.transmit(txPdu)
-                state = CanTpState.RECEIVING_CONSECUTIVE_FRAME
-
-            if payloadLength is not None:
-                if payloadPtr >= payloadLength:
-                    endOfMessage_flag = True
-
             if timeoutTimer.isExpired():
+                if receiver.state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
+                    receiver.abort()
+                    raise CanTpTimeoutError(
+                        N_Result.N_TIMEOUT_Cr, "Timeout in waiting for consecutive frame"
+                    )
                 raise Exception("Timeout in waiting for message")
 
-        return list(payload[:payloadLength])
+    ##
+    # @brief sends a continue to send flow control frame to the ECU
+    # @param blockSize number of consecutive frames before the next flow control, 0 for all
+    # @param stMin raw separation time byte requested from the ECU
+    def sendFlowControl(self, blockSize=0, stMin=0x1E, reqId=None):
+        txPdu = bytearray(8 - self.__pduStartIndex)
+        txPdu[N_PCI_INDEX] = (CanTpMessageType.FLOW_CONTROL << 4) | (
+            CanTpFsTypes.CONTINUE_TO_SEND
+        )
+        txPdu[FLOW_CONTROL_BS_INDEX] = blockSize
+        txPdu[FLOW_CONTROL_STMIN_INDEX] = stMin
+        self.transmit(txPdu, reqId=reqId, timeout=self.__N_Ar)
 
+    ##
+    # @brief background reception, reassembling messages as their frames arrive
+    #
+    # Flow control frames are handed over to the sender through the flow control buffer,
+    # every other frame goes through the reassembly state machine and complete messages
+    # are queued for recv.
+    def __rxWorker(self):
+        receiver = CanTpReceiver(self.sendFlowControl, self.__flowControlProfile)
+        # a message whose consecutive frames stop arriving is dropped after N_Cr
+        timeoutTimer = deadlineService.schedule()
+        while not self.__rxWorkerStop.is_set():
+            rxPdu = self.getNextBufferedMessage()
+            if rxPdu is None:
+                if receiver.state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
+                    if timeoutTimer.isExpired():
+                        log.warning("Timeout in waiting for consecutive frame")
+                        receiver.abort()
+                    self.waitForBufferedMessage(timeoutTimer.remainingTime())
+                else:
+                    self.waitForBufferedMessage(self.RX_WORKER_WAIT_TIME)
+                continue
+
+            N_PCI = (rxPdu[N_PCI_INDEX] & 0xF0) >> 4
+            if N_PCI == CanTpMessageType.FLOW_CONTROL:
+                self.__flowControlBuffer.put(rxPdu)
+                continue
+
+            try:
+                payload = receiver.process(rxPdu)
+            except Exception as e:
+                log.warning(f"Reception aborted: {e}")
+                continue
+            if payload is not None:
+                self.__pduBuffer.put(payload)
+            elif receiver.state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
+                timeoutTimer.restart(self.__N_Cr)
+
+    ##
+    # @brief detaches the channel from its dispatcher and stops the background reception worker, if any
+    def close(self):
+        if self.__dispatcher is not None:
+            self.__dispatcher.unregister(self)
+            self.__dispatcher = None
+        if self.__rxWorkerThread is not None:
+            self.__rxWorkerStop.set()
+            self.__rxWorkerThread.join()
+            self.__rxWorkerThread = None
 
     ##
     # @brief clear out the receive list
     def clearBufferedMessages(self):
-        self.__recvBuffer = []
+        self.__recvBuffer.clear()
 
     ##
     # @brief retrieves the next message from the received message buffers
-    # @return list, or None if nothing is on the receive list
+    # @return the frame data, or None if nothing is on the receive list
     def getNextBufferedMessage(self):
-        length = len(self.__recvBuffer)
-        if length != 0:
-            return self.__recvBuffer.pop(0)
-        else:
-            return None
+        return self.__recvBuffer.get()
+
+    ##
+    # @brief blocks until a message is buffered or the timeout elapses
+    # @param [in] timeout maximum time to wait in seconds
+    # @param [in] tpWaitTime polling period used when the receive buffer cannot signal
+    #
+    # Only frames delivered through callback_onReceive signal the buffer. When event driven
+    # reception is disabled, or the receive method has been overwritten (see
+    # Uds.overwrite_receive_method), this falls back to sleeping for tpWaitTime.
+    def waitForBufferedMessage(self, timeout, tpWaitTime=0.01):
+        if not self.__eventDrivenRx or (
+            getattr(self.getNextBufferedMessage, "__func__", None)
+            is not _getNextBufferedMessage
+        ):
+            sleep(tpWaitTime if timeout is None else min(tpWaitTime, timeout))
+            return
+        self.__recvBuffer.wait(timeout)
 
     ##
     # @brief the listener callback used when a message is received
     def callback_onReceive(self, msg):
         if self.__addressingType == CanTpAddressingTypes.NORMAL:
-            if msg.arbitration_id == self.__resId:
-                self.__recvBuffer.append(msg.data[self.__pduStartIndex :])
+            # normal addressing carries no address byte, the frame data is buffered as is
+            functionalResponders = self.__functionalResponders
+            if (
+                functionalResponders is not None
+                and msg.arbitration_id in functionalResponders
+            ):
+                self.__functionalBuffer.put((msg.arbitration_id, msg.data))
+            elif msg.arbitration_id == self.__resId:
+                self.__recvBuffer.put(msg.data)
         elif self.__addressingType == CanTpAddressingTypes.NORMAL_FIXED:
             raise Exception("I do not know how to receive this addressing type yet")
         elif self.__addressingType == CanTpAddressingTypes.MIXED:
@@ -374,61 +584,128 @@ class CanTp(TpInterface):
     # @brief function to decode the StMin parameter
     @staticmethod
     def decode_stMin(val):
-        if val <= 0x7F:
-            time = val / 1000
-            return time
-        elif (val >= 0xF1) & (val <= 0xF9):
-            time = (val & 0x0F) / 10000
-            return time
-        else:
-            raise Exception("Unknown STMin time")
+        return decode_stMin(val)
 
     ##
-    # @brief creates the blocklist from the blocksize and payload
-    def create_blockList(self, payload, blockSize):
+    # @brief pads a frame length to 8 bytes, or to the next valid CAN FD length above that
+    # @param length number of bytes used in the frame, addressing extension byte excluded
+    def alignFrameLength(self, length):
+        length += self.__pduStartIndex
+        for frameLength in CAN_FRAME_LENGTHS:
+            if length <= frameLength:
+                return frameLength - self.__pduStartIndex
+        raise Exception("Frame too large for CAN")
 
-        blockList = []
-        currBlock = []
-        currPdu = []
+    ##
+    # @brief builds a single frame, using the SF_DL escape sequence above 7 bytes
+    # @param payload bytes-like object or list of ints, at most the maximum single frame length
+    # @return bytearray frame, padded to a valid frame length
+    def create_singleFrame(self, payload):
+        payloadLength = len(payload)
+        if payloadLength > self.__maxSingleFrameLength:
+            raise Exception("Payload too large for a single frame")
 
-        payloadPtr = 0
-        blockPtr = 0
+        if payloadLength <= self.__minPduLength:
+            dataStart = SINGLE_FRAME_DATA_START_INDEX
+        else:
+            dataStart = SINGLE_FRAME_ESCAPE_DATA_START_INDEX
+        frame = bytearray([self.PADDING_PATTERN]) * self.alignFrameLength(
+            dataStart + payloadLength
+        )
+        frame[N_PCI_INDEX] = CanTpMessageType.SINGLE_FRAME << 4
+        if dataStart == SINGLE_FRAME_DATA_START_INDEX:
+            frame[SINGLE_FRAME_DL_INDEX] |= payloadLength
+        else:
+            frame[SINGLE_FRAME_ESCAPE_DL_INDEX] = payloadLength
+        frame[dataStart : dataStart + payloadLength] = payload
+        return frame
 
+    ##
+    # @brief builds a first frame, using the 32 bit FF_DL escape sequence above 4095 bytes
+    # @param payload bytes-like object or list of ints holding the whole message
+    # @return tuple of the bytearray frame and the number of payload bytes it carries
+    def create_firstFrame(self, payload):
         payloadLength = len(payload)
-        pduLength = self.__maxPduLength
-        blockLength = blockSize * pduLength
-
-        working = True
-        while working:
-            if (payloadPtr + pduLength) >= payloadLength:
-                working = False
-                currPdu = fillArray(
-                    payload[payloadPtr:], pduLength, fillValue=self.PADDING_PATTERN
-                )
-                currBlock.append(currPdu)
-                blockList.append(currBlock)
+        frame = bytearray(self.__txDl - self.__pduStartIndex)
+        frame[N_PCI_INDEX] = CanTpMessageType.FIRST_FRAME << 4
+        if payloadLength <= CANTP_MAX_PAYLOAD_LENGTH:
+            frame[FIRST_FRAME_DL_INDEX_HIGH] |= (payloadLength & 0xF00) >> 8
+            frame[FIRST_FRAME_DL_INDEX_LOW] = payloadLength & 0x0FF
+            dataStart = FIRST_FRAME_DATA_START_INDEX
+        else:
+            frame[
+                FIRST_FRAME_ESCAPE_DL_INDEX:FIRST_FRAME_ESCAPE_DATA_START_INDEX
+            ] = payloadLength.to_bytes(4, "big")
+            dataStart = FIRST_FRAME_ESCAPE_DATA_START_INDEX
+        dataLength = len(frame) - dataStart
+        frame[dataStart:] = payload[:dataLength]
+        return frame, dataLength
 
-            if working:
-                currPdu = payload[payloadPtr : payloadPtr + pduLength]
-                currBlock.append(currPdu)
-                payloadPtr += pduLength
-                blockPtr += pduLength
+    ##
+    # @brief segments a payload into consecutive frames
+    # @param payload bytes-like object (or list of ints) holding the whole message
+    # @param start offset of the first byte carried by the consecutive frames
+    # @return list of memoryview frames, PCI included, sharing one preallocated buffer
+    #
+    # The frames are written once, sequence numbers included, so the transmit loop only
+    # hands out slices and a message costs one allocation however many frames it needs.
+    def create_consecutiveFrames(self, payload, start=0):
+        if not isinstance(payload, (bytes, bytearray, memoryview)):
+            payload = bytes(payload)
+        payload = memoryview(payload)[start:]
 
-                if blockPtr == blockLength:
-                    blockList.append(currBlock)
-                    currBlock = []
-                    blockPtr = 0
+        payloadLength = len(payload)
+        pduLength = self.__maxPduLength
+        frameLength = pduLength + 1
+        frameCount = -(-payloadLength // pduLength)
+
+        buffer = bytearray([self.PADDING_PATTERN]) * (frameCount * frameLength)
+        for i in range(frameCount):
+            framePtr = i * frameLength
+            data = payload[i * pduLength : (i + 1) * pduLength]
+            buffer[framePtr] = (CanTpMessageType.CONSECUTIVE_FRAME << 4) | (
+                (i + 1) & 0x0F
+            )
+            buffer[framePtr + 1 : framePtr + 1 + len(data)] = data
+
+        frames = memoryview(buffer)
+        result = [
+            frames[i * frameLength : (i + 1) * frameLength] for i in range(frameCount)
+        ]
+        # the last frame is only padded up to the next valid frame length
+        if frameCount:
+            lastLength = payloadLength - (frameCount - 1) * pduLength
+            result[-1] = result[-1][: self.alignFrameLength(1 + lastLength)]
+        return result
 
-        return blockList
+    ##
+    # @brief creates the blocklist from the blocksize and payload
+    # @return list of blocks, each a list of at most blockSize consecutive frames
+    def create_blockList(self, payload, blockSize):
+        frames = self.create_consecutiveFrames(payload)
+        return [frames[i : i + blockSize] for i in range(0, len(frames), blockSize)]
 
     ##
     # @brief transmits the data over can using can connection
+    # @param [in] reqId arbitration id to send on, defaults to the request id, or the functional
+    #             request id for a functional request
+    # @param [in] timeout longest time the connector's transmit call may take, defaults to N_As
+    #
+    # The connectors give no transmit confirmation, so this is not the ISO 15765-2 N_As/N_Ar
+    # timer: only the duration of the transmit call is checked. A blocking connector (e.g. one
+    # sending with a timeout and waiting for the controller) fails the transfer when the call
+    # outlasts the timeout, as on a bus without acknowledgement; a connector that only queues
+    # the frame (e.g. a non-blocking python-can bus) returns at once and never trips it.
     def transmit(
-        self, data, functionalReq=False, use_external_snd_rcv_functions: bool = False
+        self,
+        data,
+        functionalReq=False,
+        use_external_snd_rcv_functions: bool = False,
+        reqId=None,
+        timeout=None,
     ):
-        # check functional request
-        if functionalReq:
-            raise Exception("Functional requests are currently not supported")
+        if reqId is None:
+            reqId = self.__funcReqId if functionalReq else self.__reqId
 
         transmitData = [0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00]
 
@@ -441,7 +718,47 @@ class CanTp(TpInterface):
             transmitData[1:] = data
         else:
             raise Exception("I do not know how to send this addressing type")
-        self.__connection.transmit(transmitData, self.__reqId)
+        with self.__transmitLock:
+            startTime = monotonic_ns()
+            self.__connection.transmit(transmitData, reqId)
+        if monotonic_ns() - startTime > (self.__N_As if timeout is None else timeout) * 1e9:
+            raise CanTpTimeoutError(N_Result.N_TIMEOUT_A, "Timeout transmitting frame")
+
+    ##
+    # @brief the ISO 15765-2 timers of the channel, in seconds
+    @property
+    def nAs(self):
+        return self.__N_As
+
+    @property
+    def nAr(self):
+        return self.__N_Ar
+
+    @property
+    def nBs(self):
+        return self.__N_Bs
+
+    @property
+    def nCr(self):
+        return self.__N_Cr
+
+    ##
+    # @brief number of flow control WAIT frames received since the channel was created
+    @property
+    def flowControlWaitCount(self):
+        return self.__flowControlWaitCount
+
+    ##
+    # @brief the block size and separation time requested when receiving
+    @property
+    def flowControlProfile(self):
+        return self.__flowControlProfile
+
+    ##
+    # @brief the receive buffer, exposing its overflow and drop counters
+    @property
+    def recvBuffer(self):
+        return self.__recvBuffer
 
     @property
     def reqIdAddress(self):
@@ -457,6 +774,10 @@ class CanTp(TpInterface):
 
     @resIdAddress.setter
     def resIdAddress(self, value):
+        if self.__dispatcher is not None:
+            self.__dispatcher.register(self, value)
+            if value != self.__resId:
+                self.__dispatcher.unregister(self, self.__resId)
         self.__resId = value
 
     @property
@@ -465,4 +786,38 @@ class CanTp(TpInterface):
 
     @connection.setter
     def connection(self, value):
-        self.__connection = value
\ No newline at end of file
+        self.__connection = value
+
+    @property
+    def dispatcher(self):
+        return self.__dispatcher
+
+    ##
+    # @brief the largest payload sent in a single frame
+    @property
+    def maxSingleFrameLength(self):
+        return self.__maxSingleFrameLength
+
+    ##
+    # @brief response id to physical request id of the ECUs expected to answer functional requests
+    @property
+    def functionalResponders(self):
+        if self.__funcResponders is None:
+            return {self.__resId: self.__reqId}
+        return self.__funcResponders
+
+    @functionalResponders.setter
+    def functionalResponders(self, value):
+        self.__funcResponders = value
+
+    @property
+    def funcReqIdAddress(self):
+        return self.__funcReqId
+
+    @funcReqIdAddress.setter
+    def funcReqIdAddress(self, value):
+        self.__funcReqId = value
+
+
+# reference to the built-in receive method, used to detect an overwritten one
+_getNextBufferedMessage = CanTp.getNextBufferedMessage
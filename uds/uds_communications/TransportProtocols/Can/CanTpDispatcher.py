@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import threading
+
+
+##
+# @class CanTpDispatcher
+# @brief routes the frames received on one bus to the CanTp channels listening on it
+#
+# A single bus listener serves any number of CanTp instances: each frame is handed to the
+# channel registered for its arbitration id with one dict lookup, frames nobody listens to
+# are dropped. The routing table is replaced, never modified, on registration so frames
+# are dispatched without taking the lock.
+# The channels collecting functional responses listen to the response ids of every ECU,
+# which have channels of their own: those ids are fanned out to the functional listeners
+# as well as to the channel registered for them.
+class CanTpDispatcher(object):
+    def __init__(self):
+
+        self.__channels = {}
+        self.__functionalChannels = {}  # ... response id to the tuple of functional listeners
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__channels)
+
+    def __contains__(self, arbitrationId):
+        return arbitrationId in self.__channels
+
+    ##
+    # @brief routes the frames received on a response id to a channel
+    # @param [in] channel the CanTp instance, or any object with a callback_onReceive method
+    # @param [in] arbitrationId the response id to route, defaults to channel.resIdAddress
+    def register(self, channel, arbitrationId=None):
+        if arbitrationId is None:
+            arbitrationId = channel.resIdAddress
+        with self.__lock:
+            registered = self.__channels.get(arbitrationId)
+            if registered is not None and registered is not channel:
+                raise Exception(
+                    "Response id 0x{0:X} is already registered".format(arbitrationId)
+                )
+            channels = dict(self.__channels)
+            channels[arbitrationId] = channel
+            self.__channels = channels
+
+    ##
+    # @brief routes the frames received on the response ids of functional responders to a channel too
+    # @param [in] channel the CanTp instance collecting the functional responses
+    # @param [in] arbitrationIds the response ids of the ECUs answering functional requests
+    def registerFunctional(self, channel, arbitrationIds):
+        with self.__lock:
+            functionalChannels = dict(self.__functionalChannels)
+            for arbitrationId in arbitrationIds:
+                listeners = functionalChannels.get(arbitrationId, ())
+                if channel not in listeners:
+                    functionalChannels[arbitrationId] = listeners + (channel,)
+            self.__functionalChannels = functionalChannels
+
+    ##
+    # @brief stops fanning out the functional responders' frames to a channel
+    def unregisterFunctional(self, channel):
+        with self.__lock:
+            functionalChannels = {}
+            for registeredId, listeners in self.__functionalChannels.items():
+                listeners = tuple(listener for listener in listeners if listener is not channel)
+                if listeners:
+                    functionalChannels[registeredId] = listeners
+            self.__functionalChannels = functionalChannels
+
+    ##
+    # @brief stops routing frames to a channel
+    # @param [in] arbitrationId the response id to stop routing, defaults to all ids of the channel
+    def unregister(self, channel, arbitrationId=None):
+        with self.__lock:
+            self.__channels = {
+                registeredId: registered
+                for registeredId, registered in self.__channels.items()
+                if registered is not channel
+                or (arbitrationId is not None and registeredId != arbitrationId)
+            }
+            functionalChannels = {}
+            for registeredId, listeners in self.__functionalChannels.items():
+                if arbitrationId is None or registeredId == arbitrationId:
+                    listeners = tuple(
+                        listener for listener in listeners if listener is not channel
+                    )
+                if listeners:
+                    functionalChannels[registeredId] = listeners
+            self.__functionalChannels = functionalChannels
+
+    ##
+    # @brief the channel registered for a response id
+    # @return the channel, or None if the id is not routed
+    def getChannel(self, arbitrationId):
+        return self.__channels.get(arbitrationId)
+
+    ##
+    # @brief the listener callback used when a message is received
+    def callback_onReceive(self, msg):
+        channel = self.__channels.get(msg.arbitration_id)
+        if channel is not None:
+            channel.callback_onReceive(msg)
+        for listener in self.__functionalChannels.get(msg.arbitration_id, ()):
+            if listener is not channel:
+                listener.callback_onReceive(msg)
+
+    # python-can Listener interface, so the dispatcher can be given directly to a can.Notifier
+    on_message_received = callback_onReceive
+    __call__ = callback_onReceive
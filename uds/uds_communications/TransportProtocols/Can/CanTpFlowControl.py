@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import threading
+
+
+##
+# @brief function to decode the StMin parameter
+# @return the separation time in seconds
+def decode_stMin(val):
+    if val <= 0x7F:
+        time = val / 1000
+        return time
+    elif (val >= 0xF1) & (val <= 0xF9):
+        time = (val & 0x0F) / 10000
+        return time
+    else:
+        raise Exception("Unknown STMin time")
+
+
+##
+# @class FlowControlProfile
+# @brief block size and separation time a receiver requests from an ECU in its flow control
+#
+# When adaptive, every failed reception (lost or out of order consecutive frames) asks the
+# ECU for the next larger separation time, and every recoveryCount successful multi frame
+# receptions step back towards the configured one.
+class FlowControlProfile(object):
+
+    # separation times tried when adapting, fastest first
+    STMIN_STEPS = (0x00, 0xF1, 0xF2, 0xF5, 0x01, 0x02, 0x05, 0x0A, 0x14, 0x1E, 0x32, 0x64, 0x7F)
+
+    def __init__(self, blockSize=0, stMin=0x1E, adaptive=False, recoveryCount=16):
+
+        if not 0 <= blockSize <= 0xFF:
+            raise Exception("Unknown block size")
+        decode_stMin(stMin)
+
+        self.__blockSize = blockSize
+        self.__adaptive = adaptive
+        self.__recoveryCount = recoveryCount
+        self.__lock = threading.Lock()
+
+        steps = set(self.STMIN_STEPS)
+        steps.add(stMin)
+        self.__steps = sorted(steps, key=decode_stMin)
+        self.__baseStep = self.__steps.index(stMin)
+        self.__step = self.__baseStep
+        self.__successCount = 0
+
+    @property
+    def blockSize(self):
+        return self.__blockSize
+
+    @property
+    def stMin(self):
+        return self.__steps[self.__step]
+
+    @property
+    def adaptive(self):
+        return self.__adaptive
+
+    ##
+    # @brief records a multi frame message received without error
+    def reportSuccess(self):
+        if not self.__adaptive:
+            return
+        with self.__lock:
+            if self.__step == self.__baseStep:
+                return
+            self.__successCount += 1
+            if self.__successCount >= self.__recoveryCount:
+                self.__step -= 1
+                self.__successCount = 0
+
+    ##
+    # @brief records a reception that failed because consecutive frames were lost
+    def reportFailure(self):
+        if not self.__adaptive:
+            return
+        with self.__lock:
+            self.__step = min(self.__step + 1, len(self.__steps) - 1)
+            self.__successCount = 0
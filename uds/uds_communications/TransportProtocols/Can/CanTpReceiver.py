@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+from uds.uds_communications.TransportProtocols.Can.CanTpFlowControl import (
+    FlowControlProfile,
+)
+from uds.uds_communications.TransportProtocols.Can.CanTpTypes import (
+    CONSECUTIVE_FRAME_SEQUENCE_DATA_START_INDEX,
+    CONSECUTIVE_FRAME_SEQUENCE_NUMBER_INDEX,
+    FIRST_FRAME_DATA_START_INDEX,
+    FIRST_FRAME_DL_INDEX_HIGH,
+    FIRST_FRAME_DL_INDEX_LOW,
+    FIRST_FRAME_ESCAPE_DATA_START_INDEX,
+    FIRST_FRAME_ESCAPE_DL_INDEX,
+    N_PCI_INDEX,
+    SINGLE_FRAME_DATA_START_INDEX,
+    SINGLE_FRAME_DL_INDEX,
+    SINGLE_FRAME_ESCAPE_DATA_START_INDEX,
+    SINGLE_FRAME_ESCAPE_DL_INDEX,
+    CanTpError,
+    CanTpMessageType,
+    CanTpState,
+    N_Result,
+)
+
+
+##
+# @class CanTpReceiver
+# @brief reassembles single, first and consecutive frames into complete messages
+#
+# Frames are fed one at a time, whichever thread they come from. The flow control answering
+# a first frame, and every completed block, is sent through the sendFlowControl(blockSize, stMin)
+# callable given at construction, with the values of the flow control profile.
+class CanTpReceiver(object):
+    def __init__(self, sendFlowControl, profile=None):
+
+        self.__sendFlowControl = sendFlowControl
+        self.__profile = profile if profile is not None else FlowControlProfile()
+        self.reset()
+
+    @property
+    def profile(self):
+        return self.__profile
+
+    @property
+    def state(self):
+        return self.__state
+
+    ##
+    # @brief drops any partially received message
+    def reset(self):
+        self.__state = CanTpState.IDLE
+        self.__payload = None
+        self.__payloadLength = None
+        self.__sequenceNumberExpected = 1
+        self.__blockSize = 0
+        self.__blockCount = 0
+
+    ##
+    # @brief sends a flow control and starts counting the next block
+    def __flowControl(self):
+        self.__blockSize = self.__profile.blockSize
+        self.__blockCount = 0
+        self.__sendFlowControl(self.__blockSize, self.__profile.stMin)
+
+    ##
+    # @brief processes one received frame
+    # @param rxPdu the frame data, addressing extension byte removed
+    # @return the complete payload as a bytearray once its last frame is received, otherwise None
+    def process(self, rxPdu):
+        N_PCI = (rxPdu[N_PCI_INDEX] & 0xF0) >> 4
+        if self.__state == CanTpState.IDLE:
+            if N_PCI == CanTpMessageType.SINGLE_FRAME:
+                payloadLength = rxPdu[SINGLE_FRAME_DL_INDEX] & 0x0F
+                dataStart = SINGLE_FRAME_DATA_START_INDEX
+                if payloadLength == 0:
+                    # SF_DL escape sequence used by CAN FD single frames
+                    payloadLength = rxPdu[SINGLE_FRAME_ESCAPE_DL_INDEX]
+                    dataStart = SINGLE_FRAME_ESCAPE_DATA_START_INDEX
+                return bytearray(rxPdu[dataStart : dataStart + payloadLength])
+            elif N_PCI == CanTpMessageType.FIRST_FRAME:
+                payloadLength = (
+                    (rxPdu[FIRST_FRAME_DL_INDEX_HIGH] & 0x0F) << 8
+                ) + rxPdu[FIRST_FRAME_DL_INDEX_LOW]
+                dataStart = FIRST_FRAME_DATA_START_INDEX
+                if payloadLength == 0:
+                    # FF_DL escape sequence, the length is carried on 32 bits
+                    payloadLength = int.from_bytes(
+                        bytes(
+                            rxPdu[
+                                FIRST_FRAME_ESCAPE_DL_INDEX:FIRST_FRAME_ESCAPE_DATA_START_INDEX
+                            ]
+                        ),
+                        "big",
+                    )
+                    dataStart = FIRST_FRAME_ESCAPE_DATA_START_INDEX
+                # the consecutive frames are as long as the first frame (RX_DL), the last one excepted
+                self.__payload = bytearray(rxPdu[dataStart:])
+                self.__payloadLength = payloadLength
+                self.__sequenceNumberExpected = 1
+                self.__state = CanTpState.SEND_FLOW_CONTROL
+                self.__flowControl()
+                self.__state = CanTpState.RECEIVING_CONSECUTIVE_FRAME
+            # anything else is not the start of a message and is ignored
+            return None
+        elif self.__state == CanTpState.RECEIVING_CONSECUTIVE_FRAME:
+            if N_PCI != CanTpMessageType.CONSECUTIVE_FRAME:
+                self.abort()
+                raise CanTpError(N_Result.N_UNEXP_PDU, "Unexpected PDU received")
+            sequenceNumber = rxPdu[CONSECUTIVE_FRAME_SEQUENCE_NUMBER_INDEX] & 0x0F
+            if sequenceNumber != self.__sequenceNumberExpected:
+                self.abort()
+                raise CanTpError(N_Result.N_WRONG_SN, "Consecutive frame sequence out of order")
+            self.__sequenceNumberExpected = (self.__sequenceNumberExpected + 1) % 16
+            self.__payload.extend(rxPdu[CONSECUTIVE_FRAME_SEQUENCE_DATA_START_INDEX:])
+            if len(self.__payload) >= self.__payloadLength:
+                payload = self.__payload[: self.__payloadLength]
+                self.reset()
+                self.__profile.reportSuccess()
+                return payload
+            self.__blockCount += 1
+            if self.__blockCount == self.__blockSize:
+                self.__flowControl()
+            return None
+
+    ##
+    # @brief drops a message whose consecutive frames were lost, e.g. on timeout
+    def abort(self):
+        self.reset()
+        self.__profile.reportFailure()
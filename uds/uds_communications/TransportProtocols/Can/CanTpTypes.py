@@ -23,6 +23,21 @@ class N_Result(Enum):
     N_UNEXP_PDU = 6
     N_WFT_OVFLW = 7
     N_ERROR = 8
+    N_BUFFER_OVFLW = 9
+
+
+##
+# @brief raised when a CAN TP transfer fails, nResult gives the N_Result of the failure
+class CanTpError(Exception):
+    def __init__(self, nResult, message):
+        super().__init__(message)
+        self.nResult = nResult
+
+
+##
+# @brief raised when a CAN TP timer (N_As, N_Ar, N_Bs, N_Cr) expires
+class CanTpTimeoutError(CanTpError):
+    pass
 
 
 class CanTpAddressingTypes(Enum):
@@ -65,12 +80,18 @@ class CanTpMTypes(Enum):
 
 
 CANTP_MAX_PAYLOAD_LENGTH = 4095  # hardcoded maximum based on the ISO 15765 standard
+CANTP_MAX_PAYLOAD_LENGTH_ESCAPE = 0xFFFFFFFF  # 32 bit FF_DL escape sequence, ISO 15765-2:2016
+CAN_FRAME_LENGTHS = (8, 12, 16, 20, 24, 32, 48, 64)  # valid TX_DL / CAN FD DLC lengths
 N_PCI_INDEX = 0
 SINGLE_FRAME_DL_INDEX = 0
 SINGLE_FRAME_DATA_START_INDEX = 1
 FIRST_FRAME_DL_INDEX_HIGH = 0
 FIRST_FRAME_DL_INDEX_LOW = 1
 FIRST_FRAME_DATA_START_INDEX = 2
+FIRST_FRAME_ESCAPE_DL_INDEX = 2
+FIRST_FRAME_ESCAPE_DATA_START_INDEX = 6
+SINGLE_FRAME_ESCAPE_DL_INDEX = 1
+SINGLE_FRAME_ESCAPE_DATA_START_INDEX = 2
 FC_BS_INDEX = 1
 FC_STMIN_INDEX = 2
 CONSECUTIVE_FRAME_SEQUENCE_NUMBER_INDEX = 0
@@ -0,0 +1,374 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+import asyncio
+import threading
+from functools import wraps
+from pathlib import Path
+from time import monotonic_ns
+from types import MethodType
+
+from uds.config import Config
+from uds.uds_communications.TransportProtocols.Can.AsyncCanTp import AsyncCanTp
+from uds.uds_config_tool.UdsConfigTool import UdsTool
+from uds.uds_config_tool.IHexFunctions import ihexFile as ihexFileParser
+from uds.uds_config_tool.ISOStandard.ISOStandard import IsoDataFormatIdentifier
+from uds.uds_communications.Utilities.DeadlineService import deadlineService
+from uds.uds_communications.Utilities.ResponseTiming import ResponseTiming
+from uds.uds_communications.Uds.RequestScheduler import (
+    AsyncRequestScheduler,
+    isResponseTo,
+    requestPriority,
+)
+
+
+##
+# @brief stands in for the AsyncUds object while the synchronous code of a service runs
+#
+# The code runs once, on a thread of the event loop's executor. send hands each request to
+# AsyncUds.send on the event loop and blocks until its response is back, so the requests are
+# awaited one after the other while the code building them and decoding the responses is not
+# repeated. The other services the code calls run on this object as well, everything else is
+# the AsyncUds object's.
+class _ServiceBridge(object):
+    def __init__(self, uds, services, loop):
+        self.__uds = uds
+        self.__services = services
+        self.__loop = loop
+        self.__lock = threading.Lock()
+        self.__request = None  # ... the request being awaited on the event loop
+        self.__cancelled = False
+
+    def send(self, msg, responseRequired=True, functionalReq=False, tpWaitTime=0.01, priority=None):
+        with self.__lock:
+            if self.__cancelled:
+                raise asyncio.CancelledError()
+            self.__request = asyncio.run_coroutine_threadsafe(
+                self.__uds.send(msg, responseRequired, functionalReq, tpWaitTime, priority),
+                self.__loop,
+            )
+        return self.__request.result()
+
+    ##
+    # @brief the tester present task belongs to the event loop, it is started there
+    def testerPresentThread(self):
+        self.__loop.call_soon_threadsafe(self.__uds.testerPresentThread)
+
+    ##
+    # @brief stops the service: the request being awaited is cancelled and no other is sent
+    def cancel(self):
+        with self.__lock:
+            self.__cancelled = True
+            if self.__request is not None:
+                self.__request.cancel()
+
+    def __getattr__(self, name):
+        service = self.__services.get(name)
+        if service is not None:
+            return MethodType(service, self)
+        return getattr(self.__uds, name)
+
+
+##
+# @brief collects what UdsTool binds to a Uds object
+class _ServiceBindings(object):
+    pass
+
+
+##
+# @class AsyncUds
+# @brief asyncio version of Uds: send and the ODX services are coroutines
+#
+# The services are the ones of the ODX containers, run on an AsyncCanTp. Requests on one
+# AsyncUds object are sent one at a time, requests to different ECUs run concurrently.
+class AsyncUds(object):
+
+    # helpers bound by the containers that never send, they stay plain methods
+    SYNC_SERVICES = (
+        "testerPresentSessionRecord",
+        "sessionSetLastSend",
+        "testerPresentDisable",
+        "sessionTimeSinceLastSend",
+    )
+
+    ##
+    # @brief a constructor
+    # @param [in] odx the ODX file describing the services of the ECU
+    # @param [in] ihexFile an ihex file to transfer
+    # @param [in] listPdu return responses as lists of int, defaults to Config.uds.list_pdu
+    # @param [in] shareOdx use the services of the Uds objects loading the same ODX file, defaults to Config.uds.odx_shared
+    # @param [in] correlateResponses discard responses to other services, defaults to Config.uds.correlate_responses
+    # @param kwargs the AsyncCanTp arguments (connector, dispatcher, reqId, resId, ...)
+    def __init__(self, odx=None, ihexFile=None, **kwargs):
+
+        transportProtocol = Config.uds.transport_protocol
+        if transportProtocol.lower() != "can":
+            raise ValueError(f"protocol {transportProtocol} is not supported!")
+        self.__responseTiming = ResponseTiming(
+            Config.uds.p2_can_client,
+            Config.uds.p2_can_server,
+            Config.uds.p2_overrides,
+            Config.uds.response_time_history,
+        )
+        self.__listPdu = kwargs.pop("listPdu", Config.uds.list_pdu)
+        self.__shareOdx = kwargs.pop("shareOdx", Config.uds.odx_shared)
+        self.__correlateResponses = kwargs.pop(
+            "correlateResponses", Config.uds.correlate_responses
+        )
+
+        self.tp = AsyncCanTp(**kwargs)
+
+        self.__requestScheduler = AsyncRequestScheduler()
+        self.__testerPresentTask = None
+
+        self.__services = {}
+        self.__bridgedServices = {}
+
+        self.__ihexFile = ihexFileParser(ihexFile) if ihexFile is not None else None
+        self.__udsTool = UdsTool()
+        self.load_odx(odx)
+
+    def load_odx(self, odx_file: Path) -> None:
+        """Load the given odx file and create the associated UDS
+        diagnostic services as coroutines:
+
+        :param odx_file: odx file full path, or a module written by the
+            ODX compiler (python -m uds.uds_config_tool.OdxCompiler)
+        """
+        if odx_file is None:
+            return
+        if self.__shareOdx:
+            UdsTool.shared_service_containers(odx_file).share_services(self.__udsTool)
+        else:
+            self.__udsTool.create_service_containers(odx_file)
+        bindings = _ServiceBindings()
+        self.__udsTool.bind_containers(bindings)
+
+        services = {}
+        for name, value in vars(bindings).items():
+            if isinstance(value, MethodType):
+                services[name] = value.__func__
+            else:
+                setattr(self, name, value)  # ... the containers themselves
+        self.__services = services
+        # tester present runs as a task of the event loop (see testerPresentThread), not in the container's thread
+        self.__bridgedServices = {
+            name: service
+            for name, service in services.items()
+            if name != "testerPresentThread"
+        }
+
+        for name, service in services.items():
+            if name in self.SYNC_SERVICES:
+                setattr(self, name, MethodType(service, self))
+            elif not hasattr(type(self), name):
+                setattr(self, name, self.__asyncService(service))
+
+    ##
+    # @brief turns the synchronous code of a service into a coroutine
+    #
+    # The code runs once in the event loop's default executor, each request it sends being
+    # awaited on the event loop (see _ServiceBridge). The executor bounds how many services
+    # run at the same time; loop.set_default_executor gives more.
+    def __asyncService(self, service):
+        @wraps(service)
+        async def asyncService(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            bridge = _ServiceBridge(self, self.__bridgedServices, loop)
+            try:
+                return await loop.run_in_executor(
+                    None, lambda: service(bridge, *args, **kwargs)
+                )
+            except asyncio.CancelledError:
+                bridge.cancel()
+                raise
+
+        return asyncService
+
+    ##
+    # @brief the P2/P2* timeouts per service and the response times measured (ResponseTiming)
+    @property
+    def responseTiming(self):
+        return self.__responseTiming
+
+    @property
+    def udsTool(self):
+        return self.__udsTool
+
+    @property
+    def ihexFile(self):
+        return self.__ihexFile
+
+    @ihexFile.setter
+    def ihexFile(self, value):
+        if value is not None:
+            self.__ihexFile = ihexFileParser(value)
+
+    ##
+    # @brief sends a request and waits for its response
+    # @param [in] msg the request as bytes, bytearray, memoryview or list of int
+    # @param [in] priority RequestPriority of the request, see Uds.send
+    # @return the response as a bytearray, or a list of int when list_pdu is configured
+    async def send(self, msg, responseRequired=True, functionalReq=False, tpWaitTime=0.01, priority=None):
+        response = None
+        if priority is None:
+            priority = requestPriority(msg[0])
+
+        # the channel is held until the response is received, so responses cannot be mixed up
+        async with self.__requestScheduler.request(priority):
+            await self.tp.send(msg, functionalReq)
+
+            if functionalReq is True:
+                responseRequired = False
+
+            if responseRequired:
+                response = await self.__recvResponse(msg[0])
+                if self.__listPdu:
+                    response = list(response)
+
+            try:
+                self.sessionSetLastSend()
+            except:
+                pass  # ... if the service isn't present, just ignore
+
+        return response
+
+    ##
+    # @brief waits for the response to a request, P2 for the first one then P2* after each response pending
+    async def __recvResponse(self, sid):
+        timeout = self.__responseTiming.p2(sid)
+        pendingCount = 0
+        startTime = monotonic_ns()
+        deadline = deadlineService.schedule(timeout)
+        while True:
+            try:
+                response = await self.tp.recv(timeout)
+            except Exception:
+                self.__responseTiming.record(
+                    sid, (monotonic_ns() - startTime) / 1e9, pendingCount, True
+                )
+                raise
+            if self.__correlateResponses and not isResponseTo(sid, response):
+                timeout = deadline.remainingTime()
+                continue
+            if not ((response[0] == 0x7F) and (response[2] == 0x78)):
+                break
+            pendingCount += 1
+            timeout = self.__responseTiming.p2Star(sid)
+            deadline.restart(timeout)
+        self.__responseTiming.record(sid, (monotonic_ns() - startTime) / 1e9, pendingCount)
+        return response
+
+    ##
+    # @brief True while a request is being exchanged or waiting for the channel
+    def isTransmitting(self):
+        return self.__requestScheduler.isBusy()
+
+    ##
+    # @brief the AsyncRequestScheduler ordering the requests on this connection
+    @property
+    def requestScheduler(self):
+        return self.__requestScheduler
+
+    ##
+    # @brief sends the chunks of a transfer block, or of an ihex file, one after the other
+    async def transferData(
+        self,
+        blockSequenceCounter=None,
+        transferRequestParameterRecord=None,
+        transferBlock=None,
+        transferBlocks=None,
+        **kwargs
+    ):
+        if transferBlock is not None or transferBlocks is not None:
+            blocks = transferBlock if transferBlock is not None else transferBlocks
+            retval = None
+            for i, chunk in enumerate(blocks.transmitChunks()):
+                retval = await self.transferData(i + 1, chunk)
+            return retval
+        return await self.__asyncService(self.__services["transferData"])(
+            blockSequenceCounter, transferRequestParameterRecord, **kwargs
+        )
+
+    ##
+    # @brief Currently only called from transferFile to transfer ihex files
+    async def transferIHexFile(self, transmitChunkSize=None, compressionMethod=None):
+        if transmitChunkSize is not None:
+            self.__ihexFile.transmitChunksize = transmitChunkSize
+        if compressionMethod is None:
+            compressionMethod = IsoDataFormatIdentifier.noCompressionMethod
+        await self.requestDownload(
+            [compressionMethod],
+            self.__ihexFile.transmitAddress,
+            self.__ihexFile.transmitLength,
+        )
+        await self.transferData(transferBlocks=self.__ihexFile)
+        return await self.transferExit()
+
+    ##
+    # @brief This will eventually support more than one file type, but for now is limited to ihex only
+    async def transferFile(
+        self, fileName=None, transmitChunkSize=None, compressionMethod=None
+    ):
+        if fileName is None and self.__ihexFile is None:
+            raise FileNotFoundError("file to transfer has not been specified")
+
+        # Currently only ihex is recognised and supported
+        if fileName[-4:] == ".hex" or fileName[-5:] == ".ihex":
+            self.__ihexFile = ihexFileParser(fileName)
+            return await self.transferIHexFile(transmitChunkSize, compressionMethod)
+        else:
+            raise FileNotFoundError(
+                "file to transfer has not been recognised as a supported type ['.hex','.ihex']"
+            )
+
+    ##
+    # @brief starts sending tester present for the diagnostic sessions requiring it
+    #
+    # Called by diagnosticSessionControl; a task of the running event loop sends them, instead
+    # of the thread used by Uds. It sleeps until the session's deadline on the deadline service,
+    # moved on by every send, has passed.
+    def testerPresentThread(self):
+        if self.__testerPresentTask is None or self.__testerPresentTask.done():
+            self.__testerPresentTask = asyncio.get_running_loop().create_task(
+                self.__testerPresentWorker()
+            )
+
+    async def __testerPresentWorker(self):
+        loop = asyncio.get_running_loop()
+        due = asyncio.Event()
+        container = self.diagnosticSessionControlContainer
+        deadline = container.testerPresentDeadline = deadlineService.schedule(
+            callback=lambda deadline: loop.call_soon_threadsafe(due.set)
+        )
+        try:
+            while True:
+                due.clear()
+                tpSessionRecord = self.testerPresentSessionRecord()
+                if tpSessionRecord["reqd"]:
+                    remaining = tpSessionRecord["timeout"] - self.sessionTimeSinceLastSend()
+                    if remaining <= 0:
+                        # ... queued ahead of the requests waiting for the channel, its send moves the deadline on
+                        await self.testerPresent()
+                        continue
+                    deadline.restart(remaining)
+                await due.wait()
+        finally:
+            deadline.stop()
+            container.testerPresentDeadline = None
+
+    ##
+    # @brief stops the tester present task and detaches the transport from its dispatcher
+    def close(self):
+        if self.__testerPresentTask is not None:
+            self.__testerPresentTask.cancel()
+            self.__testerPresentTask = None
+        self.tp.close()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import asyncio
+import heapq
+import itertools
+import threading
+from contextlib import asynccontextmanager, contextmanager
+from enum import IntEnum
+
+from uds.uds_config_tool.ISOStandard.ISOStandard import IsoServices
+
+
+##
+# @brief order in which the requests queued on a channel are sent, lowest first
+class RequestPriority(IntEnum):
+    KEEP_ALIVE = 0
+    REQUEST = 1
+    BULK = 2
+
+
+##
+# @brief default priority of a request, from its service id
+def requestPriority(sid):
+    if sid == IsoServices.TesterPresent:
+        return RequestPriority.KEEP_ALIVE
+    if sid == IsoServices.TransferData:
+        return RequestPriority.BULK
+    return RequestPriority.REQUEST
+
+
+##
+# @brief True if a response answers the request with the given service id, positively or negatively
+def isResponseTo(sid, response):
+    if len(response) == 0:
+        return False
+    if response[0] == 0x7F:
+        return len(response) > 1 and response[1] == sid
+    return response[0] == sid + 0x40
+
+
+##
+# @class RequestScheduler
+# @brief gives a channel to one request/response exchange at a time, by priority
+#
+# The callers of a channel queue for it with the priority of their request; the channel goes to
+# the highest priority (lowest value) waiting, in arrival order among equal priorities, once the
+# exchange holding it is over. Keep-alives are so sent between two requests of a long transfer
+# rather than skipped or mixed into it, and callers sleep until their turn instead of polling.
+#
+# e.g.
+#   with scheduler.request(RequestPriority.BULK):
+#       tp.send(request)
+#       response = tp.recv(p2)
+class RequestScheduler(object):
+    def __init__(self):
+
+        self.__condition = threading.Condition()
+        self.__queue = []  # ... heap of (priority, arrival, ticket)
+        self.__arrival = itertools.count()
+        self.__active = None  # ... ticket of the exchange holding the channel
+        self.__owner = None  # ... thread holding the channel
+        self.__depth = 0  # ... requests nested in the exchange holding the channel
+
+    ##
+    # @brief waits for the channel
+    # The thread holding the channel gets it again at once, e.g. to send within the with block of
+    # request, and must release it as many times.
+    # @param [in] timeout seconds to wait for the channel, None to wait until it is given
+    # @return the ticket to pass to release, None if the timeout passed first
+    def acquire(self, priority=RequestPriority.REQUEST, timeout=None):
+        with self.__condition:
+            if self.__active is not None and self.__owner == threading.get_ident():
+                self.__depth += 1
+                return self.__active
+            ticket = object()
+            entry = (priority, next(self.__arrival), ticket)
+            heapq.heappush(self.__queue, entry)
+            if not self.__condition.wait_for(
+                lambda: self.__active is None and self.__queue[0] is entry, timeout
+            ):
+                self.__queue.remove(entry)
+                heapq.heapify(self.__queue)
+                self.__condition.notify_all()  # ... the next one may now be at the head of the queue
+                return None
+            heapq.heappop(self.__queue)
+            self.__active = ticket
+            self.__owner = threading.get_ident()
+        return ticket
+
+    ##
+    # @brief gives the channel to the next request queued
+    def release(self, ticket):
+        with self.__condition:
+            if self.__active is not ticket:
+                raise Exception("Channel released by a request not holding it")
+            if self.__depth:
+                self.__depth -= 1
+                return
+            self.__active = None
+            self.__owner = None
+            self.__condition.notify_all()
+
+    ##
+    # @brief holds the channel for the exchange run in the with block
+    @contextmanager
+    def request(self, priority=RequestPriority.REQUEST):
+        ticket = self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(ticket)
+
+    ##
+    # @brief True while an exchange holds the channel or requests are queued for it
+    def isBusy(self):
+        return self.__active is not None or len(self.__queue) != 0
+
+    ##
+    # @brief number of requests waiting for the channel
+    @property
+    def queued(self):
+        return len(self.__queue)
+
+
+##
+# @class SchedulerLock
+# @brief the threading.Lock interface over a RequestScheduler, for code written against Uds.sendLock
+#
+# Holding it holds the channel, as an ordinary request would, so no request or tester present is
+# exchanged meanwhile.
+class SchedulerLock(object):
+    def __init__(self, scheduler):
+
+        self.__scheduler = scheduler
+        self.__tickets = []  # ... of the thread holding the channel through this lock
+
+    def acquire(self, blocking=True, timeout=-1):
+        if not blocking:
+            timeout = 0
+        ticket = self.__scheduler.acquire(
+            RequestPriority.REQUEST, None if timeout < 0 else timeout
+        )
+        if ticket is None:
+            return False
+        self.__tickets.append(ticket)
+        return True
+
+    def release(self):
+        if not self.__tickets:
+            raise RuntimeError("release unlocked lock")
+        self.__scheduler.release(self.__tickets.pop())
+
+    def locked(self):
+        return self.__scheduler.isBusy()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+##
+# @class AsyncRequestScheduler
+# @brief asyncio version of RequestScheduler, the tasks of one event loop queue for the channel
+class AsyncRequestScheduler(object):
+    def __init__(self):
+
+        self.__queue = []  # ... heap of (priority, arrival, future)
+        self.__arrival = itertools.count()
+        self.__active = False
+
+    ##
+    # @brief holds the channel for the exchange run in the async with block
+    @asynccontextmanager
+    async def request(self, priority=RequestPriority.REQUEST):
+        if self.__active or self.__queue:
+            entry = (priority, next(self.__arrival), asyncio.get_running_loop().create_future())
+            heapq.heappush(self.__queue, entry)
+            try:
+                await entry[2]
+            except asyncio.CancelledError:
+                if entry[2].done() and not entry[2].cancelled():
+                    self.__next()  # ... given the channel as it was cancelled, pass it on
+                else:
+                    self.__queue.remove(entry)
+                    heapq.heapify(self.__queue)
+                raise
+        self.__active = True
+        try:
+            yield
+        finally:
+            self.__next()
+
+    ##
+    # @brief gives the channel to the next request queued
+    def __next(self):
+        self.__active = False
+        while self.__queue:
+            _, _, future = heapq.heappop(self.__queue)
+            if not future.done():
+                self.__active = True
+                future.set_result(None)
+                return
+
+    def isBusy(self):
+        return self.__active or len(self.__queue) != 0
+
+    @property
+    def queued(self):
+        return len(self.__queue)
@@ -9,8 +9,9 @@ __maintainer__ = "Richard Clubb"
 __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
-import threading
+import warnings
 from pathlib import Path
+from time import monotonic_ns
 from typing import Callable
 
 from uds.config import Config
@@ -18,6 +19,14 @@ from uds.factories import TpFactory
 from uds.uds_config_tool.UdsConfigTool import UdsTool
 from uds.uds_config_tool.IHexFunctions import ihexFile as ihexFileParser
 from uds.uds_config_tool.ISOStandard.ISOStandard import IsoDataFormatIdentifier
+from uds.uds_communications.Utilities.DeadlineService import deadlineService
+from uds.uds_communications.Utilities.ResponseTiming import ResponseTiming
+from uds.uds_communications.Uds.RequestScheduler import (
+    RequestScheduler,
+    SchedulerLock,
+    isResponseTo,
+    requestPriority,
+)
 
 ##
 # @brief a description is needed
@@ -27,34 +36,52 @@ class Uds(object):
     # @brief a constructor
     # @param [in] reqId The request ID used by the UDS connection, defaults to None if not used
     # @param [in] resId The response Id used by the UDS connection, defaults to None if not used
+    # @param [in] listPdu return responses as lists of int, defaults to Config.uds.list_pdu
+    # @param [in] shareOdx use the services of the Uds objects loading the same ODX file, defaults to Config.uds.odx_shared
+    # @param [in] correlateResponses discard responses to other services, defaults to Config.uds.correlate_responses
     def __init__(self, odx = None, ihexFile=None, **kwargs):
 
         self.__transportProtocol = Config.uds.transport_protocol
         self.__P2_CAN_Client = Config.uds.p2_can_client
         self.__P2_CAN_Server = Config.uds.p2_can_server
+        self.__listPdu = kwargs.pop("listPdu", Config.uds.list_pdu)
+        self.__shareOdx = kwargs.pop("shareOdx", Config.uds.odx_shared)
+        self.__correlateResponses = kwargs.pop(
+            "correlateResponses", Config.uds.correlate_responses
+        )
+        self.__responseTiming = ResponseTiming(
+            self.__P2_CAN_Client,
+            self.__P2_CAN_Server,
+            Config.uds.p2_overrides,
+            Config.uds.response_time_history,
+        )
 
         self.tp = TpFactory.select_transport_protocol(self.__transportProtocol, **kwargs)
 
-        # used as a semaphore for the tester present
-        self.__transmissionActive_flag = False
-
-        # The above flag should prevent testerPresent operation, but in case of race conditions, this lock prevents actual overlapo in the sending
-        self.sendLock = threading.Lock()
+        # one request/response exchange at a time, tester present and user requests queue by priority
+        self.__requestScheduler = RequestScheduler()
+        self.__sendLock = SchedulerLock(self.__requestScheduler)
 
         # Process any ihex file that has been associated with the ecu at initialisation
         self.__ihexFile = ihexFileParser(ihexFile) if ihexFile is not None else None
+        # the containers of the services of this ECU
+        self.__udsTool = UdsTool()
         self.load_odx(odx)
 
     def load_odx(self, odx_file: Path)-> None:
         """Lod the given odx file and create the associated UDS 
         diagnostic services:
         
-        :param odx_file: idx file full path
+        :param odx_file: idx file full path, or a module written by the
+            ODX compiler (python -m uds.uds_config_tool.OdxCompiler)
         """
         if odx_file is None:
             return
-        UdsTool.create_service_containers(odx_file)
-        UdsTool.bind_containers(self)
+        if self.__shareOdx:
+            UdsTool.shared_service_containers(odx_file).share_services(self.__udsTool)
+        else:
+            self.__udsTool.create_service_containers(odx_file)
+        self.__udsTool.bind_containers(self)
 
     def overwrite_transmit_method(self, func : Callable):
         """override transmit method from the asscociated __connection
@@ -72,6 +99,16 @@ class Uds(object):
         """
         self.tp.getNextBufferedMessage = func
 
+    ##
+    # @brief the P2/P2* timeouts per service and the response times measured (ResponseTiming)
+    @property
+    def responseTiming(self):
+        return self.__responseTiming
+
+    @property
+    def udsTool(self):
+        return self.__udsTool
+
     @property
     def ihexFile(self):
         return self.__ihexFile
@@ -114,44 +151,134 @@ class Uds(object):
             )
 
     ##
-    # @brief
-    def send(self, msg, responseRequired=True, functionalReq=False, tpWaitTime=0.01):
-        # sets a current transmission in progress - tester present (if running) will not send if this flag is set to true
-        self.__transmissionActive_flag = True
-        # print(("__transmissionActive_flag set:",self.__transmissionActive_flag))
-
+    # @brief sends a request and waits for its response
+    # @param [in] msg the request as bytes, bytearray, memoryview or list of int
+    # @param [in] priority RequestPriority of the request on the channel, by default KEEP_ALIVE for
+    #             tester present, BULK for transfer data and REQUEST for the other services
+    # @return the response as a bytearray, or a list of int when list_pdu is configured
+    #
+    # The channel is held from the request to its final response, requests from other threads
+    # (the tester present worker included) wait for their turn in the request scheduler.
+    def send(self, msg, responseRequired=True, functionalReq=False, tpWaitTime=0.01, priority=None):
         response = None
+        if priority is None:
+            priority = requestPriority(msg[0])
+
+        with self.__requestScheduler.request(priority):
+            self.tp.send(msg, functionalReq, tpWaitTime)
 
-        # We're moving to threaded operation, so putting a lock around the send operation.
-        self.sendLock.acquire()
-        try:
-            a = self.tp.send(msg, functionalReq, tpWaitTime)
-        finally:
-            self.sendLock.release()
-
-        if functionalReq is True:
-            responseRequired = False
-
-        # Note: in automated mode (unlikely to be used any other way), there is no response from tester present, so threading is not an issue here.
-        if responseRequired:
-            while True:
-                response = self.tp.recv(self.__P2_CAN_Client)
-                if not ((response[0] == 0x7F) and (response[2] == 0x78)):
-                    break
-
-        # If the diagnostic session control service is supported, record the sending time for possible use by the tester present functionality (again, if present) ...
-        try:
-            self.sessionSetLastSend()
-        except:
-            pass  # ... if the service isn't present, just ignore
-
-        # Lets go of the hold on transmissions - allows test present to resume operation (if it's running)
-        self.__transmissionActive_flag = False
-        # print(("__transmissionActive_flag cleared:",self.__transmissionActive_flag))
+            if functionalReq is True:
+                responseRequired = False
+                self.tp.endFunctional()  # ... no responses are collected, see sendFunctional
+
+            if responseRequired:
+                response = self.__recvResponse(msg[0])
+                if self.__listPdu:
+                    response = list(response)
+
+            # If the diagnostic session control service is supported, record the sending time for possible use by the tester present functionality (again, if present) ...
+            try:
+                self.sessionSetLastSend()
+            except:
+                pass  # ... if the service isn't present, just ignore
 
         return response
 
     ##
-    # @brief
+    # @brief waits for the response to a request, P2 for the first one then P2* after each response pending
+    # @param [in] sid service id of the request, selecting its P2/P2* overrides
+    def __recvResponse(self, sid):
+        timeout = self.__responseTiming.p2(sid)
+        pendingCount = 0
+        startTime = monotonic_ns()
+        deadline = deadlineService.schedule(timeout)
+        while True:
+            try:
+                response = self.tp.recv(timeout)
+            except Exception:
+                self.__responseTiming.record(
+                    sid, (monotonic_ns() - startTime) / 1e9, pendingCount, True
+                )
+                raise
+            if self.__correlateResponses and not isResponseTo(sid, response):
+                # ... e.g. the late answer to an earlier request, the wait goes on until the same deadline
+                timeout = deadline.remainingTime()
+                continue
+            if not ((response[0] == 0x7F) and (response[2] == 0x78)):
+                break
+            pendingCount += 1
+            timeout = self.__responseTiming.p2Star(sid)
+            deadline.restart(timeout)
+        self.__responseTiming.record(sid, (monotonic_ns() - startTime) / 1e9, pendingCount)
+        return response
+
+    ##
+    # @brief sends a functional (broadcast) request and collects the responses of all the ECUs
+    # @param [in] msg the request, it has to fit in a single frame
+    # @param [in] responseRequired False to only send the request, e.g. a suppressed tester present
+    # @return dict of the responses keyed by response id, empty if no response is required
+    #
+    # Responses are collected for P2, or until every ECU has answered; as long as an ECU answers
+    # response pending (0x78) the collection goes on for P2*, the final response then replaces
+    # the pending one. An ECU still pending when P2* passes gave no response and is left out.
+    # The responding ECUs are given by the func_responders isotp config.
+    def sendFunctional(self, msg, responseRequired=True, tpWaitTime=0.01):
+        responses = {}
+        with self.__requestScheduler.request(requestPriority(msg[0])):
+            self.tp.send(msg, True, tpWaitTime)
+            try:
+                timeout = self.__responseTiming.p2(msg[0])
+                waiting = set(self.tp.functionalResponders)
+                while responseRequired:
+                    received = self.tp.recvFunctional(timeout, waiting)
+                    responses.update(received)
+                    # ... after P2 only the ECUs answering response pending are waited for
+                    waiting = {
+                        resId
+                        for resId, response in responses.items()
+                        if (response[0] == 0x7F) and (response[2] == 0x78)
+                    }
+                    if not received or not waiting:
+                        break
+                    timeout = self.__responseTiming.p2Star(msg[0])
+                # a pending ECU silent for P2* has no final response
+                for resId in waiting:
+                    responses.pop(resId, None)
+            finally:
+                # ... the responders' frames go back to their physical channels
+                self.tp.endFunctional()
+            if self.__listPdu:
+                responses = {
+                    resId: list(response) for resId, response in responses.items()
+                }
+
+            try:
+                self.sessionSetLastSend()
+            except:
+                pass  # ... if the service isn't present, just ignore
+
+        return responses
+
+    ##
+    # @brief True while a request is being exchanged or waiting for the channel
     def isTransmitting(self):
-        return self.__transmissionActive_flag
+        return self.__requestScheduler.isBusy()
+
+    ##
+    # @brief the RequestScheduler ordering the requests on this connection
+    @property
+    def requestScheduler(self):
+        return self.__requestScheduler
+
+    ##
+    # @brief deprecated, use requestScheduler.request()
+    # A lock holding the channel through the request scheduler, in place of the lock that used to
+    # cover the transmission only.
+    @property
+    def sendLock(self):
+        warnings.warn(
+            "Uds.sendLock is deprecated, use Uds.requestScheduler.request()",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        return self.__sendLock
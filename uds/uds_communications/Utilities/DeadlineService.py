@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import heapq
+import itertools
+import logging
+import threading
+from time import monotonic_ns
+
+log = logging.getLogger(__name__)
+
+
+##
+# @class Deadline
+# @brief a point in time on the monotonic clock, given by DeadlineService.schedule
+#
+# Checking a deadline costs one clock read; restarting it only moves its time, so one handle
+# serves a whole transfer. A stopped deadline never expires.
+class Deadline(object):
+    __slots__ = ("when", "callback", "scheduled", "service")
+
+    def __init__(self, service, callback=None):
+        self.service = service
+        self.callback = callback
+        self.when = None  # ... monotonic_ns, None while stopped
+        self.scheduled = None  # ... time of its entry in the service's heap, if any
+
+    ##
+    # @brief starts the deadline again, timeout seconds from now
+    def restart(self, timeout):
+        self.when = monotonic_ns() + int(timeout * 1e9)
+        if self.callback is not None:
+            self.service.arm(self)
+
+    ##
+    # @brief the deadline does not expire until restarted, its callback is not called
+    def stop(self):
+        self.when = None
+
+    def isRunning(self):
+        return self.when is not None
+
+    def isExpired(self):
+        return self.when is not None and monotonic_ns() >= self.when
+
+    ##
+    # @brief time left before the deadline, in seconds
+    # @return 0 once it has passed, None while stopped
+    def remainingTime(self):
+        if self.when is None:
+            return None
+        return max(0, self.when - monotonic_ns()) / 1e9
+
+
+##
+# @class DeadlineService
+# @brief schedules deadlines on the monotonic clock and calls their callbacks when they pass
+#
+# Deadlines without a callback are only checked by their owner and cost the service nothing.
+# Those with a callback sit in a heap served by one thread, started with the first of them,
+# which sleeps until the earliest deadline. Callbacks run on that thread and must not block.
+# A deadline restarted later than its heap entry keeps the entry and is moved when the entry
+# comes up, so restarting a deadline on every message is cheap.
+#
+# e.g.
+#   deadline = deadlineService.schedule(0.05)
+#   while not deadline.isExpired(): ...
+#   keepAlive = deadlineService.schedule(2, lambda deadline: queue.put(target))
+class DeadlineService(object):
+    def __init__(self):
+
+        self.__condition = threading.Condition()
+        self.__heap = []  # ... (when, order, deadline)
+        self.__order = itertools.count()
+        self.__thread = None
+
+    ##
+    # @brief creates a deadline
+    # @param [in] timeout seconds from now, None for a stopped deadline
+    # @param [in] callback called with the deadline once it passes, from the service thread
+    def schedule(self, timeout=None, callback=None):
+        deadline = Deadline(self, callback)
+        if timeout is not None:
+            deadline.restart(timeout)
+        return deadline
+
+    ##
+    # @brief puts a deadline with a callback in the heap, unless an earlier entry already covers it
+    def arm(self, deadline):
+        with self.__condition:
+            if deadline.scheduled is not None and deadline.scheduled <= deadline.when:
+                return  # ... moved on when its entry comes up
+            deadline.scheduled = deadline.when
+            heapq.heappush(self.__heap, (deadline.when, next(self.__order), deadline))
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    name="deadlineService", target=self.__worker, daemon=True
+                )
+                self.__thread.start()
+            elif self.__heap[0][2] is deadline:
+                self.__condition.notify()
+
+    def __worker(self):
+        while True:
+            with self.__condition:
+                now = monotonic_ns()
+                while not self.__heap or self.__heap[0][0] > now:
+                    timeout = (self.__heap[0][0] - now) / 1e9 if self.__heap else None
+                    self.__condition.wait(timeout)
+                    now = monotonic_ns()
+                when, _, deadline = heapq.heappop(self.__heap)
+                if deadline.scheduled != when:
+                    continue  # ... superseded by an earlier entry
+                deadline.scheduled = None
+                if deadline.when is None:
+                    continue  # ... stopped
+                if deadline.when > now:
+                    deadline.scheduled = deadline.when  # ... restarted since it was armed
+                    heapq.heappush(self.__heap, (deadline.when, next(self.__order), deadline))
+                    continue
+            try:
+                deadline.callback(deadline)
+            except Exception:
+                log.exception("Deadline callback failed")
+
+
+# the service shared by the transport protocols, the response waits and tester present
+deadlineService = DeadlineService()
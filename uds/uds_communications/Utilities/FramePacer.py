@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+from time import sleep
+
+from uds.uds_communications.Utilities.DeadlineService import deadlineService
+
+
+##
+# @class FramePacer
+# @brief enforces a minimum separation time between consecutive transmissions
+#
+# The separation time runs on a deadline of the deadline service. The OS sleep is only used
+# for the coarse part of the wait, the last spinTime seconds are spent yielding in a loop on
+# the deadline so that sub-millisecond separation times (STmin 0xF1 - 0xF9) are honoured;
+# the deadline has no callback, as the service thread could not wake the sender that finely.
+# An interval of 0 sends in bursts without touching the clock.
+class FramePacer(object):
+    def __init__(self, interval=0, spinTime=0.002):
+
+        self.__interval = interval
+        self.__spinTime = spinTime
+        self.__deadline = deadlineService.schedule()  # ... stopped, the first transmission is immediate
+
+    @property
+    def interval(self):
+        return self.__interval
+
+    ##
+    # @brief sets a new separation time, allowing the next transmission immediately
+    def reset(self, interval):
+        self.__interval = interval
+        self.__deadline.stop()
+
+    ##
+    # @brief blocks until the next transmission is allowed, then arms the following deadline
+    def wait(self):
+        if self.__interval == 0:
+            return
+
+        if self.__deadline.isRunning():
+            remaining = self.__deadline.remainingTime()
+            if remaining > self.__spinTime:
+                sleep(remaining - self.__spinTime)
+            while not self.__deadline.isExpired():
+                sleep(0)
+
+        self.__deadline.restart(self.__interval)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import threading
+from collections import deque
+
+
+##
+# @class MessageBuffer
+# @brief bounded, thread safe FIFO used between a bus listener thread and a consumer
+#
+# Once the capacity is reached the oldest message is discarded for every new one, so a
+# flooded bus costs a constant amount of memory and every get stays O(1).
+class MessageBuffer(object):
+    def __init__(self, capacity=1024):
+
+        if capacity <= 0:
+            raise ValueError("Message buffer capacity must be positive")
+
+        self.__messages = deque(maxlen=capacity)
+        self.__condition = threading.Condition()
+        self.__overflowCount = 0
+        self.__dropCount = 0
+
+    @property
+    def capacity(self):
+        return self.__messages.maxlen
+
+    ##
+    # @brief number of messages discarded because the buffer was full
+    @property
+    def overflowCount(self):
+        return self.__overflowCount
+
+    ##
+    # @brief number of unread messages discarded by clear
+    @property
+    def dropCount(self):
+        return self.__dropCount
+
+    def __len__(self):
+        return len(self.__messages)
+
+    ##
+    # @brief adds a message and wakes up any waiting consumer
+    def put(self, message):
+        with self.__condition:
+            if len(self.__messages) == self.__messages.maxlen:
+                self.__overflowCount += 1
+            self.__messages.append(message)
+            self.__condition.notify()
+
+    ##
+    # @brief retrieves the oldest message
+    # @return the message, or None if the buffer is empty
+    def get(self):
+        with self.__condition:
+            if self.__messages:
+                return self.__messages.popleft()
+            return None
+
+    ##
+    # @brief blocks until a message is available or the timeout elapses
+    # @return True if a message is available
+    def wait(self, timeout=None):
+        with self.__condition:
+            if not self.__messages:
+                self.__condition.wait(timeout)
+            return len(self.__messages) != 0
+
+    ##
+    # @brief discards all unread messages
+    def clear(self):
+        with self.__condition:
+            self.__dropCount += len(self.__messages)
+            self.__messages.clear()
+
+    ##
+    # @brief resets the overflow and drop counters
+    def resetCounters(self):
+        with self.__condition:
+            self.__overflowCount = 0
+            self.__dropCount = 0
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+from collections import deque
+
+
+##
+# @class ResponseTiming
+# @brief P2 / P2* response timeouts of a UDS connection and the response times measured
+#
+# The first response to a request is waited for P2, after each response pending (0x7F xx 0x78)
+# the next one is waited for P2*, as in ISO 14229-2. Both can be overridden per service id, so
+# the slow services (erase routines, downloads) get long waits while P2 stays tight for the rest.
+#
+# e.g.
+#   timing = ResponseTiming(0.05, 5, overrides={0x31: {"p2_star": 30}})
+#   timing.p2Star(0x31)  # ... 30
+class ResponseTiming(object):
+    def __init__(self, p2, p2Star, overrides=None, historySize=32):
+
+        self.__p2 = p2
+        self.__p2Star = p2Star
+        self.__overrides = {}  # ... service id to (p2, p2*), None where not overridden
+        for sid, override in (overrides or {}).items():
+            self.override(sid, override.get("p2"), override.get("p2_star"))
+        self.__historySize = historySize
+        self.__history = {}  # ... service id to the latest (response time, pending count, timed out)
+
+    ##
+    # @brief sets the timeouts of a service, None keeps the one of the connection
+    def override(self, sid, p2=None, p2Star=None):
+        if p2 is None and p2Star is None:
+            self.__overrides.pop(sid, None)
+        else:
+            self.__overrides[sid] = (p2, p2Star)
+
+    ##
+    # @brief time to wait for the first response to a request of the service, in seconds
+    def p2(self, sid):
+        override = self.__overrides.get(sid)
+        if override is None or override[0] is None:
+            return self.__p2
+        return override[0]
+
+    ##
+    # @brief time to wait for the response following a response pending, in seconds
+    def p2Star(self, sid):
+        override = self.__overrides.get(sid)
+        if override is None or override[1] is None:
+            return self.__p2Star
+        return override[1]
+
+    ##
+    # @brief records the time from a request to its final response
+    # @param [in] pendingCount number of response pending received in between
+    # @param [in] timedOut True when no final response came
+    def record(self, sid, responseTime, pendingCount=0, timedOut=False):
+        history = self.__history.get(sid)
+        if history is None:
+            history = self.__history.setdefault(sid, deque(maxlen=self.__historySize))
+        history.append((responseTime, pendingCount, timedOut))
+
+    ##
+    # @brief the latest response times of a service, oldest first
+    # @return list of (response time, pending count, timed out)
+    def history(self, sid):
+        return list(self.__history.get(sid, ()))
+
+    ##
+    # @brief summary of the latest response times of a service
+    # @return dict of count, timeouts, pending (responses pending received), min, max and mean
+    # response time of the requests answered, None when there are none
+    def statistics(self, sid):
+        history = self.history(sid)
+        answered = [responseTime for responseTime, _, timedOut in history if not timedOut]
+        return {
+            "count": len(history),
+            "timeouts": len(history) - len(answered),
+            "pending": sum(pendingCount for _, pendingCount, _ in history),
+            "min": min(answered) if answered else None,
+            "max": max(answered) if answered else None,
+            "mean": sum(answered) / len(answered) if answered else None,
+        }
+
+
+if __name__ == "__main__":
+
+    pass
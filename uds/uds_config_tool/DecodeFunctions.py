@@ -10,8 +10,12 @@ __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
 
+import struct
 from functools import reduce
 
+# NRC tables of the generated negative response functions, shared by the services with the same table
+_nrcTables = {}
+
 
 def extractBitFromPosition(aInt, position):
     return (aInt & (2**position)) >> position
@@ -30,6 +34,43 @@ def buildIntFromList(aList):
     return reduce(lambda x, y: (x << 8) + y, aList)
 
 
+##
+# @brief concatenates the bytes of a PDU (bytes, bytearray, memoryview or list of byte values) into a single integer
+# The fast path of the generated service functions, whose slices of a PDU are never empty:
+# int.from_bytes reads the bytes in place, several times faster than buildIntFromList.
+# Unlike buildIntFromList, values above 0xFF are rejected and an empty input gives 0.
+def buildIntFromBytes(aBytes):
+    return int.from_bytes(aBytes, "big")
+
+
+##
+# @brief reads the fixed integer fields of a message with a single struct unpack
+# The format comes from the method factories (fieldsExpression); struct caches its compiled
+# form. Responses handed over as lists of byte values (listPdu) are read from a bytes copy.
+def unpackFields(structFormat, aList):
+    try:
+        return struct.unpack_from(structFormat, aList)
+    except TypeError:
+        return unpackFields(structFormat, bytes(aList))
+    except struct.error:
+        raise Exception(
+            "Total length returned not as expected. Expected at least: {0}; Got {1}".format(
+                struct.calcsize(structFormat), len(aList)
+            )
+        )
+
+
+##
+# @brief returns the label of a negative response code
+# @param [in] nrcTable (code, label) pairs of the service, a constant of the generated function
+# The table is turned into a dict once and shared by every service declaring the same codes.
+def nrcLabel(nrcTable, nrc):
+    labels = _nrcTables.get(nrcTable)
+    if labels is None:
+        labels = _nrcTables.setdefault(nrcTable, dict(nrcTable))
+    return labels.get(nrc)
+
+
 ##
 # @brief uses list comprehension to deal with the input string
 # todo: implement the encoding type
@@ -40,10 +81,10 @@ def stringToIntList(aString, encodingType):
 
 
 ##
-# @brief uses the map, reduce pattern to deal with the input list functionally
+# @brief uses the map, join pattern to deal with the input list functionally
 # todo: implement the encoding type
 def intListToString(aList, encodingType):
-    return reduce(lambda x, y: x + y, list(map(chr, aList)))
+    return "".join(map(chr, aList))
 
 
 def intArrayToUInt8Array(aArray, inputType):
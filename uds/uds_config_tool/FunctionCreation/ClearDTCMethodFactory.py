@@ -15,31 +15,35 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
 )
 
 # When encode the dataRecord for transmission we have to allow for multiple elements in the data record
 # i.e. 'value1' - for a single value, or [('param1','value1'),('param2','value2')]  for more complex data records
 requestFuncTemplate = str(
-    "def {0}(groupOfDTC):\n" "    {2}\n" "    return {1} + encoded"
+    "def {0}(groupOfDTC):\n"
+    "    {2}\n"
+    "    pdu = bytearray({1})\n"
+    "    pdu.extend(encoded)\n"
+    "    return pdu"
 )
 
 
 checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{2}:{3}])\n"
-    '    if(len(input) != {4}): raise Exception("Total length returned not as expected. Expected: {4}; Got {{0}}".format(len(input)))\n'
+    '    if(len(input) != {3}): raise Exception("Total length returned not as expected. Expected: {3}; Got {{0}}".format(len(input)))\n'
+    "    serviceId = {2}\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))'
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str("def {0}(input):\n" "    return")
@@ -89,7 +93,7 @@ class ClearDTCMethodFactory(IServiceMethodFactory):
                 encodeFunction = "encoded = {1}".format(longName, functionStringSingle)
 
         funcString = requestFuncTemplate.format(shortName, serviceId, encodeFunction)
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -142,11 +146,10 @@ class ClearDTCMethodFactory(IServiceMethodFactory):
         checkFunctionString = checkFunctionTemplate.format(
             checkFunctionName,  # 0
             responseId,  # 1
-            responseIdStart,  # 2
-            responseIdEnd,  # 3
+            fieldExpression(responseIdStart, responseIdEnd),  # 2
             totalLength,
-        )  # 4
-        exec(checkFunctionString)
+        )  # 3
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -162,7 +165,7 @@ class ClearDTCMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName
         )  # 0
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -222,11 +225,10 @@ class ClearDTCMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
@@ -15,16 +15,18 @@ import xml.etree.ElementTree as ET
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
+    fieldsExpression,
 )
 
 SUPPRESS_RESPONSE_BIT = 0x80
 
 requestFuncTemplate = str(
     "def {0}(suppressResponse=False):\n"
-    "    sessionType = {2}\n"
-    "    suppressBit = {3} if suppressResponse else 0x00\n"
-    "    sessionType[0] += suppressBit\n"
-    "    return {1} + sessionType"
+    "    pdu = bytearray({1!r})\n"
+    "    if suppressResponse: pdu[{3}] |= {2}\n"
+    "    return pdu"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed
@@ -32,21 +34,18 @@ checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
     "    sessionTypeExpected = {2}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{3}:{4}])\n"
-    "    sessionType = DecodeFunctions.buildIntFromList(input[{5}:{6}])\n"
-    '    if(len(input) != {7}): raise Exception("Total length returned not as expected. Expected: {7}; Got {{0}}".format(len(input)))\n'
+    '    if(len(input) != {4}): raise Exception("Total length returned not as expected. Expected: {4}; Got {{0}}".format(len(input)))\n'
+    "    serviceId, sessionType = {3}\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))\n'
     '    if(sessionType != sessionTypeExpected): raise Exception("Session Type Received not as expected. Expected: {{0}}; Got {{1}}".format(sessionTypeExpected, sessionType))'
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed
@@ -98,9 +97,12 @@ class DiagnosticSessionControlMethodFactory(IServiceMethodFactory):
                     # raise ValueError("Diagnostic Session Control:session type exceeds maximum value (received {0})".format(sessionType[0]))
 
         funcString = requestFuncTemplate.format(
-            shortName, serviceId, sessionType, SUPPRESS_RESPONSE_BIT
+            shortName,
+            bytes(serviceId + sessionType),  # ... the whole request, built at once
+            SUPPRESS_RESPONSE_BIT,
+            len(serviceId),  # ... index of the sub-function byte
         )
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -194,13 +196,15 @@ class DiagnosticSessionControlMethodFactory(IServiceMethodFactory):
             checkFunctionName,  # 0
             responseId,  # 1
             sessionType,  # 2
-            responseIdStart,  # 3
-            responseIdEnd,  # 4
-            sessionTypeStart,  # 5
-            sessionTypeEnd,  # 6
+            fieldsExpression(
+                [
+                    (responseIdStart, responseIdEnd),
+                    (sessionTypeStart, sessionTypeEnd),
+                ]
+            ),  # 3
             totalLength,
-        )  # 7
-        exec(checkFunctionString)
+        )  # 4
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -299,7 +303,7 @@ class DiagnosticSessionControlMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName, "\n    ".join(encodeFunctions)
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -367,12 +371,11 @@ class DiagnosticSessionControlMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
 
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
@@ -15,16 +15,18 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
+    fieldsExpression,
 )
 
 SUPPRESS_RESPONSE_BIT = 0x80
 
 requestFuncTemplate = str(
     "def {0}(suppressResponse=False):\n"
-    "    resetType = {2}\n"
-    "    suppressBit = {3} if suppressResponse else 0x00\n"
-    "    resetType[0] += suppressBit\n"
-    "    return {1} + resetType"
+    "    pdu = bytearray({1!r})\n"
+    "    if suppressResponse: pdu[{3}] |= {2}\n"
+    "    return pdu"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed
@@ -32,21 +34,18 @@ checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
     "    resetTypeExpected = {2}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{3}:{4}])\n"
-    "    resetType = DecodeFunctions.buildIntFromList(input[{5}:{6}])\n"
-    '    if(len(input) != {7}): raise Exception("Total length returned not as expected. Expected: {7}; Got {{0}}".format(len(input)))\n'
+    '    if(len(input) != {4}): raise Exception("Total length returned not as expected. Expected: {4}; Got {{0}}".format(len(input)))\n'
+    "    serviceId, resetType = {3}\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))\n'
     '    if(resetType != resetTypeExpected): raise Exception("Reset Type Received not as expected. Expected: {{0}}; Got {{1}}".format(resetTypeExpected, resetType))'
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed
@@ -98,9 +97,12 @@ class ECUResetMethodFactory(IServiceMethodFactory):
                     # raise ValueError("ECU Reset:reset type exceeds maximum value (received {0})".format(resetType[0]))
 
         funcString = requestFuncTemplate.format(
-            shortName, serviceId, resetType, SUPPRESS_RESPONSE_BIT
+            shortName,
+            bytes(serviceId + resetType),  # ... the whole request, built at once
+            SUPPRESS_RESPONSE_BIT,
+            len(serviceId),  # ... index of the sub-function byte
         )
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -190,13 +192,12 @@ class ECUResetMethodFactory(IServiceMethodFactory):
             checkFunctionName,  # 0
             responseId,  # 1
             resetType,  # 2
-            responseIdStart,  # 3
-            responseIdEnd,  # 4
-            resetTypeStart,  # 5
-            resetTypeEnd,  # 6
+            fieldsExpression(
+                [(responseIdStart, responseIdEnd), (resetTypeStart, resetTypeEnd)]
+            ),  # 3
             totalLength,
-        )  # 7
-        exec(checkFunctionString)
+        )  # 4
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -294,7 +295,7 @@ class ECUResetMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName, "\n    ".join(encodeFunctions)
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -362,11 +363,10 @@ class ECUResetMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
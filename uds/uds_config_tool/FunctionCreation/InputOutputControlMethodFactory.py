@@ -15,6 +15,9 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
+    fieldsExpression,
 )
 
 # When encode the dataRecord for transmission we allow for multiple elements in the data record,
@@ -26,7 +29,11 @@ requestFuncTemplate = str(
     "        drDict = dict(dataRecord)\n"
     "        {4}\n"
     "{5}\n"
-    "    return {1} + {2} + {3} + encoded"
+    "    pdu = bytearray({1})\n"
+    "    pdu.extend({2})\n"
+    "    pdu.extend({3})\n"
+    "    pdu.extend(encoded)\n"
+    "    return pdu"
 )
 
 checkFunctionTemplate = str(
@@ -34,10 +41,8 @@ checkFunctionTemplate = str(
     "    serviceIdExpected = {1}\n"
     "    diagnosticIdExpected = {2}\n"
     "    optionRecordExpected = {3}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{4}:{5}])\n"
-    "    diagnosticId = DecodeFunctions.buildIntFromList(input[{6}:{7}])\n"
-    "    optionRecord = DecodeFunctions.buildIntFromList(input[{8}:{9}])\n"
-    '    if(len(input) != {10}): raise Exception("Total length returned not as expected. Expected: {10}; Got {{0}}".format(len(input)))\n'
+    '    if(len(input) != {5}): raise Exception("Total length returned not as expected. Expected: {5}; Got {{0}}".format(len(input)))\n'
+    "    serviceId, diagnosticId, optionRecord = {4}\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))\n'
     '    if(diagnosticId != diagnosticIdExpected): raise Exception("Diagnostic Id Received not as expected. Expected: {{0}}; Got {{1}}".format(diagnosticIdExpected, diagnosticId))\n'
     '    if(optionRecord != optionRecordExpected): raise Exception("Option Record Received not as expected. Expected: {{0}}; Got {{1}}".format(optionRecordExpected, optionRecord))'
@@ -45,12 +50,10 @@ checkFunctionTemplate = str(
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str(
@@ -160,7 +163,7 @@ class InputOutputControlMethodFactory(IServiceMethodFactory):
             encodeFunction,
         )  # ... handles input via single value
 
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return (locals()[shortName], str(optionRecord))
 
     ##
@@ -262,15 +265,16 @@ class InputOutputControlMethodFactory(IServiceMethodFactory):
             responseId,  # 1
             diagnosticId,  # 2
             optionRecord,  # 3
-            responseIdStart,  # 4
-            responseIdEnd,  # 5
-            diagnosticIdStart,  # 6
-            diagnosticIdEnd,  # 7
-            optionRecordStart,  # 8
-            optionRecordEnd,  # 9
+            fieldsExpression(
+                [
+                    (responseIdStart, responseIdEnd),
+                    (diagnosticIdStart, diagnosticIdEnd),
+                    (optionRecordStart, optionRecordEnd),
+                ]
+            ),  # 4
             totalLength,
-        )  # 10
-        exec(checkFunctionString)
+        )  # 5
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -390,7 +394,7 @@ class InputOutputControlMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName, "\n    ".join(encodeFunctions)
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -458,11 +462,10 @@ class InputOutputControlMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
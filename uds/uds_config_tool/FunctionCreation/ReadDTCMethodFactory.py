@@ -15,6 +15,9 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
+    fieldsExpression,
 )
 
 # Note: the request is not the simplest to parse from the ODX, so paritally hardcoding this one again (for now at least)
@@ -22,28 +25,28 @@ requestFuncTemplate = str(
     "def {0}(DTCStatusMask=[],DTCMaskRecord=[],DTCSnapshotRecordNumber=[],DTCExtendedRecordNumber=[],DTCSeverityMask=[]):\n"
     "    encoded = []\n"
     "    {3}\n"
-    "    return {1} + {2} + encoded # ... SID, sub-func, and params"
+    "    pdu = bytearray({1})\n"
+    "    pdu.extend({2})\n"
+    "    pdu.extend(encoded)  # ... SID, sub-func, and params\n"
+    "    return pdu"
 )
 
 checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
     "    subFunctionExpected = {2}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{3}:{4}])\n"
-    "    subFunction = DecodeFunctions.buildIntFromList(input[{5}:{6}])\n"
+    "    serviceId, subFunction = {3}\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))\n'
     '    if(subFunction != subFunctionExpected): raise Exception("Sub-function Received not expected. Expected {{0}}; Got {{1}} ".format(subFunctionExpected, subFunction))\n'
-    "{7}"
+    "{4}"
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str(
@@ -127,7 +130,7 @@ class ReadDTCMethodFactory(IServiceMethodFactory):
         funcString = requestFuncTemplate.format(
             shortName, serviceId, subfunction, encodeString
         )
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return (locals()[shortName], str(subfunction))
 
     ##
@@ -238,13 +241,15 @@ class ReadDTCMethodFactory(IServiceMethodFactory):
             checkFunctionName,  # 0
             responseId,  # 1
             subfunction,  # 2
-            responseIdStart,  # 3
-            responseIdEnd,  # 4
-            subfunctionStart,  # 5
-            subfunctionEnd,  # 6
+            fieldsExpression(
+                [
+                    (responseIdStart, responseIdEnd),
+                    (subfunctionStart, subfunctionEnd),
+                ]
+            ),  # 3
             subfunctionChecks,
-        )  # 7
-        exec(checkFunctionString)
+        )  # 4
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -339,7 +344,7 @@ class ReadDTCMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName, subfunctionResponse  # 0
         )  # 1
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -399,11 +404,10 @@ class ReadDTCMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
@@ -15,6 +15,8 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
 )
 
 # Extended to cater for multiple DIDs in a request - typically rather than processing
@@ -27,7 +29,7 @@ requestDIDFuncTemplate = str("def {0}():\n" "    return {1}")
 checkSIDRespFuncTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{2}:{3}])\n"
+    "    serviceId = DecodeFunctions.buildIntFromBytes(input[{2}:{3}])\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))'
 )
 
@@ -36,7 +38,7 @@ checkSIDLenFuncTemplate = str("def {0}():\n" "    return {1}")
 checkDIDRespFuncTemplate = str(
     "def {0}(input):\n"
     "    diagnosticIdExpected = {1}\n"
-    "    diagnosticId = DecodeFunctions.buildIntFromList(input[{2}:{3}])\n"
+    "    diagnosticId = DecodeFunctions.buildIntFromBytes(input[{2}:{3}])\n"
     '    if(diagnosticId != diagnosticIdExpected): raise Exception("Diagnostic Id Received not as expected. Expected: {{0}}; Got {{1}}".format(diagnosticIdExpected, diagnosticId))'
 )
 
@@ -44,12 +46,10 @@ checkDIDLenFuncTemplate = str("def {0}():\n" "    return {1}")
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str(
@@ -87,15 +87,16 @@ class ReadDataByIdentifierMethodFactory(IServiceMethodFactory):
                     [int(param.find("CODED-VALUE").text)], "int16", "int8"
                 )
 
+        # constant parts are emitted as bytes literals, nothing is built per request
         funcString = requestSIDFuncTemplate.format(
-            requestSIDFuncName, serviceId  # 0
+            requestSIDFuncName, bytes(serviceId)  # 0
         )  # 1
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
 
         funcString = requestDIDFuncTemplate.format(
-            requestDIDFuncName, diagnosticId  # 0
+            requestDIDFuncName, bytes(diagnosticId)  # 0
         )  # 1
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
 
         return (locals()[requestSIDFuncName], locals()[requestDIDFuncName])
 
@@ -186,11 +187,11 @@ class ReadDataByIdentifierMethodFactory(IServiceMethodFactory):
             responseIdStart,  # 2
             responseIdEnd,
         )  # 3
-        exec(checkSIDRespFuncString)
+        exec(compileFunctionSource(checkSIDRespFuncString))
         checkSIDLenFuncString = checkSIDLenFuncTemplate.format(
             checkSIDLenFuncName, SIDLength  # 0
         )  # 1
-        exec(checkSIDLenFuncString)
+        exec(compileFunctionSource(checkSIDLenFuncString))
         checkDIDRespFuncString = checkDIDRespFuncTemplate.format(
             checkDIDRespFuncName,  # 0
             diagnosticId,  # 1
@@ -198,11 +199,11 @@ class ReadDataByIdentifierMethodFactory(IServiceMethodFactory):
             - SIDLength,  # 2... note: we no longer look at absolute pos in the response,
             diagnosticIdEnd - SIDLength,
         )  # 3      but look at the DID response as an isolated extracted element.
-        exec(checkDIDRespFuncString)
+        exec(compileFunctionSource(checkDIDRespFuncString))
         checkDIDLenFuncString = checkDIDLenFuncTemplate.format(
             checkDIDLenFuncName, totalLength - SIDLength  # 0
         )  # 1
-        exec(checkDIDLenFuncString)
+        exec(compileFunctionSource(checkDIDLenFuncString))
 
         return (
             locals()[checkSIDRespFuncName],
@@ -274,7 +275,7 @@ class ReadDataByIdentifierMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName, "\n    ".join(encodeFunctions)
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     @staticmethod
@@ -333,12 +334,11 @@ class ReadDataByIdentifierMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
 
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
@@ -15,34 +15,38 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
+    fieldsExpression,
 )
 
 # When encode the dataRecord for transmission we have to allow for multiple elements in the data record
 # i.e. 'value1' - for a single value, or [('param1','value1'),('param2','value2')]  for more complex data records
 requestFuncTemplate = str(
     "def {0}(FormatIdentifier, MemoryAddress, MemorySize):\n"
-    "    addrlenfid = [len(MemoryAddress) + (len(MemorySize)<<4)]\n"
-    "    return {1} + FormatIdentifier + addrlenfid + MemoryAddress + MemorySize"
+    "    pdu = bytearray({1})\n"
+    "    pdu.extend(FormatIdentifier)\n"
+    "    pdu.append(len(MemoryAddress) + (len(MemorySize)<<4))\n"
+    "    pdu.extend(MemoryAddress)\n"
+    "    pdu.extend(MemorySize)\n"
+    "    return pdu"
 )
 
 checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{2}:{3}])\n"
-    "    addrlenfid = DecodeFunctions.buildIntFromList(input[{3}:{3}+1]) # ... next byte\n"
-    "    totalLength = {4} + 1 + (addrlenfid>>4) # ... length of sid, length of addrlenfid, length of maxNumOfBlockLen extracted from addrlenfid\n"
+    "    serviceId, addrlenfid = {2} # ... addrlenfid is the next byte\n"
+    "    totalLength = {3} + 1 + (addrlenfid>>4) # ... length of sid, length of addrlenfid, length of maxNumOfBlockLen extracted from addrlenfid\n"
     '    if(len(input) != totalLength): raise Exception("Total length returned not as expected. Expected: totalLength; Got {{0}}".format(len(input)))\n'
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))'
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str(
@@ -91,7 +95,7 @@ class RequestDownloadMethodFactory(IServiceMethodFactory):
                 # ... if we've gotten this far, then we probably have enough from the ODX to ensure we have the service defined ... following the spec from here on.
 
         funcString = requestFuncTemplate.format(shortName, serviceId)
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -153,11 +157,12 @@ class RequestDownloadMethodFactory(IServiceMethodFactory):
         checkFunctionString = checkFunctionTemplate.format(
             checkFunctionName,  # 0
             responseId,  # 1
-            responseIdStart,  # 2
-            responseIdEnd,  # 3
+            fieldsExpression(
+                [(responseIdStart, responseIdEnd), (responseIdEnd, responseIdEnd + 1)]
+            ),  # 2
             responseLength,
-        )  # 4
-        exec(checkFunctionString)
+        )  # 3
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     def create_encodePositiveResponseFunction(diagServiceElement, xmlElements):
@@ -207,7 +212,7 @@ class RequestDownloadMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -267,11 +272,10 @@ class RequestDownloadMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
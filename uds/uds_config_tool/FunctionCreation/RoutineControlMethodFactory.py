@@ -15,22 +15,27 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
+    fieldsExpression,
 )
 
 SUPPRESS_RESPONSE_BIT = 0x80
 
 requestFuncTemplate = str(
     "def {0}(optionRecord,suppressResponse=False):\n"
-    "    controlType = {2}\n"
-    "    suppressBit = {6} if suppressResponse else 0x00\n"
-    "    controlType[0] += suppressBit\n"
     "    encoded = []\n"
     "    if optionRecord is not None:\n"
     "        if type(optionRecord) == list and type(optionRecord[0]) == tuple:\n"
     "            drDict = dict(optionRecord)\n"
     "            {4}\n"
     "{5}\n"
-    "    return {1} + controlType + {3} + encoded"
+    "    pdu = bytearray({1})\n"
+    "    pdu.extend({2})\n"
+    "    if suppressResponse: pdu[{7}] |= {6}\n"
+    "    pdu.extend({3})\n"
+    "    pdu.extend(encoded)\n"
+    "    return pdu"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed
@@ -39,10 +44,8 @@ checkFunctionTemplate = str(
     "    serviceIdExpected = {1}\n"
     "    controlTypeExpected = {2}\n"
     "    routineIdExpected = {3}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{4}:{5}])\n"
-    "    controlType = DecodeFunctions.buildIntFromList(input[{6}:{7}])\n"
-    "    routineId = DecodeFunctions.buildIntFromList(input[{8}:{9}])\n"
-    '    if(len(input) != {10}): raise Exception("Total length returned not as expected. Expected: {10}; Got {{0}}".format(len(input)))\n'
+    '    if(len(input) != {5}): raise Exception("Total length returned not as expected. Expected: {5}; Got {{0}}".format(len(input)))\n'
+    "    serviceId, controlType, routineId = {4}\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))\n'
     '    if(controlType != controlTypeExpected): raise Exception("Control Type Received not expected. Expected {{0}}; Got {{1}} ".format(controlTypeExpected, controlType))\n'
     '    if(routineId != routineIdExpected): raise Exception("Routine Id Received not as expected. Expected: {{0}}; Got {{1}}".format(routineIdExpected, routineId))'
@@ -50,12 +53,10 @@ checkFunctionTemplate = str(
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed
@@ -186,9 +187,10 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
             routineId,  # 3
             "\n            ".join(encodeFunctions),  # ... handles input via list # 4
             encodeFunction,  # ... handles input via single value # 5
-            SUPPRESS_RESPONSE_BIT,
-        )  # 6
-        exec(funcString)
+            SUPPRESS_RESPONSE_BIT,  # 6
+            len(serviceId),  # ... index of the sub-function byte # 7
+        )
+        exec(compileFunctionSource(funcString))
         return (locals()[shortName], str(controlType))
 
     ##
@@ -290,15 +292,16 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
             responseId,  # 1
             controlType,  # 2
             routineId,  # 3
-            responseIdStart,  # 4
-            responseIdEnd,  # 5
-            controlTypeStart,  # 6
-            controlTypeEnd,  # 7
-            routineIdStart,  # 8
-            routineIdEnd,  # 9
+            fieldsExpression(
+                [
+                    (responseIdStart, responseIdEnd),
+                    (controlTypeStart, controlTypeEnd),
+                    (routineIdStart, routineIdEnd),
+                ]
+            ),  # 4
             totalLength,
-        )  # 10
-        exec(checkFunctionString)
+        )  # 5
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -418,7 +421,7 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName, "\n    ".join(encodeFunctions)
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -486,11 +489,10 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
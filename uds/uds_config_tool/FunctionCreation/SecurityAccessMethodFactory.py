@@ -12,8 +12,10 @@ __status__ = "Development"
 
 from math import ceil
 
+from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
 )
 from uds.uds_config_tool.UtilityFunctions import (
     getBitLengthFromDop,
@@ -35,7 +37,7 @@ requestFuncTemplate_getSeed = str(
     "def {0}(suppressResponse=False):\n"
     "    securityRequest = {2}\n"
     "    if suppressResponse: securityRequest |= 0x80\n"
-    "    return [{1}, securityRequest]"
+    "    return bytearray(({1}, securityRequest))"
 )
 
 requestFuncTemplate_sendKey = str(
@@ -43,7 +45,9 @@ requestFuncTemplate_sendKey = str(
     "    serviceId = {1}\n"
     "    subFunction = {2}\n"
     "    if suppressResponse: subFunction |= 0x80\n"
-    "    return [serviceId, subFunction] + key"
+    "    pdu = bytearray((serviceId, subFunction))\n"
+    "    pdu.extend(key)\n"
+    "    return pdu"
 )
 
 checkSidTemplate = str(
@@ -66,12 +70,10 @@ checkReturnedDataTemplate = str(
 
 checkNegativeResponseTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {1}\n"
-    "    if input[0] == 0x7F:\n"
-    "        result['NRC'] = input[2]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= 2 or input[0] != 0x7F:\n"
+    "        return {{}}\n"
+    "    nrc = input[2]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({1!r}, nrc)}}"
 )
 ##
 # inputs:
@@ -79,7 +81,7 @@ checkNegativeResponseTemplate = str(
 checkInputDataTemplate = str(
     "def {0}(data):\n"
     "    expectedLength = {1}\n"
-    "    if isinstance(data, list):\n"
+    "    if isinstance(data, (list, bytes, bytearray)):\n"
     '        if len(data) != expectedLength: raise Exception("Input data does not match expected length")\n'
     "    else:"
     "        pass"
@@ -131,7 +133,7 @@ class SecurityAccessMethodFactory(object):
             requestFuncString = None
 
         if requestFuncString is not None:
-            exec(requestFuncString)
+            exec(compileFunctionSource(requestFuncString))
             return locals()[sdgsName]
         else:
             return None
@@ -194,10 +196,10 @@ class SecurityAccessMethodFactory(object):
             checkReturnedDataString = checkReturnedDataTemplate.format(
                 checkReturnedDataFunctionName, payloadLength
             )
-            exec(checkReturnedDataString)
+            exec(compileFunctionSource(checkReturnedDataString))
 
-        exec(checkSidFunctionString)
-        exec(checkSecurityAccessFunctionString)
+        exec(compileFunctionSource(checkSidFunctionString))
+        exec(compileFunctionSource(checkSecurityAccessFunctionString))
 
         checkSidFunction = locals()[checkSidFunctionName]
         checkSecurityAccessFunction = locals()[checkSecurityAccessFunctionName]
@@ -263,9 +265,9 @@ class SecurityAccessMethodFactory(object):
                 pass
 
         checkNegativeResponseFunctionString = checkNegativeResponseTemplate.format(
-            checkNegativeResponseFunctionName, expectedNrcDict
+            checkNegativeResponseFunctionName, tuple(sorted(expectedNrcDict.items()))
         )
-        exec(checkNegativeResponseFunctionString)
+        exec(compileFunctionSource(checkNegativeResponseFunctionString))
 
         return locals()[checkNegativeResponseFunctionName]
 
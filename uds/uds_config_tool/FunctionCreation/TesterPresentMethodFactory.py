@@ -15,33 +15,33 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
 )
 
 requestFuncTemplate = str(
     "def {0}(suppressResponse=False):\n"
-    "    zeroSubFunction = [0x80] if suppressResponse else [0x00]\n"
-    "    return {1} + zeroSubFunction"
+    "    pdu = bytearray({1})\n"
+    "    pdu.append(0x80 if suppressResponse else 0x00)\n"
+    "    return pdu"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed
 checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    # The tester present response is simple and fixed, so hardcoding here for simplicity.\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[0:1])\n"
-    "    zeroSubFunction = DecodeFunctions.buildIntFromList(input[1:2])\n"
     '    if(len(input) != 2): raise Exception("Total length returned not as expected. Expected: 2; Got {{0}}".format(len(input)))\n'
+    "    serviceId, zeroSubFunction = DecodeFunctions.unpackFields('>BB', input)\n"
     '    if(serviceId != 0x7E): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(0x7E,serviceId))\n'
     '    if(zeroSubFunction != 0x00): raise Exception("Zero Sub Function Received not as expected. Expected {{0}}; Got {{1}}".format(0x00,zeroSubFunction))'
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 # Note: we do not need to cater for response suppression checking as nothing to check if response is suppressed - always unsuppressed.
@@ -86,7 +86,7 @@ class TesterPresentMethodFactory(IServiceMethodFactory):
                 serviceId = [int(param.find("CODED-VALUE").text)]
 
         funcString = requestFuncTemplate.format(shortName, serviceId)
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -115,7 +115,7 @@ class TesterPresentMethodFactory(IServiceMethodFactory):
         ]
 
         checkFunctionString = checkFunctionTemplate.format(checkFunctionName)  # 0
-        exec(checkFunctionString)
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -145,7 +145,7 @@ class TesterPresentMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -213,11 +213,10 @@ class TesterPresentMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
@@ -15,28 +15,31 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
 )
 
 requestFuncTemplate = str(
     "def {0}(blockSequenceCounter,parameterRecord):\n"
-    "    return {1} + [blockSequenceCounter] + parameterRecord"
+    "    pdu = bytearray({1})\n"
+    "    pdu.append(blockSequenceCounter & 0xFF)  # ... the counter wraps round to 0x00 after 0xFF\n"
+    "    pdu.extend(parameterRecord)\n"
+    "    return pdu"
 )
 
 checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{2}:{3}])\n"
+    "    serviceId = DecodeFunctions.buildIntFromBytes(input[{2}:{3}])\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))'
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str(
@@ -83,7 +86,7 @@ class TransferDataMethodFactory(IServiceMethodFactory):
                 pass
 
         funcString = requestFuncTemplate.format(shortName, serviceId)  # 0  # 1
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -138,7 +141,7 @@ class TransferDataMethodFactory(IServiceMethodFactory):
         checkFunctionString = checkFunctionTemplate.format(
             checkFunctionName, responseId, responseIdStart, responseIdEnd  # 0  # 1  # 2
         )  # 3
-        exec(checkFunctionString)
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -162,7 +165,7 @@ class TransferDataMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -222,11 +225,10 @@ class TransferDataMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
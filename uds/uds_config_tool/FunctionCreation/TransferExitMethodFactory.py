@@ -15,30 +15,30 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
 )
 
 requestFuncTemplate = str(
     "def {0}(parameterRecord):\n"
-    "    output = {1}\n"
-    "    if parameterRecord is not None: output += parameterRecord\n"
-    "    return output"
+    "    pdu = bytearray({1})\n"
+    "    if parameterRecord is not None: pdu.extend(parameterRecord)\n"
+    "    return pdu"
 )
 
 checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{2}:{3}])\n"
+    "    serviceId = DecodeFunctions.buildIntFromBytes(input[{2}:{3}])\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))'
 )
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str(
@@ -84,7 +84,7 @@ class TransferExitMethodFactory(IServiceMethodFactory):
                 pass
 
         funcString = requestFuncTemplate.format(shortName, serviceId)  # 0  # 1
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -139,7 +139,7 @@ class TransferExitMethodFactory(IServiceMethodFactory):
         checkFunctionString = checkFunctionTemplate.format(
             checkFunctionName, responseId, responseIdStart, responseIdEnd  # 0  # 1  # 2
         )  # 3
-        exec(checkFunctionString)
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -163,7 +163,7 @@ class TransferExitMethodFactory(IServiceMethodFactory):
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName
         )
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -223,11 +223,10 @@ class TransferExitMethodFactory(IServiceMethodFactory):
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
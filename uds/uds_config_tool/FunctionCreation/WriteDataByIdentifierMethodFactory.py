@@ -15,6 +15,9 @@ import sys
 from uds.uds_config_tool import DecodeFunctions
 from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
     IServiceMethodFactory,
+    compileFunctionSource,
+    fieldExpression,
+    fieldsExpression,
 )
 
 # When encode the dataRecord for transmission we have to allow for multiple elements in the data record
@@ -26,7 +29,10 @@ requestFuncTemplate = str(
     "        drDict = dict(dataRecord)\n"
     "        {3}\n"
     "{4}\n"
-    "    return {1} + {2} + encoded"
+    "    pdu = bytearray({1})\n"
+    "    pdu.extend({2})\n"
+    "    pdu.extend(encoded)\n"
+    "    return pdu"
 )
 
 
@@ -34,9 +40,8 @@ checkFunctionTemplate = str(
     "def {0}(input):\n"
     "    serviceIdExpected = {1}\n"
     "    diagnosticIdExpected = {2}\n"
-    "    serviceId = DecodeFunctions.buildIntFromList(input[{3}:{4}])\n"
-    "    diagnosticId = DecodeFunctions.buildIntFromList(input[{5}:{6}])\n"
-    '    if(len(input) != {7}): raise Exception("Total length returned not as expected. Expected: {7}; Got {{0}}".format(len(input)))\n'
+    '    if(len(input) != {4}): raise Exception("Total length returned not as expected. Expected: {4}; Got {{0}}".format(len(input)))\n'
+    "    serviceId, diagnosticId = {3}\n"
     '    if(serviceId != serviceIdExpected): raise Exception("Service Id Received not expected. Expected {{0}}; Got {{1}} ".format(serviceIdExpected, serviceId))\n'
     '    if(diagnosticId != diagnosticIdExpected): raise Exception("Diagnostic Id Received not as expected. Expected: {{0}}; Got {{1}}".format(diagnosticIdExpected, diagnosticId))'
 )
@@ -44,12 +49,10 @@ checkFunctionTemplate = str(
 
 negativeResponseFuncTemplate = str(
     "def {0}(input):\n"
-    "    result = {{}}\n"
-    "    nrcList = {5}\n"
-    "    if input[{1}:{2}] == [{3}]:\n"
-    "        result['NRC'] = input[{4}]\n"
-    "        result['NRC_Label'] = nrcList.get(result['NRC'])\n"
-    "    return result"
+    "    if len(input) <= {3} or {1} != {2}:\n"
+    "        return {{}}\n"
+    "    nrc = input[{3}]\n"
+    "    return {{'NRC': nrc, 'NRC_Label': DecodeFunctions.nrcLabel({4!r}, nrc)}}"
 )
 
 encodePositiveResponseFuncTemplate = str("def {0}(input):\n" "    return")
@@ -170,7 +173,7 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
             "\n        ".join(encodeFunctions),  # ... handles input via list
             encodeFunction,
         )  # ... handles input via single value
-        exec(funcString)
+        exec(compileFunctionSource(funcString))
         return locals()[shortName]
 
     ##
@@ -235,13 +238,15 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
             checkFunctionName,  # 0
             responseId,  # 1
             diagnosticId,  # 2
-            responseIdStart,  # 3
-            responseIdEnd,  # 4
-            diagnosticIdStart,  # 5
-            diagnosticIdEnd,  # 6
+            fieldsExpression(
+                [
+                    (responseIdStart, responseIdEnd),
+                    (diagnosticIdStart, diagnosticIdEnd),
+                ]
+            ),  # 3
             totalLength,
-        )  # 7
-        exec(checkFunctionString)
+        )  # 4
+        exec(compileFunctionSource(checkFunctionString))
         return locals()[checkFunctionName]
 
     ##
@@ -257,7 +262,7 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
         encodeFunctionString = encodePositiveResponseFuncTemplate.format(
             encodePositiveResponseFunctionName
         )  # 0
-        exec(encodeFunctionString)
+        exec(compileFunctionSource(encodeFunctionString))
         return locals()[encodePositiveResponseFunctionName]
 
     ##
@@ -317,12 +322,11 @@ Also, we will most need to handle scaling at some stage within DecodeFunctions.p
 
         negativeResponseFunctionString = negativeResponseFuncTemplate.format(
             check_negativeResponseFunctionName,
-            start,
-            end,
+            fieldExpression(start, end),
             serviceId,
             nrcPos,
-            expectedNrcDict,
+            tuple(sorted(expectedNrcDict.items())),
         )
 
-        exec(negativeResponseFunctionString)
+        exec(compileFunctionSource(negativeResponseFunctionString))
         return locals()[check_negativeResponseFunctionName]
@@ -10,8 +10,83 @@ __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
 
+import hashlib
+import linecache
 from abc import ABCMeta, abstractmethod
 
+# source of the generated functions, keyed by the file name of their code
+_generatedSources = {}
+
+# struct codes of the big endian unsigned integer sizes
+_structCodes = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+##
+# @brief compiles the source of a generated function, ready to be passed to exec
+#
+# The source is registered with linecache (registerGeneratedSource), so tracebacks through
+# a generated function show its code, and getGeneratedSource can return it later on.
+def compileFunctionSource(source):
+    return compile(source, registerGeneratedSource(source), "exec")
+
+
+##
+# @brief registers the source of a generated function under a file name derived from the source
+# @return the file name, the same in every process, so functions compiled in another process
+# (cache, process pool) find their source again once it is registered
+def registerGeneratedSource(source):
+    fileName = "<odx-generated-{0}>".format(hashlib.sha1(source.encode()).hexdigest()[:20])
+    if fileName not in _generatedSources:
+        _generatedSources[fileName] = source
+        linecache.cache[fileName] = (len(source), None, source.splitlines(True), fileName)
+    return fileName
+
+
+##
+# @brief returns the source of a function created from compileFunctionSource
+# @return the source, or None if the function was not compiled in this process
+def getGeneratedSource(aFunction):
+    return _generatedSources.get(aFunction.__code__.co_filename)
+
+
+##
+# @brief returns the expression reading one integer field of a message in a generated function
+def fieldExpression(start, end, inputName="input"):
+    if end - start == 1:
+        return "{0}[{1}]".format(inputName, start)
+    return "DecodeFunctions.buildIntFromBytes({0}[{1}:{2}])".format(inputName, start, end)
+
+
+##
+# @brief returns the expression reading fixed integer fields of a message in a generated function
+# @param [in] spans (start, end) byte positions of the fields, in the order their values are wanted
+#
+# Fields of 1, 2, 4 or 8 bytes that do not overlap are read with a single struct unpack
+# through a format precomputed here, anything else falls back to one slice per field.
+# The expression is a tuple of the field values, e.g. "serviceId, sessionType = <expression>".
+def fieldsExpression(spans, inputName="input"):
+    structFormat = ">"
+    position = 0
+    for start, end in spans:
+        code = _structCodes.get(end - start)
+        if code is None or start < position:
+            structFormat = None
+            break
+        if start - position == 1:
+            structFormat += "x"
+        elif start > position:
+            structFormat += "{0}x".format(start - position)
+        structFormat += code
+        position = end
+    if structFormat is not None:
+        return "DecodeFunctions.unpackFields({0!r}, {1})".format(structFormat, inputName)
+    return "({0},)".format(
+        ", ".join(
+            "DecodeFunctions.buildIntFromBytes({0}[{1}:{2}])".format(inputName, start, end)
+            for start, end in spans
+        )
+    )
+
 
 ##
 # @brief this should be static
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import hashlib
+import importlib
+import marshal
+import os
+import sys
+import tempfile
+from pathlib import Path
+from types import FunctionType
+
+from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
+    getGeneratedSource,
+    registerGeneratedSource,
+)
+
+# bumped whenever the layout of the cache files changes
+CACHE_FORMAT = 2
+
+CACHE_SUFFIX = ".odxc"
+
+_libraryFingerprint = None
+
+
+##
+# @brief hash of the sources generating the service functions
+#
+# Stands for the library version: any change to a method factory template or to the way
+# UdsTool fills the containers gives a new fingerprint, so stale cache files are never used.
+def libraryFingerprint():
+    global _libraryFingerprint
+    if _libraryFingerprint is None:
+        configToolDir = Path(__file__).parent
+        digest = hashlib.sha256()
+        sources = [configToolDir / "UdsConfigTool.py"]
+        sources += sorted((configToolDir / "FunctionCreation").glob("*.py"))
+        for source in sources:
+            digest.update(source.read_bytes())
+        _libraryFingerprint = digest.hexdigest()
+    return _libraryFingerprint
+
+
+##
+# @brief turns a generated service function, or a tuple of them, into marshallable values
+def dumpFunction(aFunction):
+    if aFunction is None:
+        return None
+    if isinstance(aFunction, tuple):
+        return [dumpFunction(member) for member in aFunction]  # ... e.g. security access checks
+    return (
+        aFunction.__module__,
+        aFunction.__code__,
+        aFunction.__defaults__,
+        aFunction.__kwdefaults__,
+        getGeneratedSource(aFunction),
+    )
+
+
+##
+# @brief rebuilds a service function from the values returned by dumpFunction
+#
+# The generated functions are created by exec in their method factory module, which is
+# where their global names (DecodeFunctions, ...) are found again.
+def loadFunction(record):
+    if record is None:
+        return None
+    if isinstance(record, list):
+        return tuple(loadFunction(member) for member in record)
+    moduleName, code, defaults, kwdefaults, source = record
+    if source is not None:
+        registerGeneratedSource(source)  # ... for tracebacks and the ODX compiler
+    module = sys.modules.get(moduleName) or importlib.import_module(moduleName)
+    aFunction = FunctionType(code, module.__dict__, code.co_name, defaults)
+    aFunction.__kwdefaults__ = kwdefaults
+    return aFunction
+
+
+##
+# @brief turns service tables returned by UdsTool.dump_service_tables into marshallable values
+def dumpServiceTables(serviceTables):
+    return {
+        "format": CACHE_FORMAT,
+        "flags": list(serviceTables["flags"]),
+        "containers": {
+            containerName: {
+                tableName: {
+                    entry: dumpFunction(aFunction) for entry, aFunction in table.items()
+                }
+                for tableName, table in tables.items()
+            }
+            for containerName, tables in serviceTables["containers"].items()
+        },
+        "indexes": dict(serviceTables.get("indexes", {})),
+    }
+
+
+##
+# @brief rebuilds the service tables from the values returned by dumpServiceTables
+# @return the service tables, or None if the values are not service tables of this library version
+def loadServiceTables(content):
+    if not isinstance(content, dict) or content.get("format") != CACHE_FORMAT:
+        return None
+    try:
+        return {
+            "flags": content["flags"],
+            "containers": {
+                containerName: {
+                    tableName: {
+                        entry: loadFunction(record) for entry, record in table.items()
+                    }
+                    for tableName, table in tables.items()
+                }
+                for containerName, tables in content["containers"].items()
+            },
+            "indexes": content.get("indexes", {}),
+        }
+    except (KeyError, ValueError, TypeError, ImportError):
+        return None
+
+
+##
+# @class OdxCache
+# @brief on-disk cache of the service tables compiled from ODX files
+#
+# A cache file holds, for one ODX file, the functions UdsTool added to each container (as
+# marshalled code objects) and the service flags it set. Files are named after the hash of
+# the ODX content and of the library fingerprint, so an edited ODX or an updated library
+# simply misses the cache.
+class OdxCache(object):
+
+    ##
+    # @brief constructor
+    # @param [in] cacheDir directory holding the cache files, created when first written to
+    def __init__(self, cacheDir):
+        self.__cacheDir = Path(cacheDir)
+
+    @property
+    def cacheDir(self):
+        return self.__cacheDir
+
+    ##
+    # @brief path of the cache file of an ODX file
+    def cachePath(self, xml_file):
+        digest = hashlib.sha256(libraryFingerprint().encode())
+        digest.update(str(CACHE_FORMAT).encode())
+        digest.update(sys.implementation.cache_tag.encode())  # ... marshal is interpreter specific
+        with open(xml_file, "rb") as odx:
+            for chunk in iter(lambda: odx.read(1 << 20), b""):
+                digest.update(chunk)
+        return self.__cacheDir / (digest.hexdigest() + CACHE_SUFFIX)
+
+    ##
+    # @brief reads the service tables of an ODX file
+    # @return the service tables, or None if the file is not cached or the cache file is unusable
+    def load(self, xml_file):
+        try:
+            with open(self.cachePath(xml_file), "rb") as cacheFile:
+                content = marshal.load(cacheFile)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return loadServiceTables(content)
+
+    ##
+    # @brief writes the service tables of an ODX file
+    #
+    # The file is written under a temporary name and renamed, so concurrent processes never
+    # read a partial file. Failing to write the cache is not an error, the tables are just
+    # compiled again next time.
+    def store(self, xml_file, serviceTables):
+        content = dumpServiceTables(serviceTables)
+        try:
+            self.__cacheDir.mkdir(parents=True, exist_ok=True)
+            cachePath = self.cachePath(xml_file)
+            fd, tempPath = tempfile.mkstemp(dir=self.__cacheDir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as cacheFile:
+                    marshal.dump(content, cacheFile)
+                os.replace(tempPath, cachePath)
+            except BaseException:
+                os.unlink(tempPath)
+                raise
+        except (OSError, ValueError):
+            return None
+        return cachePath
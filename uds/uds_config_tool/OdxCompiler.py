@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import argparse
+import hashlib
+import re
+from pathlib import Path
+from types import CodeType, ModuleType
+
+from uds.uds_config_tool.FunctionCreation.iServiceMethodFactory import (
+    getGeneratedSource,
+)
+from uds.uds_config_tool.OdxCache import libraryFingerprint
+from uds.uds_config_tool.UdsConfigTool import UdsTool
+
+moduleHeaderTemplate = str(
+    "# Generated by the python-uds ODX compiler from {0}, do not edit.\n"
+    "# Compile the ODX file again after updating python-uds, the services of a module\n"
+    "# compiled by another version are not loaded.\n"
+)
+
+
+##
+# @brief returns the global names used by a code object and the functions defined in it
+def globalNames(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= globalNames(const)
+    return names
+
+
+##
+# @brief returns the statement giving a name the value it has in the namespace of a generated function
+def importStatement(name, value):
+    if isinstance(value, ModuleType):
+        package, _, moduleName = value.__name__.rpartition(".")
+        if package and moduleName == name:
+            return "from {0} import {1}".format(package, name)
+        if value.__name__ == name:
+            return "import {0}".format(name)
+        return "import {0} as {1}".format(value.__name__, name)
+    if isinstance(value, (bool, int, float, str, bytes, type(None))):
+        return "{0} = {1!r}".format(name, value)
+    if getattr(value, "__qualname__", None) == getattr(value, "__name__", ""):
+        statement = "from {0} import {1}".format(value.__module__, value.__name__)
+        if value.__name__ != name:
+            statement += " as {0}".format(name)
+        return statement
+    raise Exception(
+        "Cannot compile the global {0} used by the generated services".format(name)
+    )
+
+
+##
+# @class OdxCompiler
+# @brief writes the services of an ODX file as a python module
+#
+# The module holds the source of every request, check and decode function the method
+# factories generate, and the SERVICE_TABLES registry telling which container each one
+# goes to. Giving the module to Uds (odx="services.py") loads the services without parsing
+# the ODX file, and the module is byte compiled to __pycache__ and shared by forked
+# processes like any other module.
+class OdxCompiler(object):
+    def __init__(self, xml_file):
+        self.__xmlFile = Path(xml_file)
+        self.__functionNames = {}  # ... function to its name in the module
+        self.__usedNames = set()
+        self.__imports = {}
+        self.__definitions = []
+
+    ##
+    # @brief compiles the ODX file
+    # @return the source of the module
+    def compile(self):
+        udsTool = UdsTool()
+        udsTool.parse_service_containers(self.__xmlFile)
+        serviceTables = udsTool.dump_service_tables()
+
+        registry = ["SERVICE_TABLES = {"]
+        for containerName, tables in serviceTables["containers"].items():
+            registry.append("    {0!r}: {{".format(containerName))
+            for tableName, table in tables.items():
+                registry.append("        {0!r}: {{".format(tableName))
+                for entry, aFunction in table.items():
+                    registry.append(
+                        "            {0!r}: {1},".format(entry, self.__reference(aFunction))
+                    )
+                registry.append("        },")
+            registry.append("    },")
+        registry.append("}")
+
+        odxDigest = hashlib.sha256(self.__xmlFile.read_bytes()).hexdigest()
+        statements = sorted(set(self.__imports.values()))
+        imports = [statement for statement in statements if " = " not in statement]
+        constants = [statement for statement in statements if " = " in statement]
+        sections = [
+            moduleHeaderTemplate.format(self.__xmlFile.name),
+            "\n".join(imports + [""] + constants),
+            "ODX_FILE = {0!r}\n"
+            "ODX_SHA256 = {1!r}\n"
+            "LIBRARY_FINGERPRINT = {2!r}".format(
+                self.__xmlFile.name, odxDigest, libraryFingerprint()
+            ),
+        ]
+        sections += self.__definitions
+        sections.append("SERVICE_FLAGS = {0!r}".format(serviceTables["flags"]))
+        sections.append("\n".join(registry))
+        sections.append("SERVICE_INDEXES = {0!r}".format(serviceTables["indexes"]))
+        return "\n\n\n".join(section.strip("\n") for section in sections) + "\n"
+
+    ##
+    # @brief compiles the ODX file into a module file
+    # @return the path of the module file
+    def write(self, outputFile=None):
+        if outputFile is None:
+            outputFile = self.__xmlFile.with_name(
+                re.sub(r"\W", "_", self.__xmlFile.stem) + ".py"
+            )
+        outputFile = Path(outputFile)
+        outputFile.write_text(self.compile())
+        return outputFile
+
+    ##
+    # @brief returns the expression referring to a function (or tuple of functions) in the module
+    def __reference(self, aFunction):
+        if aFunction is None:
+            return "None"
+        if isinstance(aFunction, tuple):
+            members = [self.__reference(member) for member in aFunction]
+            return "({0}{1})".format(", ".join(members), "," if len(members) == 1 else "")
+        if aFunction not in self.__functionNames:
+            self.__functionNames[aFunction] = self.__define(aFunction)
+        return self.__functionNames[aFunction]
+
+    ##
+    # @brief adds the source of a generated function to the module, under a name unique in the module
+    def __define(self, aFunction):
+        source = getGeneratedSource(aFunction)
+        originalName = aFunction.__code__.co_name
+        header = "def {0}(".format(originalName)
+        if source is None or not source.startswith(header):
+            raise Exception(
+                "No source available for the generated function {0}".format(originalName)
+            )
+
+        name = originalName
+        suffix = 1
+        while name in self.__usedNames:
+            suffix += 1
+            name = "{0}_{1}".format(originalName, suffix)
+        self.__usedNames.add(name)
+
+        # co_names also holds attribute names, only the names of the factory module are globals
+        for globalName in globalNames(aFunction.__code__):
+            if globalName in aFunction.__globals__:
+                statement = importStatement(globalName, aFunction.__globals__[globalName])
+                if self.__imports.setdefault(globalName, statement) != statement:
+                    raise Exception(
+                        "The generated services use {0} for different objects".format(
+                            globalName
+                        )
+                    )
+        if name in self.__imports:
+            raise Exception("{0} is both a service and a global name".format(name))
+
+        self.__definitions.append("def {0}(".format(name) + source[len(header) :])
+        return name
+
+
+##
+# @brief command line entry point: python -m uds.uds_config_tool.OdxCompiler Bootloader.odx
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Compile ODX files into python modules of UDS services, loadable with Uds(odx='module.py')"
+    )
+    parser.add_argument("odx", nargs="+", help="ODX files to compile")
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="module file to write (one ODX file), or directory of the modules (default: next to each ODX file)",
+    )
+    args = parser.parse_args(argv)
+
+    output = None if args.output is None else Path(args.output)
+    if output is not None and len(args.odx) > 1:
+        output.mkdir(parents=True, exist_ok=True)
+    for odx in args.odx:
+        outputFile = output
+        if output is not None and output.is_dir():
+            outputFile = output / (re.sub(r"\W", "_", Path(odx).stem) + ".py")
+        print("{0} -> {1}".format(odx, OdxCompiler(odx).write(outputFile)))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
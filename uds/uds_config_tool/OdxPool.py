@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import marshal
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from types import ModuleType
+
+from uds.config import Config
+from uds.uds_config_tool.OdxCache import (
+    OdxCache,
+    dumpServiceTables,
+    loadServiceTables,
+)
+from uds.uds_config_tool.UdsConfigTool import UdsTool, odxKey
+
+
+##
+# @brief compiles the services of an ODX file, run by the processes of the pool
+# @return the service tables marshalled (dumpServiceTables), the code objects of the
+# generated functions cannot be pickled
+def compileOdx(xml_file):
+    udsTool = UdsTool()
+    udsTool.parse_service_containers(xml_file)
+    return marshal.dumps(dumpServiceTables(udsTool.dump_service_tables()))
+
+
+##
+# @brief creates the services of many ODX files, compiling them in a pool of processes
+#
+# Each ODX file is parsed and compiled by a process of the pool, the parent process only
+# rebuilds the functions from the returned code objects. Files already in the compiled ODX cache
+# (Config.uds.odx_cache_dir) are read from it and the ones compiled are written to it, modules
+# written by the ODX compiler are loaded as they are.
+#
+# The UdsTools returned are the ones UdsTool.shared_service_containers gives, so a fleet of Uds
+# objects created with shareOdx=True afterwards uses them without loading anything again.
+# Config.uds.odx_lazy_load does not apply, every service is compiled.
+#
+# e.g.
+#   udsTools = loadOdxFiles(Path("odx").glob("*.odx"))
+#
+# @param [in] xmlFiles the ODX files (or compiled modules)
+# @param [in] processes number of processes compiling, defaults to the number of CPUs
+# @return the UdsTool holding the services of each file, keyed by the files given
+def loadOdxFiles(xmlFiles, processes=None):
+    xmlFiles = list(xmlFiles)
+    cacheDir = getattr(getattr(Config, "uds", None), "odx_cache_dir", None)
+    cache = None if cacheDir is None else OdxCache(cacheDir)
+
+    udsTools = {}  # ... odxKey to UdsTool
+    toCompile = {}  # ... odxKey to ODX file
+    for xml_file in xmlFiles:
+        key = odxKey(xml_file)
+        with UdsTool.sharedToolsLock:
+            udsTool = UdsTool.sharedTools.get(key)
+        if udsTool is not None or key in udsTools or key in toCompile:
+            udsTools.setdefault(key, udsTool)
+            continue
+
+        if isinstance(xml_file, ModuleType) or Path(xml_file).suffix == ".py":
+            udsTools[key] = UdsTool()
+            udsTools[key].load_compiled_odx(xml_file)
+            continue
+        serviceTables = None if cache is None else cache.load(xml_file)
+        if serviceTables is None:
+            toCompile[key] = xml_file
+        else:
+            udsTools[key] = UdsTool()
+            udsTools[key].load_service_tables(serviceTables)
+
+    if toCompile:
+        processes = min(processes or os.cpu_count() or 1, len(toCompile))
+        if processes > 1:
+            with ProcessPoolExecutor(processes) as pool:
+                results = list(pool.map(compileOdx, toCompile.values()))
+        else:
+            results = [compileOdx(xml_file) for xml_file in toCompile.values()]
+
+        for (key, xml_file), result in zip(toCompile.items(), results):
+            serviceTables = loadServiceTables(marshal.loads(result))
+            if serviceTables is None:
+                raise Exception("Services compiled from {0} could not be loaded".format(xml_file))
+            if cache is not None:
+                cache.store(xml_file, serviceTables)
+            udsTools[key] = UdsTool()
+            udsTools[key].load_service_tables(serviceTables)
+
+    with UdsTool.sharedToolsLock:
+        for key, udsTool in udsTools.items():
+            udsTools[key] = UdsTool.sharedTools.setdefault(key, udsTool)
+    return {xml_file: udsTools[odxKey(xml_file)] for xml_file in xmlFiles}
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+
+__author__ = "Richard Clubb"
+__copyrights__ = "Copyright 2018, the python-uds project"
+__credits__ = ["Richard Clubb"]
+
+__license__ = "MIT"
+__maintainer__ = "Richard Clubb"
+__email__ = "richard.clubb@embeduk.com"
+__status__ = "Development"
+
+
+import marshal
+import xml.etree.ElementTree as ET
+from collections import ChainMap, deque
+from collections.abc import Mapping
+
+# elements holding the services, kept packed until their service is compiled
+serviceTags = {"DIAG-SERVICE"}
+messageTags = {"REQUEST", "POS-RESPONSE", "NEG-RESPONSE"}
+
+# elements with an ID holding whole diag layers rather than a definition
+layerTags = {
+    "DIAG-LAYER-CONTAINER",
+    "BASE-VARIANT",
+    "ECU-VARIANT",
+    "PROTOCOL",
+    "FUNCTIONAL-GROUP",
+    "ECU-SHARED-DATA",
+    "COMPARAM-SPEC",
+    "COMPARAM-SUBSET",
+}
+
+# references followed by the method factories from a service to its messages
+serviceRefTags = {"REQUEST-REF", "POS-RESPONSE-REF", "NEG-RESPONSE-REF"}
+
+
+##
+# @brief packs an element into nested tuples, a fraction of the memory of the element tree
+# The tails (whitespace between elements in an ODX file) are not kept.
+def packElement(element):
+    return (
+        element.tag,
+        element.attrib or None,
+        element.text,
+        tuple(map(packElement, element)) or None,
+    )
+
+
+##
+# @brief rebuilds an element packed by packElement
+def unpackElement(record):
+    tag, attrib, text, children = record
+    element = ET.Element(tag, attrib) if attrib else ET.Element(tag)
+    element.text = text
+    if children:
+        element.extend(map(unpackElement, children))
+    return element
+
+
+##
+# @brief rebuilds a service returned by OdxServiceStream.packedServices
+# @return the DIAG-SERVICE element and the mapping resolving its ID-REFs
+def resolveService(servicePacked, messagesPacked, definitions):
+    xmlElements = {ref: unpackElement(message) for ref, message in messagesPacked.items()}
+    return unpackElement(servicePacked), ChainMap(xmlElements, definitions)
+
+
+##
+# @brief marshals a service returned by OdxServiceStream.packedServices into bytes, for holding
+# many services until they are needed (the definitions are left out, see FrozenDefinitions)
+def freezeService(servicePacked, messagesPacked):
+    return marshal.dumps((servicePacked, messagesPacked))
+
+
+##
+# @brief rebuilds a service frozen by freezeService
+# @return the DIAG-SERVICE element and the mapping resolving its ID-REFs
+def thawService(frozenService, definitions):
+    servicePacked, messagesPacked = marshal.loads(frozenService)
+    return resolveService(servicePacked, messagesPacked, definitions)
+
+
+##
+# @class FrozenDefinitions
+# @brief read only mapping of the definitions returned by OdxServiceStream.packedServices
+#
+# The definitions are held marshalled, each element is rebuilt when looked up.
+class FrozenDefinitions(Mapping):
+    def __init__(self, definitions):
+        self.__records = {
+            ID: marshal.dumps(packElement(element)) for ID, element in definitions.items()
+        }
+
+    def __getitem__(self, ID):
+        return unpackElement(marshal.loads(self.__records[ID]))
+
+    def __iter__(self):
+        return iter(self.__records)
+
+    def __len__(self):
+        return len(self.__records)
+
+
+##
+# @class OdxServiceStream
+# @brief iterates over the DIAG-SERVICE elements of an ODX file without building its whole tree
+#
+# The file is read with iterparse. Elements nothing can refer to (admin data, descriptions,
+# the layer structure, ...) are dropped as soon as they are read. Services and their request
+# and response messages are kept packed (packElement) until the service can be compiled, the
+# definitions shared by the services (data object props, structures, ...) are kept as elements.
+#
+# A service is yielded once the messages it refers to (REQUEST-REF, POS-RESPONSE-REF,
+# NEG-RESPONSE-REF) and the DOP-REFs of those messages have been read, together with a
+# mapping resolving these ID-REFs, in the same order as the services appear in the file.
+# The elements of a service are released when the next one is asked for.
+#
+# e.g.
+#   for diagServiceElement, xmlElements in OdxServiceStream(xml_file):
+#       requestFunc = ECUResetMethodFactory.create_requestFunction(diagServiceElement, xmlElements)
+class OdxServiceStream(object):
+    def __init__(self, xml_file):
+        self.__xmlFile = xml_file
+        self.__definitions = {}  # ... ID to element, shared by all services
+        self.__messages = {}  # ... ID to (packed message, IDs of its DOP-REFs)
+        self.__pending = deque()  # ... (packed service, IDs it refers to), in file order
+
+    def __iter__(self):
+        for packedService in self.packedServices():
+            yield resolveService(*packedService)
+
+    ##
+    # @brief iterates over the services without rebuilding their elements
+    # @return (packed service, packed messages keyed by ID, shared definitions) for each service,
+    # resolved by resolveService when the service is needed
+    def packedServices(self):
+        stack = []  # ... open elements, with the ID element they belong to (None in the layer structure)
+        for event, element in ET.iterparse(self.__xmlFile, events=("start", "end")):
+            if event == "start":
+                owner = stack[-1][1] if stack else None
+                if owner is None and "ID" in element.attrib and element.tag not in layerTags:
+                    owner = element
+                stack.append((element, owner))
+                continue
+
+            _, owner = stack.pop()
+            if owner is not element:
+                if owner is None:
+                    self.__drop(stack)  # ... nothing refers to it
+                elif owner.tag not in serviceTags | messageTags and "ID" in element.attrib:
+                    self.__definitions[element.attrib["ID"]] = element  # ... e.g. a TABLE-ROW
+                continue
+
+            if element.tag in serviceTags:
+                self.__pending.append(
+                    (packElement(element), self.__references(element, serviceRefTags))
+                )
+            elif element.tag in messageTags:
+                self.__messages[element.attrib["ID"]] = (
+                    packElement(element),
+                    self.__references(element, {"DOP-REF"}),
+                )
+            else:
+                self.__definitions[element.attrib["ID"]] = element
+            self.__drop(stack)
+            yield from self.__completeServices()
+
+        yield from self.__completeServices(endOfFile=True)
+
+    ##
+    # @brief removes the element just read from its parent, where it is the last child
+    @staticmethod
+    def __drop(stack):
+        if stack:
+            del stack[-1][0][-1]
+
+    ##
+    # @brief yields the services at the head of the queue whose references have all been read
+    # @param [in] endOfFile yields the remaining services even if something they refer to is missing
+    def __completeServices(self, endOfFile=False):
+        while self.__pending:
+            servicePacked, references = self.__pending[0]
+            messageIds = [ref for ref in references if ref in self.__messages]
+            if not endOfFile:
+                if len(messageIds) + sum(
+                    ref in self.__definitions for ref in references
+                ) != len(references):
+                    return
+                for ref in messageIds:
+                    if not all(dop in self.__definitions for dop in self.__messages[ref][1]):
+                        return
+            self.__pending.popleft()
+            messagesPacked = {ref: self.__messages[ref][0] for ref in messageIds}
+            yield servicePacked, messagesPacked, self.__definitions
+
+    ##
+    # @brief returns the IDs an element refers to through the given reference tags
+    @staticmethod
+    def __references(element, refTags):
+        return [
+            reference.attrib["ID-REF"]
+            for reference in element.iter()
+            if reference.tag in refTags and "ID-REF" in reference.attrib
+        ]
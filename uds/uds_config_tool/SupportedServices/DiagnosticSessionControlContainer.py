@@ -27,9 +27,14 @@ class DiagnosticSessionControlContainer(object):
         self.negativeResponseFunctions = {}
         self.positiveResponseFunctions = {}
 
+        # session entry by sub-function value (0x01 for the default session), SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
         self.testerPresent = {}
         self.currentSession = None
         self.lastSend = None
+        # deadline of the next tester present, created by testerPresentThread and moved on by every send
+        self.testerPresentDeadline = None
 
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
@@ -46,6 +51,9 @@ class DiagnosticSessionControlContainer(object):
     ):
 
         # Note: diagnosticSessionControl does not show support for multiple DIDs in the spec, so this is handling only a single DID with data record.
+        parameter = target.diagnosticSessionControlContainer.entryIndex.get(
+            parameter, parameter
+        )  # ... the session type may also be given by sub-function value or ODX name
         requestFunction = target.diagnosticSessionControlContainer.requestFunctions[
             parameter
         ]
@@ -82,7 +90,7 @@ class DiagnosticSessionControlContainer(object):
 
         # Code additions to support interaction with tester present for a given diagnostic session ...
         target.diagnosticSessionControlContainer.currentSession = parameter
-        # Note: if testerPresent is set, then timeout is checked every second, so timeout values less than second will always be equivalent to one second.
+        # Note: if testerPresent is set, tester present is sent once tpTimeout has passed since the last request, to the deadline service's accuracy.
         target.diagnosticSessionControlContainer.testerPresent[parameter] = (
             {"reqd": True, "timeout": tpTimeout}
             if testerPresent
@@ -147,9 +155,14 @@ class DiagnosticSessionControlContainer(object):
     # The purpose of this method is to record the last send time (any message) for the current diagnostic session.
     @staticmethod
     def __sessionSetLastSend(target, **kwargs):
-        target.diagnosticSessionControlContainer.lastSend = int(
-            round(time.time())
-        )  # ... in seconds
+        container = target.diagnosticSessionControlContainer
+        container.lastSend = time.monotonic()  # ... in seconds
+        if container.testerPresentDeadline is not None:
+            tpSessionRecord = target.testerPresentSessionRecord()
+            if tpSessionRecord["reqd"]:
+                container.testerPresentDeadline.restart(tpSessionRecord["timeout"])
+            else:
+                container.testerPresentDeadline.stop()
 
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
@@ -166,6 +179,8 @@ class DiagnosticSessionControlContainer(object):
             "timeout": None,
         }
         target.diagnosticSessionControlContainer.lastSend = None
+        if target.diagnosticSessionControlContainer.testerPresentDeadline is not None:
+            target.diagnosticSessionControlContainer.testerPresentDeadline.stop()
 
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
@@ -174,7 +189,7 @@ class DiagnosticSessionControlContainer(object):
     # The purpose of this method is to inform the caller of the time (in seconds) since the last message was sent for the current diagnostic session.
     @staticmethod
     def __sessionTimeSinceLastSend(target, **kwargs):
-        now = int(round(time.time()))  # ... in seconds
+        now = time.monotonic()  # ... in seconds
         try:
             return now - target.diagnosticSessionControlContainer.lastSend
         except:
@@ -25,6 +25,9 @@ class ECUResetContainer(object):
         self.negativeResponseFunctions = {}
         self.positiveResponseFunctions = {}
 
+        # reset entry by reset type sub-function value, SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
     # as one of the in-built methods. uds.ecuReset("something","something else") It does not operate
@@ -33,6 +36,7 @@ class ECUResetContainer(object):
     def __ecuReset(target, parameter, suppressResponse=False, **kwargs):
 
         # Note: ecuReset does not show support for multiple DIDs in the spec, so this is handling only a single DID with data record.
+        parameter = target.ecuResetContainer.entryIndex.get(parameter, parameter)
         requestFunction = target.ecuResetContainer.requestFunctions[parameter]
         if parameter in target.ecuResetContainer.checkFunctions:
             checkFunction = target.ecuResetContainer.checkFunctions[parameter]
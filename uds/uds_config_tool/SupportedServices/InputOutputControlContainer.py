@@ -25,6 +25,9 @@ class InputOutputControlContainer(object):
         self.negativeResponseFunctions = {}
         self.positiveResponseFunctions = {}
 
+        # entry by (DID, control option) pair, SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
     # as one of the in-built methods. uds.inputOutputControlContainer("something","data record") It does not operate
@@ -33,22 +36,17 @@ class InputOutputControlContainer(object):
     def __inputOutputControl(target, parameter, optionRecord, dataRecord, **kwargs):
 
         # Note: inputOutputControl does not show support for multiple DIDs in the spec, so this is handling only a single DID with data record.
-        requestFunction = target.inputOutputControlContainer.requestFunctions[
-            "{0}[{1}]".format(parameter, optionRecord)
-        ]
-        checkFunction = target.inputOutputControlContainer.checkFunctions[
-            "{0}[{1}]".format(parameter, optionRecord)
-        ]
-        negativeResponseFunction = (
-            target.inputOutputControlContainer.negativeResponseFunctions[
-                "{0}[{1}]".format(parameter, optionRecord)
-            ]
-        )
-        positiveResponseFunction = (
-            target.inputOutputControlContainer.positiveResponseFunctions[
-                "{0}[{1}]".format(parameter, optionRecord)
-            ]
-        )
+        entry = target.inputOutputControlContainer.entryIndex.get((parameter, optionRecord))
+        if entry is None:
+            entry = target.inputOutputControlContainer.entryIndex.get(
+                parameter
+            )  # ... the SHORT-NAME or LONG-NAME of the service
+        if entry is None:
+            entry = "{0}[{1}]".format(parameter, optionRecord)
+        requestFunction = target.inputOutputControlContainer.requestFunctions[entry]
+        checkFunction = target.inputOutputControlContainer.checkFunctions[entry]
+        negativeResponseFunction = target.inputOutputControlContainer.negativeResponseFunctions[entry]
+        positiveResponseFunction = target.inputOutputControlContainer.positiveResponseFunctions[entry]
 
         # Call the sequence of functions to execute the inputOutputControl request/response action ...
         # ==============================================================================
@@ -25,6 +25,9 @@ class ReadDTCContainer(object):
         self.negativeResponseFunctions = {}
         self.positiveResponseFunctions = {}
 
+        # report entry by sub-function value (reportType), SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
     # as one of the in-built methods. uds.readDTC("something") It does not operate
@@ -41,18 +44,13 @@ class ReadDTCContainer(object):
         **kwargs
     ):
         # Note: readDTC does not show support for DIDs or multiple subfunctions in the spec, so this is handling only a single subfunction with data record.
-        requestFunction = target.readDTCContainer.requestFunctions[
-            "FaultMemoryRead[{0}]".format(subfunction)
-        ]
-        checkFunction = target.readDTCContainer.checkFunctions[
-            "FaultMemoryRead[{0}]".format(subfunction)
-        ]
-        negativeResponseFunction = target.readDTCContainer.negativeResponseFunctions[
-            "FaultMemoryRead[{0}]".format(subfunction)
-        ]
-        positiveResponseFunction = target.readDTCContainer.positiveResponseFunctions[
-            "FaultMemoryRead[{0}]".format(subfunction)
-        ]
+        entry = target.readDTCContainer.entryIndex.get(subfunction)
+        if entry is None:
+            entry = "FaultMemoryRead[{0}]".format(subfunction)
+        requestFunction = target.readDTCContainer.requestFunctions[entry]
+        checkFunction = target.readDTCContainer.checkFunctions[entry]
+        negativeResponseFunction = target.readDTCContainer.negativeResponseFunctions[entry]
+        positiveResponseFunction = target.readDTCContainer.positiveResponseFunctions[entry]
 
         # Call the sequence of functions to execute the RDBI request/response action ...
         # ==============================================================================
@@ -12,6 +12,7 @@ __status__ = "Development"
 
 from types import MethodType
 
+from uds.config import Config
 from uds.uds_config_tool.SupportedServices.iContainer import iContainer
 
 
@@ -40,6 +41,9 @@ class ReadDataByIdentifierContainer(object):
 
         self.positiveResponseFunctions = {}
 
+        # DID entry by DID number (e.g. 0xF18C), SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
     ##
     # @brief this method is bound to an external Uds object so that it call be called
     # as one of the in-built methods. uds.readDataByIdentifier("something") It does not operate
@@ -73,6 +77,9 @@ class ReadDataByIdentifierContainer(object):
         dids = parameter
         if type(dids) is not list:
             dids = [dids]
+        # ... DIDs may also be given by number (0xF18C) or ODX short or long name
+        entryIndex = target.readDataByIdentifierContainer.entryIndex
+        dids = [entryIndex.get(did, did) for did in dids]
 
         # Adding acceptance of lists at this point, as the spec allows for multiple rdbi request to be concatenated ...
         requestSIDFunction = target.readDataByIdentifierContainer.requestSIDFunctions[
@@ -114,9 +121,9 @@ class ReadDataByIdentifierContainer(object):
         # ==============================================================================
 
         # Create the request ...
-        request = requestSIDFunction()
+        request = bytearray(requestSIDFunction())
         for didFunc in requestDIDFunctions:
-            request += didFunc()  # ... creates an array of integers
+            request += didFunc()  # ... appends the DID bytes in place
 
         # Send request and receive the response ...
         response = target.send(
@@ -164,10 +171,83 @@ class ReadDataByIdentifierContainer(object):
             ]  # ...we only send back a tuple if there were multiple DIDs
         return returnValue
 
+    ##
+    # @brief packs DIDs into the fewest readDataByIdentifier requests
+    #
+    # The DIDs are packed longest response first, each one into the first request its response
+    # still fits in (first fit decreasing), using the response lengths of checkDIDLengthFunctions.
+    # A DID whose response alone is longer than maxResponseLength gets a request of its own.
+    # @param [in] dids the DIDs, entries of the container (or numbers and names in entryIndex)
+    # @param [in] maxResponseLength longest positive response the transport carries, SID included
+    # @param [in] maxDids most DIDs in one request, 0 or None for no limit
+    # @return the DIDs of each request, as container entries
+    def plan_requests(self, dids, maxResponseLength, maxDids=None):
+        entries = []
+        for did in dids:
+            entry = self.entryIndex.get(did, did)
+            if entry not in entries:
+                entries.append(entry)
+        if not entries:
+            return []
+
+        SIDLength = self.checkSIDLengthFunctions[entries[0]]()
+        lengths = {entry: self.checkDIDLengthFunctions[entry]() for entry in entries}
+
+        requests = []  # ... [response length, entries]
+        for entry in sorted(entries, key=lengths.get, reverse=True):
+            for request in requests:
+                if request[0] + lengths[entry] <= maxResponseLength and (
+                    not maxDids or len(request[1]) < maxDids
+                ):
+                    request[0] += lengths[entry]
+                    request[1].append(entry)
+                    break
+            else:
+                requests.append([SIDLength + lengths[entry], [entry]])
+        return [request[1] for request in requests]
+
+    ##
+    # @brief this method is bound to an external Uds object so that it call be called
+    # as one of the in-built methods. uds.readDataByIdentifiers([...]) reads any number of DIDs
+    # in as few requests as plan_requests allows, Config.uds.rdbi_max_response_length and
+    # Config.uds.rdbi_max_dids giving the limits unless passed.
+    # A request answered negatively is sent again one DID at a time, so that one DID the ECU
+    # does not support only costs its own result (the negative response).
+    # @return the decoded response of each DID, keyed by the DIDs as given
+    @staticmethod
+    def __readDataByIdentifiers(target, parameter, maxResponseLength=None, maxDids=None):
+        if maxResponseLength is None:
+            maxResponseLength = Config.uds.rdbi_max_response_length
+        if maxDids is None:
+            maxDids = Config.uds.rdbi_max_dids
+
+        dids = parameter
+        if isinstance(dids, (str, int)):
+            dids = [dids]
+        dids = list(dids)
+        container = target.readDataByIdentifierContainer
+        requests = container.plan_requests(dids, maxResponseLength, maxDids)
+
+        results = {}  # ... container entry to decoded response
+        for entries in requests:
+            response = target.readDataByIdentifier(entries)
+            if len(entries) == 1:
+                results[entries[0]] = response
+            elif isinstance(response, dict) and "NRC" in response:
+                for entry in entries:
+                    results[entry] = target.readDataByIdentifier(entry)
+            else:
+                results.update(zip(entries, response))
+
+        return {did: results[container.entryIndex.get(did, did)] for did in dids}
+
     def bind_function(self, bindObject):
         bindObject.readDataByIdentifier = MethodType(
             self.__readDataByIdentifier, bindObject
         )
+        bindObject.readDataByIdentifiers = MethodType(
+            self.__readDataByIdentifiers, bindObject
+        )
 
     ##
     # @brief method to add function to container - requestSIDFunction handles the SID component of the request message
@@ -25,6 +25,9 @@ class RoutineControlContainer(object):
         self.negativeResponseFunctions = {}
         self.positiveResponseFunctions = {}
 
+        # entry by (RID, control type) pair, SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
     # as one of the in-built methods. uds.routineControl("something","something else") It does not operate
@@ -40,32 +43,21 @@ class RoutineControlContainer(object):
     ):
 
         # Note: routineControl does not show support for multiple DIDs in the spec, so this is handling only a single DID with data record.
-        requestFunction = target.routineControlContainer.requestFunctions[
-            "{0}[{1}]".format(parameter, controlType)
-        ]
-        if (
-            "{0}[{1}]".format(parameter, controlType)
-            in target.routineControlContainer.checkFunctions
-        ):
-            checkFunction = target.routineControlContainer.checkFunctions[
-                "{0}[{1}]".format(parameter, controlType)
-            ]
+        entry = target.routineControlContainer.entryIndex.get((parameter, controlType))
+        if entry is None:
+            entry = target.routineControlContainer.entryIndex.get(
+                parameter
+            )  # ... the SHORT-NAME or LONG-NAME of the service
+        if entry is None:
+            entry = "{0}[{1}]".format(parameter, controlType)
+        requestFunction = target.routineControlContainer.requestFunctions[entry]
+        if entry in target.routineControlContainer.checkFunctions:
+            checkFunction = target.routineControlContainer.checkFunctions[entry]
         else:
             checkFunction = None
-        negativeResponseFunction = (
-            target.routineControlContainer.negativeResponseFunctions[
-                "{0}[{1}]".format(parameter, controlType)
-            ]
-        )
-        if (
-            "{0}[{1}]".format(parameter, controlType)
-            in target.routineControlContainer.positiveResponseFunctions
-        ):
-            positiveResponseFunction = (
-                target.routineControlContainer.positiveResponseFunctions[
-                    "{0}[{1}]".format(parameter, controlType)
-                ]
-            )
+        negativeResponseFunction = target.routineControlContainer.negativeResponseFunctions[entry]
+        if entry in target.routineControlContainer.positiveResponseFunctions:
+            positiveResponseFunction = target.routineControlContainer.positiveResponseFunctions[entry]
         else:
             positiveResponseFunction = None
 
@@ -25,9 +25,13 @@ class SecurityAccessContainer(object):
         self.negativeResponseFunctions = {}
         self.positiveResponseFunctions = {}
 
+        # entry by security access sub-function value (seed request or key send), SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
     @staticmethod
     def __securityAccess(target, parameter, key=None, suppressResponse=False):
 
+        parameter = target.securityAccessContainer.entryIndex.get(parameter, parameter)
         requestFunction = target.securityAccessContainer.requestFunctions[parameter]
         checkNegativeResponseFunction = (
             target.securityAccessContainer.negativeResponseFunctions[parameter]
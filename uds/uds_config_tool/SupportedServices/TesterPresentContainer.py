@@ -10,10 +10,12 @@ __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
 
+import queue
 import threading
-import time
 from types import MethodType
 
+from uds.uds_communications.Uds.RequestScheduler import RequestPriority
+from uds.uds_communications.Utilities.DeadlineService import deadlineService
 from uds.uds_config_tool.SupportedServices.iContainer import iContainer
 
 
@@ -22,7 +24,7 @@ class TesterPresentContainer(object):
     __metaclass__ = iContainer
 
     testerPresentThreadRef = None
-    testerPresentTargets = set()
+    testerPresentDue = queue.SimpleQueue()  # ... targets whose tester present deadline has passed
 
     def __init__(self):
         self.requestFunctions = {}
@@ -99,45 +101,53 @@ class TesterPresentContainer(object):
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
     # as one of the in-built methods. uds.testerPresentThread() It does not operate
     # on this instance of the container class.
-    # Important Note: we always keep a single thread running in the background monitoring the testerPresent requirements.
-    # As this is static, and we can have many ECU connections via different UDS instances, this means we need to check them all!
+    # Important Note: we always keep a single thread running in the background sending the testerPresent requests.
+    # As this is static, and we can have many ECU connections via different UDS instances, it serves them all:
+    # each target has a deadline on the deadline service, moved on by every send, which queues the target here once it passes.
     @staticmethod
     def __testerPresentThread(target, **kwargs):
         def __tpWorker():
-            # print("work thread started (should be once only)")
             while True:
-                # print("inside worker loop")
-                for tgt in TesterPresentContainer.testerPresentTargets:
-                    try:
-                        transmitting = tgt.isTransmitting()
-                    except:
-                        continue  # ... there's a problem with the stored target - e.g. target no longer in use, so a dead reference - so skip it
-                    # ... otherwise we continue outside of the try/except block to avoid trapping any exceptions that may need to be propagated upwards
-                    # print("target found")
-                    if not transmitting:
-                        # print("target not transmitting")
-                        tpSessionRecord = tgt.testerPresentSessionRecord()
-                        if tpSessionRecord[
-                            "reqd"
-                        ]:  # ... testPresent behaviour is required for the current diagnostic session
-                            # print("tp required for target")
-                            if (
-                                tgt.sessionTimeSinceLastSend()
-                                >= tpSessionRecord["timeout"]
-                            ):
-                                # print("timed out! - sending test present")
-                                tgt.testerPresent()
-                if not threading.main_thread().is_alive():
-                    return
-                time.sleep(
-                    1.0
-                )  # ... check if tester present is required every 1s (we are unlikely to require finer granularity).
-                # Note: I'm avoiding direct wait mechanisms (of testerPresent TO) to allow for radical difference in behaviour for changing diagnostic sessions.
-                # This can of course be changed.
-
-        TesterPresentContainer.testerPresentTargets.add(
-            target
-        )  # ... track a list of all possible concurrent targets, as we process tester present for all targets via one thread
+                try:
+                    tgt = TesterPresentContainer.testerPresentDue.get(timeout=1.0)
+                except queue.Empty:
+                    if not threading.main_thread().is_alive():
+                        return
+                    continue
+                try:
+                    requestScheduler = tgt.requestScheduler
+                except:
+                    continue  # ... there's a problem with the stored target - e.g. target no longer in use, so a dead reference - so skip it
+                # ... otherwise we continue outside of the try/except block to avoid trapping any exceptions that may need to be propagated upwards
+                # the channel is taken ahead of the requests queued for it; the time since the last send is
+                # read once it is held, so a request exchanged meanwhile moves the deadline on instead
+                with requestScheduler.request(RequestPriority.KEEP_ALIVE):
+                    tpSessionRecord = tgt.testerPresentSessionRecord()
+                    if tpSessionRecord[
+                        "reqd"
+                    ]:  # ... testPresent behaviour is required for the current diagnostic session
+                        remaining = (
+                            tpSessionRecord["timeout"] - tgt.sessionTimeSinceLastSend()
+                        )
+                        if remaining <= 0:
+                            tgt.testerPresent()
+                        else:  # ... a request was sent since the deadline passed
+                            tgt.diagnosticSessionControlContainer.testerPresentDeadline.restart(
+                                remaining
+                            )
+
+        container = target.diagnosticSessionControlContainer
+        if container.testerPresentDeadline is None:
+            container.testerPresentDeadline = deadlineService.schedule(
+                callback=lambda deadline: TesterPresentContainer.testerPresentDue.put(
+                    target
+                )
+            )
+        tpSessionRecord = target.testerPresentSessionRecord()
+        if tpSessionRecord["reqd"]:
+            container.testerPresentDeadline.restart(
+                max(0, tpSessionRecord["timeout"] - target.sessionTimeSinceLastSend())
+            )
         if TesterPresentContainer.testerPresentThreadRef is None:
             TesterPresentContainer.testerPresentThreadRef = threading.Thread(
                 name="tpWorker", target=__tpWorker
@@ -25,6 +25,9 @@ class WriteDataByIdentifierContainer(object):
         self.negativeResponseFunctions = {}
         self.positiveResponseFunctions = {}
 
+        # DID entry by DID number (e.g. 0xF18C), SHORT-NAME and LONG-NAME
+        self.entryIndex = {}
+
     ##
     # @brief this method is bound to an external Uds object, referenced by target, so that it can be called
     # as one of the in-built methods. uds.writeDataByIdentifier("something","data record") It does not operate
@@ -33,6 +36,7 @@ class WriteDataByIdentifierContainer(object):
     def __writeDataByIdentifier(target, parameter, dataRecord, **kwargs):
 
         # Note: WDBI does not show support for multiple DIDs in the spec, so this is handling only a single DID with data record.
+        parameter = target.writeDataByIdentifierContainer.entryIndex.get(parameter, parameter)
         requestFunction = target.writeDataByIdentifierContainer.requestFunctions[
             parameter
         ]
@@ -10,8 +10,15 @@ __email__ = "richard.clubb@embeduk.com"
 __status__ = "Development"
 
 
-import xml.etree.ElementTree as ET
-
+import importlib.util
+import sys
+import threading
+from collections import ChainMap
+from functools import partial
+from pathlib import Path
+from types import MethodType, ModuleType
+
+from uds.config import Config
 #from uds.uds_communications.Uds.Uds import Uds
 from uds.uds_config_tool.FunctionCreation.ClearDTCMethodFactory import (
     ClearDTCMethodFactory,
@@ -108,6 +115,14 @@ from uds.uds_config_tool.SupportedServices.TransferExitContainer import (
 from uds.uds_config_tool.SupportedServices.WriteDataByIdentifierContainer import (
     WriteDataByIdentifierContainer,
 )
+from uds.uds_config_tool.OdxCache import OdxCache, libraryFingerprint
+from uds.uds_config_tool.OdxStream import (
+    FrozenDefinitions,
+    OdxServiceStream,
+    freezeService,
+    thawService,
+    unpackElement,
+)
 from uds.uds_config_tool.UtilityFunctions import isDiagServiceTransmissionOnly
 
 
@@ -115,6 +130,56 @@ class UdsContainerAccess:
     containers: list = []
 
 
+##
+# @brief decorator of the UdsTool methods: called on UdsTool they work on the containers of the
+# class, shared by the whole process, called on a UdsTool object on the containers of the object
+class hybridmethod(object):
+    def __init__(self, function):
+        self.__func__ = function
+
+    def __get__(self, instance, owner):
+        return MethodType(self.__func__, owner if instance is None else instance)
+
+
+##
+# @brief returns what tells an ODX file, or a module written by the ODX compiler, from the others
+# A file edited since it was loaded gets a new key.
+def odxKey(xml_file):
+    if isinstance(xml_file, ModuleType):
+        return xml_file.__name__
+    odxPath = Path(xml_file).resolve()
+    odxStat = odxPath.stat()
+    return str(odxPath), odxStat.st_mtime_ns, odxStat.st_size
+
+
+##
+# @class LazyServiceTable
+# @brief service table of a container filled on demand (Config.uds.odx_lazy_load)
+#
+# Looking up an entry not created yet (table[entry], entry in table, table.get(entry)) calls
+# materialise(entry), which creates the service in all the tables of its container, then the
+# lookup is answered as for a plain dict. Iterating over the table only shows the services
+# already created.
+class LazyServiceTable(dict):
+    def __init__(self, materialise, entries=()):
+        super().__init__(entries)
+        self.materialise = materialise
+
+    def __missing__(self, entry):
+        self.materialise(entry)
+        if dict.__contains__(self, entry):
+            return dict.__getitem__(self, entry)
+        raise KeyError(entry)
+
+    def __contains__(self, entry):
+        if not dict.__contains__(self, entry):
+            self.materialise(entry)
+        return dict.__contains__(self, entry)
+
+    def get(self, entry, default=None):
+        return self[entry] if entry in self else default
+
+
 def get_serviceIdFromXmlElement(diagServiceElement, xmlElements):
 
     requestKey = diagServiceElement.find("REQUEST-REF").attrib["ID-REF"]
@@ -130,6 +195,59 @@ def get_serviceIdFromXmlElement(diagServiceElement, xmlElements):
     return None
 
 
+def get_humanNameFromXmlElement(diagServiceElement):
+
+    humanName = ""
+    sdg = diagServiceElement.find("SDGS").find("SDG")
+    for sd in sdg:
+        try:
+            if sd.attrib["SI"] == "DiagInstanceName":
+                humanName = sd.text
+        except KeyError:
+            pass
+
+    return humanName
+
+
+##
+# @brief returns what a service can be looked up by besides its entry in the container tables
+#
+# The numeric identifier read from the CODED-VALUEs of the request (the DID or RID, the
+# sub-function, or (RID, sub-function) for the services with both, e.g. routine control),
+# and the SHORT-NAME and LONG-NAME of the DIAG-SERVICE.
+def get_entryKeysFromXmlElement(diagServiceElement, xmlElements):
+
+    requestKey = diagServiceElement.find("REQUEST-REF").attrib["ID-REF"]
+    identifier = None
+    subfunction = None
+    for param in xmlElements[requestKey].find("PARAMS"):
+        codedValue = param.find("CODED-VALUE")
+        if codedValue is None:
+            continue
+        semantic = param.attrib.get("SEMANTIC")
+        if semantic == "ID":
+            identifier = int(codedValue.text)
+        elif semantic == "SUBFUNCTION":
+            subfunction = int(codedValue.text)
+
+    if identifier is not None and subfunction is not None:
+        keys = [(identifier, subfunction)]
+    else:
+        keys = [key for key in (identifier, subfunction) if key is not None]
+    for nameTag in ("SHORT-NAME", "LONG-NAME"):
+        nameElement = diagServiceElement.find(nameTag)
+        if nameElement is not None and nameElement.text:
+            keys.append(nameElement.text)
+    return keys
+
+
+##
+# @brief adds the keys of a service (get_entryKeysFromXmlElement) to the entry index of its container
+def add_entryKeys(container, diagServiceElement, xmlElements, entry):
+    for key in get_entryKeysFromXmlElement(diagServiceElement, xmlElements):
+        container.entryIndex[key] = entry
+
+
 def fill_dictionary(xmlElement):
     temp_dictionary = {}
     for i in xmlElement:
@@ -137,6 +255,13 @@ def fill_dictionary(xmlElement):
 
     return temp_dictionary
 
+##
+# @class UdsTool
+# @brief creates the services of ODX files in the service containers and binds them to Uds objects
+#
+# Every Uds object owns a UdsTool, so ECUs described by different ODX files can be used side by
+# side. The containers and flags of the class itself are still filled by the methods called on
+# UdsTool (UdsTool.create_service_containers(...)), as in earlier releases.
 class UdsTool:
 
     diagnosticSessionControlContainer = DiagnosticSessionControlContainer()
@@ -167,31 +292,413 @@ class UdsTool:
     transDataService_flag = False
     transExitService_flag = False
     testerPresentService_flag = False
-
+    containers = UdsContainerAccess.containers
+
+    # flag set when services are added to each container, for bind_containers to bind it
+    containerFlags = {
+        "diagnosticSessionControlContainer": "sessionService_flag",
+        "ecuResetContainer": "ecuResetService_flag",
+        "rdbiContainer": "rdbiService_flag",
+        "wdbiContainer": "wdbiService_flag",
+        "clearDTCContainer": "clearDTCService_flag",
+        "readDTCContainer": "readDTCService_flag",
+        "inputOutputControlContainer": "ioCtrlService_flag",
+        "routineControlContainer": "routineCtrlService_flag",
+        "requestDownloadContainer": "reqDownloadService_flag",
+        "securityAccessContainer": "securityAccess_flag",
+        "requestUploadContainer": "reqUploadService_flag",
+        "transferDataContainer": "transDataService_flag",
+        "transferExitContainer": "transExitService_flag",
+        "testerPresentContainer": "testerPresentService_flag",
+    }
+
+    # method factory of the services whose entries hold the qualifier built by their request function
+    qualifiedServices = {
+        IsoServices.ReadDTCInformation: ReadDTCMethodFactory,
+        IsoServices.InputOutputControlByIdentifier: InputOutputControlMethodFactory,
+        IsoServices.RoutineControl: RoutineControlMethodFactory,
+    }
+
+    # entry of the services of the containers keeping their functions under a fixed key instead of the DiagInstanceName
+    fixedServiceEntries = {
+        IsoServices.ClearDiagnosticInformation: "FaultMemoryClear",
+        IsoServices.RequestDownload: "RequestDownload",
+        IsoServices.RequestUpload: "RequestUpload",
+        IsoServices.TransferData: "TransferData",
+        IsoServices.RequestTransferExit: "TransferExit",
+        IsoServices.TesterPresent: "TesterPresent",
+    }
+
+    # containers of the services looked up by entry, which keep an entryIndex of their keys
+    indexedContainers = (
+        "diagnosticSessionControlContainer",
+        "ecuResetContainer",
+        "rdbiContainer",
+        "wdbiContainer",
+        "readDTCContainer",
+        "inputOutputControlContainer",
+        "routineControlContainer",
+        "securityAccessContainer",
+    )
+
+    # container of the services of each SID, for the lazy index
+    serviceContainers = {
+        IsoServices.DiagnosticSessionControl: "diagnosticSessionControlContainer",
+        IsoServices.EcuReset: "ecuResetContainer",
+        IsoServices.ReadDataByIdentifier: "rdbiContainer",
+        IsoServices.WriteDataByIdentifier: "wdbiContainer",
+        IsoServices.ClearDiagnosticInformation: "clearDTCContainer",
+        IsoServices.ReadDTCInformation: "readDTCContainer",
+        IsoServices.InputOutputControlByIdentifier: "inputOutputControlContainer",
+        IsoServices.RoutineControl: "routineControlContainer",
+        IsoServices.RequestDownload: "requestDownloadContainer",
+        IsoServices.SecurityAccess: "securityAccessContainer",
+        IsoServices.RequestUpload: "requestUploadContainer",
+        IsoServices.TransferData: "transferDataContainer",
+        IsoServices.RequestTransferExit: "transferExitContainer",
+        IsoServices.TesterPresent: "testerPresentContainer",
+    }
+
+    # services indexed but not created yet: (container name, entry) to the (frozen service,
+    # definitions of its ODX file) creating the entry, in file order
+    lazyServices = {}
+    lazyServicesLock = threading.RLock()
+
+    # UdsTools sharing their services with this one (share_services) and still holding services not created yet
+    serviceSources = []
+
+    # UdsTool of each ODX file loaded by shared_service_containers, keyed by odxKey
+    sharedTools = {}
+    sharedToolsLock = threading.Lock()
+
+    def __init__(self):
+        self.diagnosticSessionControlContainer = DiagnosticSessionControlContainer()
+        self.ecuResetContainer = ECUResetContainer()
+        self.rdbiContainer = ReadDataByIdentifierContainer()
+        self.wdbiContainer = WriteDataByIdentifierContainer()
+        self.clearDTCContainer = ClearDTCContainer()
+        self.readDTCContainer = ReadDTCContainer()
+        self.inputOutputControlContainer = InputOutputControlContainer()
+        self.routineControlContainer = RoutineControlContainer()
+        self.requestDownloadContainer = RequestDownloadContainer()
+        self.securityAccessContainer = SecurityAccessContainer()
+        self.requestUploadContainer = RequestUploadContainer()
+        self.transferDataContainer = TransferDataContainer()
+        self.transferExitContainer = TransferExitContainer()
+        self.testerPresentContainer = TesterPresentContainer()
+        for flagName in self.containerFlags.values():
+            setattr(self, flagName, False)
+        self.containers = []
+
+        self.lazyServices = {}
+        self.lazyServicesLock = threading.RLock()
+        self.serviceSources = []
+
+    ##
+    # @brief returns the UdsTool holding the services of an ODX file, created once per file
+    #
+    # The UdsTool is never bound, its services are given to others by share_services: every Uds
+    # loading the same file then uses the same functions, with containers of its own.
     @classmethod
+    def shared_service_containers(cls, xml_file):
+        key = odxKey(xml_file)
+        with cls.sharedToolsLock:
+            tool = cls.sharedTools.get(key)
+            if tool is None:
+                tool = cls()
+                tool.create_service_containers(xml_file)
+                cls.sharedTools[key] = tool
+        return tool
+
+    ##
+    # @brief adds the services of this UdsTool to the containers of another one
+    #
+    # The functions are not copied, both UdsTools refer to the same ones. Services of a lazily
+    # loaded ODX file are created here when the other UdsTool first looks them up.
+    @hybridmethod
+    def share_services(cls, tool):
+        with cls.lazyServicesLock:
+            cls.copy_services(tool)
+            if cls.lazyServices:
+                tool.serviceSources.append(cls)
+                for containerName in {containerName for containerName, _ in cls.lazyServices}:
+                    tool.make_tables_lazy(containerName)
+
+    ##
+    # @brief adds the services created in this UdsTool to the containers of another one
+    # @param [in] containerNames only adds the services of these containers
+    # @param [in] entry only adds the functions of this entry
+    @hybridmethod
+    def copy_services(cls, tool, containerNames=None, entry=None):
+        for containerName, flagName in cls.containerFlags.items():
+            container = getattr(cls, containerName)
+            if container not in cls.containers and not getattr(cls, flagName):
+                continue
+            if containerNames is not None and containerName not in containerNames:
+                continue
+            toolContainer = getattr(tool, containerName)
+            for tableName, table in vars(container).items():
+                if not tableName.endswith("Functions"):
+                    continue
+                toolTable = getattr(toolContainer, tableName)
+                if entry is None:
+                    dict.update(toolTable, dict.items(table))
+                elif dict.__contains__(table, entry):
+                    dict.__setitem__(toolTable, entry, dict.__getitem__(table, entry))
+            if entry is None and containerName in cls.indexedContainers:
+                toolContainer.entryIndex.update(container.entryIndex)
+            if getattr(cls, flagName):
+                setattr(tool, flagName, True)
+            if container in cls.containers and toolContainer not in tool.containers:
+                tool.containers.append(toolContainer)
+
+    ##
+    # @brief creates the services of an ODX file
+    #
+    # When Config.uds.odx_cache_dir is set, the service tables of an ODX file already compiled
+    # are read from the cache instead of parsing the file, and newly compiled ones are written to it.
+    # A module written by the ODX compiler (path of the .py file, or the module) is loaded instead.
+    # When Config.uds.odx_lazy_load is set and the file is parsed without the cache, only an index
+    # of the services is built (index_service_containers).
+    @hybridmethod
     def create_service_containers(cls, xml_file):
-        root = ET.parse(xml_file)
-
-        xmlElements = {}
-
-        for child in root.iter():
-            currTag = child.tag
-            try:
-                xmlElements[child.attrib["ID"]] = child
-            except KeyError:
-                pass
+        if isinstance(xml_file, ModuleType) or Path(xml_file).suffix == ".py":
+            cls.load_compiled_odx(xml_file)
+            return
+
+        udsConfig = getattr(Config, "uds", None)
+        cacheDir = getattr(udsConfig, "odx_cache_dir", None)
+        if cacheDir is None:
+            if getattr(udsConfig, "odx_lazy_load", False):
+                cls.index_service_containers(xml_file)
+            else:
+                cls.parse_service_containers(xml_file)
+            return
+
+        cache = OdxCache(cacheDir)
+        serviceTables = cache.load(xml_file)
+        if serviceTables is not None:
+            cls.load_service_tables(serviceTables)
+            return
+
+        previousTables = cls.dump_service_tables()
+        cls.parse_service_containers(xml_file)
+        cache.store(xml_file, cls.dump_service_tables(previousTables))
+
+    ##
+    # @brief returns the functions held by the containers and the service flags set
+    # @param [in] since tables returned by an earlier call, only what changed since is returned
+    @hybridmethod
+    def dump_service_tables(cls, since=None):
+        cls.materialise_services()
+        containers = {}
+        indexes = {}  # ... entryIndex of the containers
+        for containerName in cls.containerFlags:
+            previousTables = {} if since is None else since["containers"].get(containerName, {})
+            tables = {}
+            for tableName, table in vars(getattr(cls, containerName)).items():
+                if not tableName.endswith("Functions"):
+                    continue  # ... session state and the like, not service functions
+                previousTable = previousTables.get(tableName, {})
+                entries = {
+                    entry: aFunction
+                    for entry, aFunction in table.items()
+                    if since is None
+                    or entry not in previousTable
+                    or previousTable[entry] is not aFunction
+                }
+                if entries:
+                    tables[tableName] = entries
+            if tables:
+                containers[containerName] = tables
+
+            if containerName not in cls.indexedContainers:
+                continue
+            previousIndex = {} if since is None else since.get("indexes", {}).get(containerName, {})
+            index = {
+                key: entry
+                for key, entry in getattr(cls, containerName).entryIndex.items()
+                if previousIndex.get(key) != entry
+            }
+            if index:
+                indexes[containerName] = index
+
+        flags = [
+            flagName
+            for containerName, flagName in cls.containerFlags.items()
+            if getattr(cls, flagName)
+            and (
+                since is None
+                or containerName in containers
+                or flagName not in since["flags"]
+            )
+        ]
+        return {"flags": flags, "containers": containers, "indexes": indexes}
+
+    ##
+    # @brief adds functions returned by dump_service_tables to the containers
+    @hybridmethod
+    def load_service_tables(cls, serviceTables):
+        for containerName, tables in serviceTables["containers"].items():
+            container = getattr(cls, containerName)
+            for tableName, table in tables.items():
+                getattr(container, tableName).update(table)
+            if container not in cls.containers:
+                cls.containers.append(container)
+        for containerName, index in serviceTables.get("indexes", {}).items():
+            getattr(cls, containerName).entryIndex.update(index)
+        for flagName in serviceTables["flags"]:
+            setattr(cls, flagName, True)
+
+    ##
+    # @brief adds the services of a module written by the ODX compiler to the containers
+    # @param [in] module the module, or the path of its file
+    @hybridmethod
+    def load_compiled_odx(cls, module):
+        if not isinstance(module, ModuleType):
+            modulePath = Path(module).resolve()
+            moduleName = "uds_compiled_odx_{0}".format(modulePath.stem)
+            module = sys.modules.get(moduleName)
+            if module is None or Path(module.__file__) != modulePath:
+                spec = importlib.util.spec_from_file_location(moduleName, modulePath)
+                module = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(module)  # ... byte compiled to __pycache__
+                sys.modules[moduleName] = module
+
+        if module.LIBRARY_FINGERPRINT != libraryFingerprint():
+            raise Exception(
+                "{0} was compiled by another version of python-uds, compile {1} again".format(
+                    module.__name__, module.ODX_FILE
+                )
+            )
+        cls.load_service_tables(
+            {
+                "flags": module.SERVICE_FLAGS,
+                "containers": module.SERVICE_TABLES,
+                "indexes": getattr(module, "SERVICE_INDEXES", {}),
+            }
+        )
+
+    ##
+    # @brief parses an ODX file and creates its services in the containers
+    #
+    # The file is streamed (see OdxServiceStream), so only the definitions shared by the
+    # services and the service being compiled are held as elements.
+    @hybridmethod
+    def parse_service_containers(cls, xml_file):
+        cls.add_services(OdxServiceStream(xml_file))
+
+    ##
+    # @brief indexes the services of an ODX file, each one is created the first time it is looked up
+    #
+    # Only the request of each service is rebuilt, to find its container and its entry in the
+    # container tables (the DiagInstanceName, plus the qualifier built by the request function
+    # for the services that have one). The service itself is kept packed until a bound method
+    # (e.g. uds.readDataByIdentifier("ECU Serial Number")) looks its entry up in a container
+    # table, then all its functions are created as parse_service_containers would.
+    @hybridmethod
+    def index_service_containers(cls, xml_file):
+        indexedServices = []
+        definitions = {}
+        for servicePacked, messagesPacked, definitions in OdxServiceStream(
+            xml_file
+        ).packedServices():
+            value = unpackElement(servicePacked)
+            if value.tag != "DIAG-SERVICE":
+                continue
+            requestKey = value.find("REQUEST-REF").attrib["ID-REF"]
+            xmlElements = {requestKey: unpackElement(messagesPacked[requestKey])}
+            xmlElements = ChainMap(xmlElements, definitions)
+
+            serviceId = get_serviceIdFromXmlElement(value, xmlElements)
+            containerName = cls.serviceContainers.get(serviceId)
+            if containerName is None:
+                continue
+            if serviceId == IsoServices.SecurityAccess and isDiagServiceTransmissionOnly(value):
+                continue
+            setattr(cls, cls.containerFlags[containerName], True)
+
+            humanName = get_humanNameFromXmlElement(value)
+            if serviceId in cls.fixedServiceEntries:
+                entry = cls.fixedServiceEntries[serviceId]
+            elif serviceId in cls.qualifiedServices:
+                _, qualifier = cls.qualifiedServices[serviceId].create_requestFunction(
+                    value, xmlElements
+                )
+                if qualifier == "":
+                    continue
+                if serviceId == IsoServices.ReadDTCInformation:
+                    humanName = "FaultMemoryRead"
+                entry = humanName + qualifier
+            else:
+                entry = humanName
+            if containerName in cls.indexedContainers:
+                add_entryKeys(getattr(cls, containerName), value, xmlElements, entry)
+            indexedServices.append(
+                ((containerName, entry), freezeService(servicePacked, messagesPacked))
+            )
 
-        for key, value in xmlElements.items():
+        # ... the services are held marshalled, in a fraction of the memory of their functions
+        definitions = FrozenDefinitions(definitions)
+        with cls.lazyServicesLock:
+            for (containerName, entry), frozenService in indexedServices:
+                cls.lazyServices.setdefault((containerName, entry), []).append(
+                    (frozenService, definitions)
+                )
+                cls.make_tables_lazy(containerName)
+                container = getattr(cls, containerName)
+                if container not in cls.containers:
+                    cls.containers.append(container)
+
+    ##
+    # @brief turns the service tables of a container into LazyServiceTables creating their missing entries
+    @hybridmethod
+    def make_tables_lazy(cls, containerName):
+        container = getattr(cls, containerName)
+        for tableName, table in vars(container).items():
+            if tableName.endswith("Functions") and not isinstance(table, LazyServiceTable):
+                setattr(
+                    container,
+                    tableName,
+                    LazyServiceTable(partial(cls.materialise_service, containerName), table),
+                )
+
+    ##
+    # @brief creates a service indexed by index_service_containers, if not created yet
+    @hybridmethod
+    def materialise_service(cls, containerName, entry):
+        with cls.lazyServicesLock:
+            frozenServices = cls.lazyServices.pop((containerName, entry), None)
+            if frozenServices:
+                cls.add_services(
+                    thawService(frozenService, definitions)
+                    for frozenService, definitions in frozenServices
+                )
+            for source in cls.serviceSources:
+                source.materialise_service(containerName, entry)
+                source.copy_services(cls, {containerName}, entry)
+
+    ##
+    # @brief creates all the services indexed by index_service_containers and not created yet
+    @hybridmethod
+    def materialise_services(cls):
+        with cls.lazyServicesLock:
+            for containerName, entry in list(cls.lazyServices):
+                cls.materialise_service(containerName, entry)
+            for source in cls.serviceSources:
+                source.materialise_services()
+                source.copy_services(cls)
+            cls.serviceSources[:] = []
+
+    ##
+    # @brief creates services in the containers
+    # @param [in] services (DIAG-SERVICE element, mapping resolving its ID-REFs) pairs, e.g. an OdxServiceStream
+    @hybridmethod
+    def add_services(cls, services):
+        for value, xmlElements in services:
             if value.tag == "DIAG-SERVICE":
                 serviceId = get_serviceIdFromXmlElement(value, xmlElements)
-                sdg = value.find("SDGS").find("SDG")
-                humanName = ""
-                for sd in sdg:
-                    try:
-                        if sd.attrib["SI"] == "DiagInstanceName":
-                            humanName = sd.text
-                    except KeyError:
-                        pass
+                humanName = get_humanNameFromXmlElement(value)
 
                 if serviceId == IsoServices.DiagnosticSessionControl:
                     cls.sessionService_flag = True
@@ -204,6 +711,9 @@ class UdsTool:
                     cls.diagnosticSessionControlContainer.add_requestFunction(
                         requestFunc, humanName
                     )
+                    add_entryKeys(
+                        cls.diagnosticSessionControlContainer, value, xmlElements, humanName
+                    )
 
                     negativeResponseFunction = DiagnosticSessionControlMethodFactory.create_checkNegativeResponseFunction(
                         value, xmlElements
@@ -227,9 +737,9 @@ class UdsTool:
                     )
                     if (
                         cls.diagnosticSessionControlContainer
-                        not in UdsContainerAccess.containers
+                        not in cls.containers
                     ):
-                        UdsContainerAccess.containers.append(
+                        cls.containers.append(
                             cls.diagnosticSessionControlContainer
                         )
 
@@ -240,6 +750,7 @@ class UdsTool:
                         value, xmlElements
                     )
                     cls.ecuResetContainer.add_requestFunction(requestFunc, humanName)
+                    add_entryKeys(cls.ecuResetContainer, value, xmlElements, humanName)
 
                     negativeResponseFunction = (
                         ECUResetMethodFactory.create_checkNegativeResponseFunction(
@@ -276,8 +787,8 @@ class UdsTool:
                     cls.ecuResetContainer.add_positiveResponseFunction(
                         positiveResponseFunction, humanName
                     )
-                    if cls.ecuResetContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.ecuResetContainer)
+                    if cls.ecuResetContainer not in cls.containers:
+                        cls.containers.append(cls.ecuResetContainer)
                     pass
 
                 elif serviceId == IsoServices.ReadDataByIdentifier:
@@ -293,6 +804,7 @@ class UdsTool:
                         requestFunctions[0], humanName
                     )  # ... note: this will now need to handle replication of this one!!!!
                     cls.rdbiContainer.add_requestDIDFunction(requestFunctions[1], humanName)
+                    add_entryKeys(cls.rdbiContainer, value, xmlElements, humanName)
 
                     negativeResponseFunction = ReadDataByIdentifierMethodFactory.create_checkNegativeResponseFunction(
                         value, xmlElements
@@ -316,8 +828,8 @@ class UdsTool:
                         positiveResponseFunction, humanName
                     )
 
-                    if cls.rdbiContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.rdbiContainer)
+                    if cls.rdbiContainer not in cls.containers:
+                        cls.containers.append(cls.rdbiContainer)
 
                 elif serviceId == IsoServices.SecurityAccess:
                     if isDiagServiceTransmissionOnly(value) == False:
@@ -329,6 +841,7 @@ class UdsTool:
                         cls.securityAccessContainer.add_requestFunction(
                             requestFunction, humanName
                         )
+                        add_entryKeys(cls.securityAccessContainer, value, xmlElements, humanName)
 
                         negativeResponseFunction = SecurityAccessMethodFactory.create_checkNegativeResponseFunction(
                             value, xmlElements
@@ -346,8 +859,8 @@ class UdsTool:
 
                         cls.securityAccess_flag = True
 
-                        if cls.securityAccessContainer not in UdsContainerAccess.containers:
-                            UdsContainerAccess.containers.append(cls.securityAccessContainer)
+                        if cls.securityAccessContainer not in cls.containers:
+                            cls.containers.append(cls.securityAccessContainer)
 
                 elif serviceId == IsoServices.WriteDataByIdentifier:
 
@@ -356,6 +869,7 @@ class UdsTool:
                         value, xmlElements
                     )
                     cls.wdbiContainer.add_requestFunction(requestFunc, humanName)
+                    add_entryKeys(cls.wdbiContainer, value, xmlElements, humanName)
 
                     negativeResponseFunction = WriteDataByIdentifierMethodFactory.create_checkNegativeResponseFunction(
                         value, xmlElements
@@ -376,8 +890,8 @@ class UdsTool:
                         positiveResponseFunction, humanName
                     )
 
-                    if cls.wdbiContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.wdbiContainer)
+                    if cls.wdbiContainer not in cls.containers:
+                        cls.containers.append(cls.wdbiContainer)
 
                 elif serviceId == IsoServices.ClearDiagnosticInformation:
                     cls.clearDTCService_flag = True
@@ -409,8 +923,8 @@ class UdsTool:
                         positiveResponseFunction, humanName
                     )
 
-                    if cls.clearDTCContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.clearDTCContainer)
+                    if cls.clearDTCContainer not in cls.containers:
+                        cls.containers.append(cls.clearDTCContainer)
 
                 elif serviceId == IsoServices.ReadDTCInformation:
                     cls.readDTCService_flag = True
@@ -422,6 +936,9 @@ class UdsTool:
                         cls.readDTCContainer.add_requestFunction(
                             requestFunction, "FaultMemoryRead" + qualifier
                         )
+                        add_entryKeys(
+                            cls.readDTCContainer, value, xmlElements, "FaultMemoryRead" + qualifier
+                        )
 
                         negativeResponseFunction = (
                             ReadDTCMethodFactory.create_checkNegativeResponseFunction(
@@ -450,8 +967,8 @@ class UdsTool:
                             positiveResponseFunction, "FaultMemoryRead" + qualifier
                         )
 
-                        if cls.readDTCContainer not in UdsContainerAccess.containers:
-                            UdsContainerAccess.containers.append(cls.readDTCContainer)
+                        if cls.readDTCContainer not in cls.containers:
+                            cls.containers.append(cls.readDTCContainer)
 
                 elif serviceId == IsoServices.InputOutputControlByIdentifier:
                     cls.ioCtrlService_flag = True
@@ -465,6 +982,9 @@ class UdsTool:
                         cls.inputOutputControlContainer.add_requestFunction(
                             requestFunc, humanName + qualifier
                         )
+                        add_entryKeys(
+                            cls.inputOutputControlContainer, value, xmlElements, humanName + qualifier
+                        )
 
                         negativeResponseFunction = InputOutputControlMethodFactory.create_checkNegativeResponseFunction(
                             value, xmlElements
@@ -487,8 +1007,8 @@ class UdsTool:
                             positiveResponseFunction, humanName + qualifier
                         )
 
-                        if cls.inputOutputControlContainer not in UdsContainerAccess.containers:
-                            UdsContainerAccess.containers.append(
+                        if cls.inputOutputControlContainer not in cls.containers:
+                            cls.containers.append(
                                 cls.inputOutputControlContainer
                             )
 
@@ -505,6 +1025,9 @@ class UdsTool:
                         cls.routineControlContainer.add_requestFunction(
                             requestFunc, humanName + qualifier
                         )
+                        add_entryKeys(
+                            cls.routineControlContainer, value, xmlElements, humanName + qualifier
+                        )
 
                         negativeResponseFunction = RoutineControlMethodFactory.create_checkNegativeResponseFunction(
                             value, xmlElements
@@ -527,8 +1050,8 @@ class UdsTool:
                             positiveResponseFunction, humanName + qualifier
                         )
 
-                        if cls.routineControlContainer not in UdsContainerAccess.containers:
-                            UdsContainerAccess.containers.append(cls.routineControlContainer)
+                        if cls.routineControlContainer not in cls.containers:
+                            cls.containers.append(cls.routineControlContainer)
 
                 elif serviceId == IsoServices.RequestDownload:
                     cls.reqDownloadService_flag = True
@@ -562,8 +1085,8 @@ class UdsTool:
                         positiveResponseFunction, humanName
                     )
 
-                    if cls.requestDownloadContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.requestDownloadContainer)
+                    if cls.requestDownloadContainer not in cls.containers:
+                        cls.containers.append(cls.requestDownloadContainer)
 
                 elif serviceId == IsoServices.RequestUpload:
                     cls.reqUploadService_flag = True
@@ -597,8 +1120,8 @@ class UdsTool:
                         positiveResponseFunction, humanName
                     )
 
-                    if cls.requestUploadContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.requestUploadContainer)
+                    if cls.requestUploadContainer not in cls.containers:
+                        cls.containers.append(cls.requestUploadContainer)
 
                 elif serviceId == IsoServices.TransferData:
                     cls.transDataService_flag = True
@@ -632,8 +1155,8 @@ class UdsTool:
                         positiveResponseFunction, humanName
                     )
 
-                    if cls.transferDataContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.transferDataContainer)
+                    if cls.transferDataContainer not in cls.containers:
+                        cls.containers.append(cls.transferDataContainer)
 
                 elif serviceId == IsoServices.RequestTransferExit:
                     cls.transExitService_flag = True
@@ -667,8 +1190,8 @@ class UdsTool:
                         positiveResponseFunction, humanName
                     )
 
-                    if cls.transferExitContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.transferExitContainer)
+                    if cls.transferExitContainer not in cls.containers:
+                        cls.containers.append(cls.transferExitContainer)
 
                 elif serviceId == IsoServices.TesterPresent:
                     # Note: Tester Present is presented here as an exposed service, but it will typically not be called directly, as we'll hook it
@@ -704,12 +1227,12 @@ class UdsTool:
                         positiveResponseFunction, "TesterPresent"
                     )
 
-                    if cls.testerPresentContainer not in UdsContainerAccess.containers:
-                        UdsContainerAccess.containers.append(cls.testerPresentContainer)
+                    if cls.testerPresentContainer not in cls.containers:
+                        cls.containers.append(cls.testerPresentContainer)
 
 
 
-    @classmethod
+    @hybridmethod
     def bind_containers(cls, uds_instance)-> None:
         # Bind any ECU Reset services that have been found
         if cls.sessionService_flag: